@@ -3,7 +3,7 @@
 import { useState, useEffect } from 'react';
 import { useRouter } from 'next/navigation';
 import { useAuth } from '@/contexts/auth-context';
-import { Task, Category, FilterOptions, TaskStatus } from '@/types';
+import { Task, Category, FilterOptions, TaskStatus, TaskStats } from '@/types';
 import { TaskCard } from '@/components/TaskCard';
 import { FilterBar } from '@/components/FilterBar';
 import { LoadingSpinner } from '@/components/LoadingSpinner';
@@ -20,6 +20,7 @@ export default function Dashboard() {
   const router = useRouter();
   const [tasks, setTasks] = useState<Task[]>([]);
   const [categories, setCategories] = useState<Category[]>([]);
+  const [stats, setStats] = useState<TaskStats | null>(null);
   const [filters, setFilters] = useState<FilterOptions>({
     status: 'all',
     category: 'all',
@@ -27,6 +28,9 @@ export default function Dashboard() {
   });
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  // Cursor for the page after the loaded tasks; null once the last page is in
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
 
   // Redirect if not authenticated
@@ -36,35 +40,75 @@ export default function Dashboard() {
     }
   }, [isAuthenticated, authLoading, router]);
 
-  // Load data from backend
+  // Load categories and header counts from backend
   useEffect(() => {
     if (!isAuthenticated) return;
 
     const loadData = async () => {
       try {
-        setError(null);
-        setLoading(true);
-        
-        // Load tasks and categories in parallel
-        const [tasksData, categoriesData] = await Promise.all([
-          todoService.getTasks(),
-          todoService.getCategories()
+        const [categoriesData, statsData] = await Promise.all([
+          todoService.getCategories(),
+          todoService.getTaskStats()
         ]);
-        
-        setTasks(tasksData);
+
         setCategories(categoriesData);
+        setStats(statsData);
       } catch (error: any) {
         console.error('Error loading data:', error);
-        setError(error.message || 'Failed to load data. Please try again.');
         toast.error(error.message || 'Failed to load data');
-      } finally {
-        setLoading(false);
       }
     };
 
     loadData();
   }, [isAuthenticated]);
 
+  // Load the first page of tasks; status and category are filtered by the server
+  useEffect(() => {
+    if (!isAuthenticated) return;
+
+    let cancelled = false;
+    const loadTasks = async () => {
+      try {
+        setError(null);
+        setLoading(true);
+
+        const page = await todoService.getTasks({
+          status: filters.status === 'all' ? undefined : filters.status,
+          category: filters.category === 'all' ? undefined : filters.category,
+        });
+        if (cancelled) return;
+
+        setTasks(page.results);
+        setNextPage(page.next);
+      } catch (error: any) {
+        if (cancelled) return;
+        console.error('Error loading tasks:', error);
+        setError(error.message || 'Failed to load data. Please try again.');
+        toast.error(error.message || 'Failed to load tasks');
+      } finally {
+        if (!cancelled) setLoading(false);
+      }
+    };
+
+    loadTasks();
+    return () => { cancelled = true; };
+  }, [isAuthenticated, filters.status, filters.category]);
+
+  const loadMoreTasks = async () => {
+    if (!nextPage || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const page = await todoService.getTasks({}, nextPage);
+      setTasks(prev => [...prev, ...page.results]);
+      setNextPage(page.next);
+    } catch (error: any) {
+      console.error('Error loading more tasks:', error);
+      toast.error(error.message || 'Failed to load more tasks');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // Don't render if not authenticated
   if (authLoading || !isAuthenticated) {
     return (
@@ -77,10 +121,10 @@ export default function Dashboard() {
     );
   }
 
-  // Filter tasks based on current filters
+  // Status and category are applied by the server; priority bands only here, on the loaded pages.
+  // Status is re-checked so a task moved out of the filter disappears without a reload.
   const filteredTasks = tasks.filter(task => {
     if (filters.status !== 'all' && task.status !== filters.status) return false;
-    if (filters.category !== 'all' && task.category?.id !== filters.category) return false;
     if (filters.priority !== 'all') {
       const priority = task.priority_score >= 7 ? 'high' : task.priority_score >= 4 ? 'medium' : 'low';
       if (priority !== filters.priority) return false;
@@ -88,20 +132,12 @@ export default function Dashboard() {
     return true;
   });
 
-  // Calculate task counts
-  const taskCounts = {
-    total: tasks.length,
-    pending: tasks.filter(t => t.status === 'pending').length,
-    in_progress: tasks.filter(t => t.status === 'in_progress').length,
-    completed: tasks.filter(t => t.status === 'completed').length,
-  };
+  // Header counts are computed by the server (/api/tasks/stats/)
+  const taskCounts = stats ?? { total: 0, pending: 0, in_progress: 0, completed: 0, overdue: 0 };
 
-  // Calculate overdue tasks
-  const overdueTasks = tasks.filter(task => 
-    task.deadline && 
-    new Date(task.deadline) < new Date() && 
-    task.status !== 'completed'
-  ).length;
+  const refreshStats = () => {
+    todoService.getTaskStats().then(setStats).catch(() => {});
+  };
 
   const handleTaskEdit = (task: Task) => {
     router.push(`/tasks/edit/${task.id}`);
@@ -112,6 +148,7 @@ export default function Dashboard() {
       try {
         await todoService.deleteTask(id);
         setTasks(prev => prev.filter(task => task.id !== id));
+        refreshStats();
         toast.success('Task deleted successfully');
       } catch (error: any) {
         console.error('Error deleting task:', error);
@@ -126,6 +163,7 @@ export default function Dashboard() {
       setTasks(prev => prev.map(task => 
         task.id === id ? updatedTask : task
       ));
+      refreshStats();
       toast.success(`Task marked as ${status.replace('_', ' ')}`);
     } catch (error: any) {
       console.error('Error updating task status:', error);
@@ -222,7 +260,7 @@ export default function Dashboard() {
             <div className="flex items-center justify-between">
               <div>
                 <p className="text-xs sm:text-sm text-rich-mauve">Overdue</p>
-                <p className="text-xl sm:text-2xl font-bold text-red-600">{overdueTasks}</p>
+                <p className="text-xl sm:text-2xl font-bold text-red-600">{taskCounts.overdue}</p>
               </div>
               <AlertCircle className="h-6 w-6 sm:h-8 sm:w-8 text-red-600" />
             </div>
@@ -245,7 +283,7 @@ export default function Dashboard() {
             {filters.status === 'all' ? 'All Tasks' : `${filters.status.replace('_', ' ')} Tasks`}
           </h2>
           <Badge variant="outline" className="self-start sm:self-auto border-soft-mauve text-rich-mauve">
-            {filteredTasks.length} of {tasks.length} tasks
+            {filteredTasks.length} of {taskCounts.total} tasks
           </Badge>
         </div>
 
@@ -255,7 +293,7 @@ export default function Dashboard() {
               <CheckSquare className="h-12 w-12 text-rich-mauve mx-auto mb-4" />
               <p className="text-rich-mauve text-lg">No tasks found</p>
               <p className="text-rich-mauve mt-2 text-sm sm:text-base">
-                {tasks.length === 0 
+                {taskCounts.total === 0 
                   ? "Create your first task to get started!" 
                   : "Try adjusting your filters or create a new task."
                 }
@@ -281,6 +319,19 @@ export default function Dashboard() {
             ))}
           </div>
         )}
+
+        {nextPage && (
+          <div className="flex justify-center">
+            <Button
+              variant="outline"
+              onClick={loadMoreTasks}
+              disabled={loadingMore}
+              className="border-soft-mauve text-rich-mauve"
+            >
+              {loadingMore ? 'Loading...' : 'Load more tasks'}
+            </Button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -14,7 +14,6 @@ import { Badge } from '@/components/ui/badge';
 import { CalendarIcon, Save, Sparkles, Loader2, Target, Clock, Tag, FileText, AlertCircle } from 'lucide-react';
 import { cn } from '@/lib/utils';
 import { format } from 'date-fns';
-import todoService from '@/services/todo-service';
 
 interface TaskFormProps {
   task?: Task;
@@ -112,15 +111,11 @@ export function TaskForm({
 
     setAiLoading(true);
     try {
-      // Get context data for AI suggestions
-      const contexts = await todoService.getContexts();
-      const contextData = contexts.map(c => c.content);
-
+      // The server adds the most relevant context entries itself
       await onAIEnhance({
         title: formData.title,
         description: formData.description,
         category: formData.category ? categories.find(c => c.id === formData.category)?.name : undefined,
-        context_data: contextData,
       });
     } catch (error) {
       console.error('Error getting AI suggestions:', error);
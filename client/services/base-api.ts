@@ -32,6 +32,34 @@ axiosInstance.interceptors.request.use((config) => {
   return config;
 });
 
+// One refresh at a time: parallel 401s wait for the same new token
+let refreshPromise: Promise<string> | null = null;
+
+function refreshAccessToken(refreshToken: string): Promise<string> {
+  if (!refreshPromise) {
+    refreshPromise = axios
+      .post(
+        `${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/auth/refresh/`,
+        { refresh_token: refreshToken },
+        // Lets the server re-set the HttpOnly token cookies
+        { withCredentials: true }
+      )
+      .then((response) => {
+        const { access_token, refresh_token } = response.data;
+        localStorage.setItem('access_token', access_token);
+        // Supabase rotates refresh tokens; the old one stops working
+        if (refresh_token) {
+          localStorage.setItem('refresh_token', refresh_token);
+        }
+        return access_token as string;
+      })
+      .finally(() => {
+        refreshPromise = null;
+      });
+  }
+  return refreshPromise;
+}
+
 // Response interceptor to handle token refresh and errors
 axiosInstance.interceptors.response.use(
   (response) => response,
@@ -46,12 +74,7 @@ axiosInstance.interceptors.response.use(
       
       if (refreshToken) {
         try {
-          const response = await axios.post(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/auth/refresh/`, {
-            refresh_token: refreshToken
-          });
-
-          const { access_token } = response.data;
-          localStorage.setItem('access_token', access_token);
+          const access_token = await refreshAccessToken(refreshToken);
 
           // Retry original request with new token
           originalRequest.headers['Authorization'] = `Bearer ${access_token}`;
@@ -1,5 +1,5 @@
 import axiosInstance from '@/services/base-api';
-import { Task, Category, ContextEntry, AISuggestionInput, AISuggestionResponse, TaskStatus } from '@/types';
+import { Task, Category, ContextEntry, AISuggestionInput, AISuggestionResponse, TaskStatus, TaskStats, SyncResponse, ChangeEvent } from '@/types';
 
 export interface CreateTaskRequest {
   title: string;
@@ -32,11 +32,25 @@ export interface CategorizeResponse {
   suggested_category: string;
 }
 
+export interface PaginatedResponse<T> {
+  next: string | null;
+  results: T[];
+}
+
+export interface TaskListParams {
+  status?: TaskStatus;
+  category?: number;
+  limit?: number;
+}
+
 const todoService = {
   // Task operations
-  getTasks: async (): Promise<Task[]> => {
+  // One page of the cursor-paginated list. Pass the previous page's `next` URL to get the page after it.
+  getTasks: async (params: TaskListParams = {}, next?: string | null): Promise<PaginatedResponse<Task>> => {
     try {
-      const response = await axiosInstance.get<Task[]>('/api/tasks/');
+      const response = next
+        ? await axiosInstance.get<PaginatedResponse<Task>>(next)
+        : await axiosInstance.get<PaginatedResponse<Task>>('/api/tasks/', { params });
       return response.data;
     } catch (error: any) {
       console.error('Error fetching tasks:', error.response?.data || error.message);
@@ -44,6 +58,16 @@ const todoService = {
     }
   },
 
+  getTaskStats: async (): Promise<TaskStats> => {
+    try {
+      const response = await axiosInstance.get<TaskStats>('/api/tasks/stats/');
+      return response.data;
+    } catch (error: any) {
+      console.error('Error fetching task stats:', error.response?.data || error.message);
+      throw new Error(error.response?.data?.detail || 'Failed to fetch task stats');
+    }
+  },
+
   getTask: async (id: number): Promise<Task> => {
     try {
       const response = await axiosInstance.get<Task>(`/api/tasks/${id}/`);
@@ -83,6 +107,37 @@ const todoService = {
     }
   },
 
+  // Bulk task operations: one request and one transaction for many tasks
+  bulkCreateTasks: async (items: CreateTaskRequest[]): Promise<Task[]> => {
+    try {
+      const response = await axiosInstance.post<Task[]>('/api/tasks/bulk/', { items });
+      return response.data;
+    } catch (error: any) {
+      console.error('Error creating tasks:', error.response?.data || error.message);
+      throw new Error(error.response?.data?.detail || 'Failed to create tasks');
+    }
+  },
+
+  bulkUpdateTasks: async (items: UpdateTaskRequest[]): Promise<Task[]> => {
+    try {
+      const response = await axiosInstance.patch<Task[]>('/api/tasks/bulk/', { items });
+      return response.data;
+    } catch (error: any) {
+      console.error('Error updating tasks:', error.response?.data || error.message);
+      throw new Error(error.response?.data?.detail || 'Failed to update tasks');
+    }
+  },
+
+  bulkDeleteTasks: async (ids: number[]): Promise<number> => {
+    try {
+      const response = await axiosInstance.delete<{ deleted: number }>('/api/tasks/bulk/', { data: { ids } });
+      return response.data.deleted;
+    } catch (error: any) {
+      console.error('Error deleting tasks:', error.response?.data || error.message);
+      throw new Error(error.response?.data?.detail || 'Failed to delete tasks');
+    }
+  },
+
   // Category operations
   getCategories: async (): Promise<Category[]> => {
     try {
@@ -163,6 +218,32 @@ const todoService = {
     }
   },
 
+  // Delta sync: pass the cursor from the previous call to get only what changed
+  sync: async (since?: string): Promise<SyncResponse> => {
+    try {
+      const response = await axiosInstance.get<SyncResponse>('/api/sync/', { params: since ? { since } : {} });
+      return response.data;
+    } catch (error: any) {
+      console.error('Error syncing:', error.response?.data || error.message);
+      throw new Error(error.response?.data?.detail || 'Failed to sync');
+    }
+  },
+
+  // Live changes over Server-Sent Events (authenticated by the authToken cookie).
+  // EventSource reconnects on its own and resumes with Last-Event-ID. Returns a function that closes the stream.
+  subscribeToChanges: (
+    onChange: (event: ChangeEvent) => void,
+    onSync: (changes: SyncResponse) => void,
+    since?: string,
+  ): (() => void) => {
+    const base = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+    const query = since ? `?since=${encodeURIComponent(since)}` : '';
+    const source = new EventSource(`${base}/api/changes/${query}`, { withCredentials: true });
+    source.addEventListener('change', (e) => onChange(JSON.parse((e as MessageEvent).data)));
+    source.addEventListener('sync', (e) => onSync(JSON.parse((e as MessageEvent).data)));
+    return () => source.close();
+  },
+
   // AI and Smart features
   suggestCategory: async (data: CategorizeRequest): Promise<CategorizeResponse> => {
     try {
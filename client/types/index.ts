@@ -17,11 +17,44 @@ export interface Task {
   updated_at: string;
 }
 
+export interface TaskCounts {
+  total: number;
+  pending: number;
+  in_progress: number;
+  completed: number;
+  overdue: number;
+}
+
+export interface CategoryTaskCounts extends TaskCounts {
+  id: number | null;
+  name: string;
+}
+
+export interface TaskStats extends TaskCounts {
+  categories: CategoryTaskCounts[];
+}
+
+export interface SyncResponse {
+  cursor: string;
+  reset: boolean;
+  changes: { tasks: Task[]; categories: Category[]; contexts: ContextEntry[] };
+  deleted: { tasks: number[]; categories: number[]; contexts: number[] };
+}
+
+export interface ChangeEvent {
+  kind: 'tasks' | 'categories' | 'contexts';
+  op: 'upsert' | 'patch' | 'delete';
+  id: number;
+  data?: Record<string, unknown>;
+  cursor: string;
+  refetch?: boolean;
+}
+
 export interface AISuggestionInput {
   title: string;
   description: string;
   category?: string;
-  context_data: string[];
+  context?: string;
 }
 
 export interface AISuggestionResponse {
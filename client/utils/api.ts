@@ -57,6 +57,9 @@ class ApiClient {
             if (refreshToken) {
               const response = await this.refreshToken(refreshToken);
               localStorage.setItem('access_token', response.access_token);
+              if (response.refresh_token) {
+                localStorage.setItem('refresh_token', response.refresh_token);
+              }
               
               // Retry original request with new token
               originalRequest.headers.Authorization = `Bearer ${response.access_token}`;
@@ -14,6 +14,126 @@ SUPABASE_SERVICE_KEY  = os.getenv("SUPABASE_SERVICE_KEY")
 SUPABASE_ANON_KEY     = os.getenv("SUPABASE_ANON_KEY")
 HF_API_KEY            = os.getenv("HF_API_KEY")
 
+# "live" or "stub": in-process stand-ins for Supabase Auth and Hugging Face (see todo/stubs.py)
+SUPABASE_BACKEND          = os.getenv("SUPABASE_BACKEND", "live")
+HF_BACKEND                = os.getenv("HF_BACKEND", "live")
+HF_STUB_LATENCY           = float(os.getenv("HF_STUB_LATENCY", "0.3"))  # seconds per inference call
+HF_STUB_JITTER            = float(os.getenv("HF_STUB_JITTER", "0.1"))
+
+# Local JWT verification (falls back to supabase.auth.get_user when unavailable)
+SUPABASE_JWT_SECRET       = os.getenv("SUPABASE_JWT_SECRET") or (
+    "stub-jwt-secret" if SUPABASE_BACKEND == "stub" else None  # the stub signs its own tokens
+)
+SUPABASE_JWT_AUDIENCE     = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+SUPABASE_JWKS_URL         = os.getenv("SUPABASE_JWKS_URL") or (
+    f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None
+)
+SUPABASE_JWKS_TTL         = int(os.getenv("SUPABASE_JWKS_TTL", "600"))
+AUTH_VERIFY_LOCALLY       = os.getenv("AUTH_VERIFY_LOCALLY", "True") == "True"
+AUTH_PROFILE_CACHE_TTL    = int(os.getenv("AUTH_PROFILE_CACHE_TTL", "300"))
+AUTH_PROFILE_CACHE_SIZE   = int(os.getenv("AUTH_PROFILE_CACHE_SIZE", "10000"))
+AUTH_REFRESH_REUSE_SECONDS = int(os.getenv("AUTH_REFRESH_REUSE_SECONDS", "10"))  # repeat refreshes reuse the session
+AUTH_REFRESH_CACHE_SIZE   = int(os.getenv("AUTH_REFRESH_CACHE_SIZE", "10000"))
+
+# Category matcher used by suggest_category
+CATEGORY_MATCH_WORD_BOUNDARY = os.getenv("CATEGORY_MATCH_WORD_BOUNDARY", "True") == "True"
+CATEGORY_MATCH_PREFER        = os.getenv("CATEGORY_MATCH_PREFER", "longest")  # "longest" or "first"
+CATEGORY_INDEX_TTL           = int(os.getenv("CATEGORY_INDEX_TTL", "60"))
+CATEGORY_INDEX_CACHE_SIZE    = int(os.getenv("CATEGORY_INDEX_CACHE_SIZE", "1000"))  # owners kept in memory
+
+# Offline category classifier (manage.py train_category_model)
+CATEGORY_MODEL_DIR           = os.getenv("CATEGORY_MODEL_DIR", str(BASE_DIR / "category_models"))
+CATEGORY_MODEL_MIN_SCORE     = float(os.getenv("CATEGORY_MODEL_MIN_SCORE", "0.15"))  # cosine similarity
+CATEGORY_BATCH_MAX_ITEMS     = int(os.getenv("CATEGORY_BATCH_MAX_ITEMS", "5000"))
+
+# Hugging Face suggestion cache: "memory", "django", "db" or "none"
+HF_SUGGESTION_CACHE_BACKEND  = os.getenv("HF_SUGGESTION_CACHE_BACKEND", "memory")
+HF_SUGGESTION_CACHE_TTL      = int(os.getenv("HF_SUGGESTION_CACHE_TTL", str(24 * 3600)))
+HF_SUGGESTION_CACHE_SIZE     = int(os.getenv("HF_SUGGESTION_CACHE_SIZE", "5000"))
+
+# Hugging Face Inference API client
+HF_MODEL                     = os.getenv("HF_MODEL", "google/flan-t5-base")
+HF_API_URL                   = os.getenv("HF_API_URL", f"https://api-inference.huggingface.co/models/{HF_MODEL}")
+HF_CONNECT_TIMEOUT           = float(os.getenv("HF_CONNECT_TIMEOUT", "3.05"))
+HF_READ_TIMEOUT              = float(os.getenv("HF_READ_TIMEOUT", "30"))
+HF_MAX_RETRIES               = int(os.getenv("HF_MAX_RETRIES", "3"))
+HF_BACKOFF_BASE              = float(os.getenv("HF_BACKOFF_BASE", "0.5"))
+HF_BACKOFF_MAX               = float(os.getenv("HF_BACKOFF_MAX", "20"))
+HF_TOTAL_DEADLINE            = float(os.getenv("HF_TOTAL_DEADLINE", "45"))  # seconds; no retry starts after this
+HF_POOL_SIZE                 = int(os.getenv("HF_POOL_SIZE", "10"))
+HF_ASYNC_POOL_SIZE           = int(os.getenv("HF_ASYNC_POOL_SIZE", "100"))
+HF_BREAKER_THRESHOLD         = int(os.getenv("HF_BREAKER_THRESHOLD", "5"))
+HF_BREAKER_RESET_TIMEOUT     = float(os.getenv("HF_BREAKER_RESET_TIMEOUT", "30"))
+
+# Admission control for Hugging Face calls, per process: over a limit calls queue,
+# a full queue answers 503 and a user with too many calls queued gets 429
+HF_MAX_CONCURRENCY           = int(os.getenv("HF_MAX_CONCURRENCY", "16"))
+HF_QUEUE_SIZE                = int(os.getenv("HF_QUEUE_SIZE", "64"))
+HF_QUEUE_TIMEOUT             = float(os.getenv("HF_QUEUE_TIMEOUT", "15"))  # seconds waited before 503
+HF_USER_MAX_CONCURRENCY      = int(os.getenv("HF_USER_MAX_CONCURRENCY", "4"))
+HF_USER_MAX_PENDING          = int(os.getenv("HF_USER_MAX_PENDING", "16"))
+
+# Prompt size and the context entries retrieved for it
+HF_PROMPT_TOKEN_BUDGET       = int(os.getenv("HF_PROMPT_TOKEN_BUDGET", "512"))  # flan-t5 input limit
+CONTEXT_SEARCH_LIMIT         = int(os.getenv("CONTEXT_SEARCH_LIMIT", "5"))  # top-k entries, 0 disables
+CONTEXT_SEARCH_CONFIG        = os.getenv("CONTEXT_SEARCH_CONFIG", "english")  # Postgres text search config
+
+# Serve /ai/suggestions/ and /tasks/suggest-category/ with the async views (ASGI deployments)
+ASYNC_AI_VIEWS               = os.getenv("ASYNC_AI_VIEWS", "False") == "True"
+
+# Batch AI suggestions
+HF_BATCH_MAX_WORKERS         = int(os.getenv("HF_BATCH_MAX_WORKERS", "8"))
+HF_BATCH_MAX_ITEMS           = int(os.getenv("HF_BATCH_MAX_ITEMS", "50"))
+
+# Dashboard stats cache (per owner in the Django cache, dropped when their tasks change)
+TASK_STATS_TTL               = int(os.getenv("TASK_STATS_TTL", "60"))
+
+# Delta sync (/api/sync/)
+SYNC_TOMBSTONE_DAYS          = int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))  # tombstone retention
+SYNC_OVERLAP                 = int(os.getenv("SYNC_OVERLAP", "5"))  # seconds re-read before the cursor
+
+# Build the task list from .values() rows instead of TaskSerializer (same output, less CPU)
+TASK_FAST_LIST               = os.getenv("TASK_FAST_LIST", "True") == "True"
+
+# Request instrumentation: Server-Timing header and Prometheus /metrics (per process)
+METRICS_ENABLED              = os.getenv("METRICS_ENABLED", "True") == "True"
+METRICS_TOKEN                = os.getenv("METRICS_TOKEN")  # Bearer token for /metrics; unset: only served with DEBUG
+SERVER_TIMING_HEADER         = os.getenv("SERVER_TIMING_HEADER", "True") == "True"
+
+# Bulk export / import (/api/export/, /api/import/, manage.py import_data): rows per DB round trip
+TRANSFER_CHUNK_SIZE          = int(os.getenv("TRANSFER_CHUNK_SIZE", "2000"))
+
+# Context ingestion (/api/contexts/ingest/<whatsapp|email>/, manage.py ingest_contexts)
+CONTEXT_INGEST_BATCH_SIZE    = int(os.getenv("CONTEXT_INGEST_BATCH_SIZE", "1000"))  # entries per insert
+CONTEXT_INGEST_MAX_CHARS     = int(os.getenv("CONTEXT_INGEST_MAX_CHARS", "10000"))  # kept per entry
+CONTEXT_INGEST_EMAIL_BYTES   = int(os.getenv("CONTEXT_INGEST_EMAIL_BYTES", str(1024 * 1024)))  # per email; attachments past it are dropped
+
+# Change feed (/api/changes/, Server-Sent Events; ASGI only)
+CHANGE_FEED_ENABLED          = os.getenv("CHANGE_FEED_ENABLED", "True") == "True"
+CHANGE_FEED_BROKER           = os.getenv("CHANGE_FEED_BROKER", "local")  # "local" (one process) or "postgres"
+CHANGE_FEED_QUEUE_SIZE       = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "100"))  # per client, then it resyncs
+CHANGE_FEED_MAX_CONNECTIONS  = int(os.getenv("CHANGE_FEED_MAX_CONNECTIONS", "5000"))  # per process
+CHANGE_FEED_HEARTBEAT        = float(os.getenv("CHANGE_FEED_HEARTBEAT", "25"))  # seconds between pings
+CHANGE_FEED_MAX_AGE          = float(os.getenv("CHANGE_FEED_MAX_AGE", "900"))  # streams end; clients reconnect
+CHANGE_FEED_RETRY_MS         = int(os.getenv("CHANGE_FEED_RETRY_MS", "2000"))  # EventSource reconnect delay
+
+# Priority re-scoring (manage.py rescore_priorities)
+PRIORITY_HORIZON_DAYS        = int(os.getenv("PRIORITY_HORIZON_DAYS", "14"))  # urgency starts rising
+PRIORITY_AGE_CAP_DAYS        = int(os.getenv("PRIORITY_AGE_CAP_DAYS", "30"))
+PRIORITY_CHUNK_SIZE          = int(os.getenv("PRIORITY_CHUNK_SIZE", "50000"))
+PRIORITY_WRITE_BATCH_SIZE    = int(os.getenv("PRIORITY_WRITE_BATCH_SIZE", "1000"))
+
+# Max items per /tasks/bulk/ request
+TASK_BULK_MAX_ITEMS          = int(os.getenv("TASK_BULK_MAX_ITEMS", "1000"))
+
+# Background task enrichment (manage.py enrichment_worker)
+TASK_ENRICHMENT_ENABLED      = os.getenv("TASK_ENRICHMENT_ENABLED", "True") == "True"
+ENRICHMENT_BATCH_SIZE        = int(os.getenv("ENRICHMENT_BATCH_SIZE", "20"))
+ENRICHMENT_MAX_ATTEMPTS      = int(os.getenv("ENRICHMENT_MAX_ATTEMPTS", "5"))
+ENRICHMENT_RETRY_DELAY       = int(os.getenv("ENRICHMENT_RETRY_DELAY", "30"))
+ENRICHMENT_POLL_INTERVAL     = float(os.getenv("ENRICHMENT_POLL_INTERVAL", "2"))
+ENRICHMENT_LOCK_TIMEOUT      = int(os.getenv("ENRICHMENT_LOCK_TIMEOUT", "600"))
+
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.getenv('SECRET_KEY')
 
@@ -42,6 +162,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # <- MUST be first
+    'todo.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -71,17 +192,47 @@ TEMPLATES = [
 WSGI_APPLICATION = 'core.wsgi.application'
 
 # Database configuration
+DB_ENGINE = os.getenv('DB_ENGINE', 'django.db.backends.postgresql')  # sqlite3 for local runs
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE':   DB_ENGINE,
         'NAME':     os.getenv('DB_NAME'),
         'USER':     os.getenv('DB_USER'),
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST':     os.getenv('DB_HOST'),
         'PORT':     os.getenv('DB_PORT', '5432'),
+        # Seconds to keep a connection open between requests. 0 (Django's default) closes it
+        # after each request; keep 0 under ASGI (async views, /api/changes/), where persistent
+        # connections leak. Under WSGI (gunicorn) e.g. 60 saves a connect per request.
+        # Health checks replace a connection that died while idle.
+        'CONN_MAX_AGE':       int(os.getenv('DB_CONN_MAX_AGE', '0')),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        # Required behind a transaction-mode pooler (Supabase's pooler on port 6543, PgBouncer)
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', 'False') == 'True',
+        'OPTIONS': (
+            {'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5'))}
+            if DB_ENGINE == 'django.db.backends.postgresql' else {}
+        ),
     }
 }
 
+# Optional read replica for the viewsets' list/retrieve (todo/db_router.py).
+# Unset DB_REPLICA_* values fall back to the primary's.
+if os.getenv('DB_REPLICA_HOST') or os.getenv('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME':     os.getenv('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'USER':     os.getenv('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST':     os.getenv('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT':     os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST':     {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['todo.db_router.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '10'))  # reads stay on the primary after a write
+
 # DRF default auth + permissions
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -90,6 +241,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'todo.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 # Password validation
@@ -139,3 +294,8 @@ CORS_ALLOW_HEADERS = [
     "x-csrftoken",
     "x-requested-with",
 ]
+
+# Let the frontend read our custom response headers
+CORS_EXPOSE_HEADERS = [
+    "X-Suggestion-Cache",
+]
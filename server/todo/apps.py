@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+def create_search_index(sender, using="default", **kwargs):
+    from .context_search import ensure_search_index
+    ensure_search_index(using)
 
 
 class TodoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'todo'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # Full-text index on ContextEntry.content (vendor-specific, so not in a migration)
+        post_migrate.connect(create_search_index, sender=self)
+        # Per-request query count and DB time for Server-Timing and /metrics
+        from .metrics import install_db_wrapper
+        connection_created.connect(install_db_wrapper)
@@ -0,0 +1,197 @@
+"""
+Async views for ASGI deployments.
+
+The AI views (settings.ASYNC_AI_VIEWS) send outbound Hugging Face calls through
+the pooled httpx client, so one worker can hold many in-flight suggestion
+requests instead of one per thread. The change feed holds one idle coroutine,
+not a thread, per connected client.
+"""
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+
+from .authentication import SupabaseAuthentication
+from .events import RESYNC, get_broker
+from .hf_client import aget_ai_task_suggestions_with_status, parse_suggestion
+from .hf_http import HuggingFaceRateLimited, HuggingFaceUnavailable
+from .serializers import CategorizeSerializer
+from .sync import InvalidCursor, get_changes, parse_cursor
+from .utils import suggest_category
+
+
+class AsyncAuthenticatedView(View):
+    """
+    Minimal async counterpart of a DRF APIView: JSON body, Supabase auth
+    and DRF-shaped error responses.
+    """
+    http_method_names = ["post", "options"]
+
+    authentication_class = SupabaseAuthentication
+
+    async def authenticate(self, request):
+        result = await self.authentication_class().aauthenticate(request)
+        if result is None:
+            raise exceptions.NotAuthenticated()
+        request.user, request.auth = result
+
+    def parse_body(self, request):
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            raise exceptions.ParseError()
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            await self.authenticate(request)
+            data = self.parse_body(request)
+            return await self.handle(request, data)
+        except exceptions.APIException as e:
+            return JsonResponse({"detail": str(e.detail)}, status=e.status_code)
+
+    async def handle(self, request, data):
+        raise NotImplementedError
+
+
+class AsyncCategorizeView(AsyncAuthenticatedView):
+    async def handle(self, request, data):
+        ser = CategorizeSerializer(data=data)
+        if not ser.is_valid():
+            return JsonResponse(ser.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = ser.validated_data
+
+        # May rebuild the category index from the DB
+        suggested = await sync_to_async(suggest_category)(
+            data["title"], data["description"], owner_id=request.user.pk
+        )
+        return JsonResponse({"suggested_category": suggested}, status=status.HTTP_200_OK)
+
+
+class AsyncAISuggestionView(AsyncAuthenticatedView):
+    async def handle(self, request, data):
+        try:
+            title = data.get("title", "")
+            description = data.get("description", "")
+            context = data.get("context", "")
+
+            output, cache_status = await aget_ai_task_suggestions_with_status(
+                title, description, context, owner_id=request.user.pk
+            )
+            result = parse_suggestion(output)
+
+            resp = JsonResponse(result, status=status.HTTP_200_OK)
+            resp["X-Suggestion-Cache"] = cache_status
+            return resp
+
+        except HuggingFaceRateLimited as e:
+            resp = JsonResponse({"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            resp["Retry-After"] = str(e.retry_after)
+            return resp
+        except HuggingFaceUnavailable as e:
+            resp = JsonResponse({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            if e.retry_after:
+                resp["Retry-After"] = str(e.retry_after)
+            return resp
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class CookieTokenAuthentication(SupabaseAuthentication):
+    """Bearer header or, for EventSource (which can't set headers), the authToken cookie."""
+
+    def get_token(self, request):
+        return super().get_token(request) or request.COOKIES.get("authToken")
+
+
+def sse(event, data, event_id=None):
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'), default=str)}")
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class ChangeFeedView(AsyncAuthenticatedView):
+    """
+    GET /api/changes/: Server-Sent Events stream of the user's changes (events.py).
+
+      event: sync    a delta sync payload (as /api/sync/) to catch up with: sent
+                     first when resuming (Last-Event-ID or ?since=) and after the
+                     client fell too far behind
+      event: change  one event from the broker
+      : ping         heartbeat comment, keeps proxies from closing idle streams
+
+    Each event's id is its cursor, so EventSource resumes from where it was
+    after a reconnect. Streams end after CHANGE_FEED_MAX_AGE so clients
+    reconnect, and re-authenticate, regularly.
+    """
+    http_method_names = ["get", "options"]
+    authentication_class = CookieTokenAuthentication
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            if not settings.CHANGE_FEED_ENABLED:
+                raise exceptions.NotFound()
+            await self.authenticate(request)
+            since = self.get_cursor(request)
+        except exceptions.APIException as e:
+            return JsonResponse({"detail": str(e.detail)}, status=e.status_code)
+
+        if not isinstance(request, ASGIRequest):
+            # Under WSGI every open stream would hold a worker thread
+            return JsonResponse(
+                {"detail": "The change feed needs an ASGI server."}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        broker = get_broker()
+        if broker.connections() >= settings.CHANGE_FEED_MAX_CONNECTIONS:
+            resp = JsonResponse({"detail": "Too many open change feeds."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            resp["Retry-After"] = "5"
+            return resp
+
+        resp = StreamingHttpResponse(self.stream(broker, request.user.pk, since), content_type="text/event-stream")
+        resp["Cache-Control"] = "no-cache"
+        resp["X-Accel-Buffering"] = "no"  # nginx: don't buffer the stream
+        return resp
+
+    def get_cursor(self, request):
+        value = request.headers.get("Last-Event-ID") or request.GET.get("since")
+        if not value:
+            return None
+        try:
+            return parse_cursor(value)
+        except InvalidCursor as e:
+            raise exceptions.ValidationError({"since": str(e)})
+
+    async def stream(self, broker, owner_id, since):
+        # Subscribe before catching up, so nothing committed in between is missed
+        subscriber = broker.subscribe(owner_id)
+        cursor = None
+        try:
+            # retry: how long EventSource waits before reconnecting
+            yield f"retry: {settings.CHANGE_FEED_RETRY_MS}\n\n".encode("utf-8")
+            if since is not None:
+                changes = await sync_to_async(get_changes)(owner_id, since)
+                cursor = changes["cursor"]
+                yield sse("sync", changes, cursor)
+
+            deadline = time.monotonic() + settings.CHANGE_FEED_MAX_AGE
+            while (remaining := deadline - time.monotonic()) > 0:
+                event = await subscriber.get(min(settings.CHANGE_FEED_HEARTBEAT, remaining))
+                if event is None:
+                    yield b": ping\n\n"
+                elif event is RESYNC or event.get("op") == "resync":
+                    # Without a cursor the client gets a full snapshot (reset=True)
+                    changes = await sync_to_async(get_changes)(owner_id, parse_cursor(cursor))
+                    cursor = changes["cursor"]
+                    yield sse("sync", changes, cursor)
+                else:
+                    cursor = event["cursor"]
+                    yield sse("change", event, cursor)
+        finally:
+            # Also runs when the client disconnects and the server cancels the stream
+            broker.unsubscribe(subscriber)
@@ -1,16 +1,179 @@
+import hashlib
+import threading
+from collections import Counter
+
+import jwt
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from rest_framework.authentication import BaseAuthentication
 from rest_framework import exceptions
-from gotrue.errors import AuthApiError
 
-from .supabase_client import supabase
+from .cache import SingleFlight, TTLCache
+from .metrics import phase
+from . import supabase_client
+from .supabase_client import get_supabase
 from .models import UserProfile
 
+# verified `sub` -> UserProfile, so repeat requests skip the DB lookup
+profile_cache = TTLCache(
+    maxsize=settings.AUTH_PROFILE_CACHE_SIZE,
+    ttl=settings.AUTH_PROFILE_CACHE_TTL,
+)
+
+# sha256(refresh token) -> the Session it was exchanged for. Supabase refresh tokens
+# are single use; parallel 401s must not each spend the same one
+refreshed_sessions = TTLCache(
+    maxsize=settings.AUTH_REFRESH_CACHE_SIZE,
+    ttl=settings.AUTH_REFRESH_REUSE_SECONDS,
+)
+_refresh_flights = SingleFlight()
+
+# JWKS kids that a re-fetched key set didn't contain: rejected without fetching again
+unknown_kids = TTLCache(maxsize=1000, ttl=60)
+
+# How tokens were verified: "local", "remote", "rejected"
+verification_counts = Counter()
+_counts_lock = threading.Lock()
+
+_jwks_client = None
+_jwks_lock = threading.Lock()
+
+
+class LocalVerificationUnavailable(Exception):
+    """Raised when a token cannot be checked locally and the remote check must be used."""
+
+
+def _count(kind):
+    with _counts_lock:
+        verification_counts[kind] += 1
+
+
+def _get_jwks_client():
+    """Shared JWKS client; PyJWKClient re-fetches the key set every SUPABASE_JWKS_TTL seconds."""
+    global _jwks_client
+    if _jwks_client is None and settings.SUPABASE_JWKS_URL:
+        with _jwks_lock:
+            if _jwks_client is None:
+                _jwks_client = jwt.PyJWKClient(
+                    settings.SUPABASE_JWKS_URL,
+                    cache_keys=True,
+                    lifespan=settings.SUPABASE_JWKS_TTL,
+                    headers={"apikey": settings.SUPABASE_ANON_KEY or ""},
+                    timeout=5,
+                )
+    return _jwks_client
+
+
+def verify_token_locally(token):
+    """
+    Check the token signature and expiry without calling Supabase.
+    Returns the verified claims, raises jwt.InvalidTokenError for bad tokens
+    and LocalVerificationUnavailable when there is no key material to check against.
+    """
+    alg = jwt.get_unverified_header(token).get("alg")
+
+    if alg == "HS256":
+        if not settings.SUPABASE_JWT_SECRET:
+            raise LocalVerificationUnavailable("SUPABASE_JWT_SECRET is not set")
+        key = settings.SUPABASE_JWT_SECRET
+    elif alg in ("RS256", "ES256"):
+        client = _get_jwks_client()
+        if client is None:
+            raise LocalVerificationUnavailable("No JWKS URL configured")
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is not None and unknown_kids.get(kid):
+            raise jwt.InvalidTokenError("Unknown signing key")
+        try:
+            key = client.get_signing_key_from_jwt(token).key
+        except jwt.PyJWKClientConnectionError as e:
+            raise LocalVerificationUnavailable(str(e)) from e
+        except jwt.PyJWKClientError as e:
+            # Not in the key set even after PyJWKClient re-fetched it; don't re-fetch for this kid for a while
+            if kid is not None:
+                unknown_kids.set(kid, True)
+            raise jwt.InvalidTokenError(str(e)) from e
+    else:
+        raise jwt.InvalidAlgorithmError(f"Unsupported token algorithm: {alg}")
+
+    return jwt.decode(
+        token,
+        key,
+        algorithms=[alg],
+        audience=settings.SUPABASE_JWT_AUDIENCE,
+        options={"require": ["exp", "sub"]},
+    )
+
+
+def _uses_shared_secret(token):
+    try:
+        return jwt.get_unverified_header(token).get("alg") == "HS256"
+    except jwt.InvalidTokenError:
+        return False
+
+
+def get_cached_profile(supabase_uid):
+    """Return the UserProfile for a verified Supabase uid, using the TTL cache."""
+    profile = profile_cache.get(supabase_uid)
+    if profile is None:
+        profile = UserProfile.objects.get(supabase_uid=supabase_uid)
+        profile_cache.set(supabase_uid, profile)
+    return profile
+
+
+async def aget_cached_profile(supabase_uid):
+    """Async version of get_cached_profile."""
+    profile = profile_cache.get(supabase_uid)
+    if profile is None:
+        profile = await UserProfile.objects.aget(supabase_uid=supabase_uid)
+        profile_cache.set(supabase_uid, profile)
+    return profile
+
+
+def _refresh_upstream(key, refresh_token):
+    session = refreshed_sessions.get(key)  # another caller finished it meanwhile
+    if session is None:
+        with phase("http", upstream="supabase_auth"):
+            session = get_supabase().auth.refresh_session(refresh_token).session
+        refreshed_sessions.set(key, session)
+    return session
+
+
+def refresh_session(refresh_token):
+    """
+    Exchange a refresh token for a new Supabase session. Concurrent refreshes of the
+    same token share one upstream call, and for AUTH_REFRESH_REUSE_SECONDS afterwards
+    the token keeps returning that session. Raises AuthApiError if Supabase rejects it.
+    """
+    key = hashlib.sha256(refresh_token.encode("utf-8")).hexdigest()
+    session = refreshed_sessions.get(key)
+    if session is None:
+        session = _refresh_flights.do(key, lambda: _refresh_upstream(key, refresh_token))
+    return session
+
+
+def auth_stats():
+    """Profile cache hit/miss counters plus how tokens have been verified."""
+    with _counts_lock:
+        counts = dict(verification_counts)
+    return {
+        "profile_cache": profile_cache.stats(),
+        "refresh_cache": refreshed_sessions.stats(),
+        "verification": counts,
+    }
+
+
 class SupabaseAuthentication(BaseAuthentication):
     """
-    Authenticate requests by validating the Bearer token with Supabase.
+    Authenticate requests by validating the Bearer token.
+    Tokens are verified locally against the JWT secret / JWKS when possible,
+    with supabase.auth.get_user as the fallback.
     """
 
-    def authenticate(self, request):
+    def authenticate_header(self, request):
+        # Makes DRF answer 401 (not 403) to missing/expired tokens, which is what triggers a client refresh
+        return 'Bearer realm="api"'
+
+    def get_token(self, request):
         auth_header = request.headers.get("Authorization")
         if not auth_header:
             return None  # No credentials provided
@@ -18,23 +181,77 @@ class SupabaseAuthentication(BaseAuthentication):
         parts = auth_header.split()
         if len(parts) != 2 or parts[0].lower() != "bearer":
             raise exceptions.AuthenticationFailed("Invalid Authorization header")
+        return parts[1]
+
+    def authenticate(self, request):
+        token = self.get_token(request)
+        if token is None:
+            return None
+
+        with phase("auth"):
+            uid = self.verify_token(token)
 
-        token = parts[1]
+            # Map to your local UserProfile
+            try:
+                profile = get_cached_profile(uid)
+            except UserProfile.DoesNotExist:
+                raise exceptions.AuthenticationFailed("User not found in local DB")
+
+        # `profile` becomes request.user, `token` becomes auth
+        return (profile, token)
+
+    async def aauthenticate(self, request):
+        """Async version of authenticate for the ASGI views."""
+        token = self.get_token(request)
+        if token is None:
+            return None
+
+        with phase("auth"):
+            uid = None
+            if _uses_shared_secret(token):
+                # HS256 checks are CPU-only and safe on the event loop
+                uid = self.verify_token_locally(token)
+            if uid is None:
+                # JWKS fetches and the get_user fallback are blocking HTTP calls
+                uid = await sync_to_async(self.verify_token, thread_sensitive=False)(token)
+
+            try:
+                profile = await aget_cached_profile(uid)
+            except UserProfile.DoesNotExist:
+                raise exceptions.AuthenticationFailed("User not found in local DB")
+        return (profile, token)
+
+    def verify_token(self, token):
+        """Return the Supabase uid (`sub`) the token was issued for."""
+        return self.verify_token_locally(token) or self.verify_token_remotely(token)
+
+    def verify_token_locally(self, token):
+        """uid from local verification, or None when it can't be done locally."""
+        if not settings.AUTH_VERIFY_LOCALLY:
+            return None
+        try:
+            claims = verify_token_locally(token)
+        except LocalVerificationUnavailable:
+            return None  # Caller falls back to the remote check
+        except jwt.InvalidTokenError:
+            _count("rejected")
+            raise exceptions.AuthenticationFailed("Invalid or expired token")
+        _count("local")
+        return claims["sub"]
+
+    def verify_token_remotely(self, token):
         try:
             # Validate token with Supabase
-            user_resp = supabase.auth.get_user(token)
-        except AuthApiError:
+            with phase("http", upstream="supabase_auth"):
+                user_resp = get_supabase().auth.get_user(token)
+        except supabase_client.AuthApiError:
+            _count("rejected")
             raise exceptions.AuthenticationFailed("Invalid or expired token")
 
         user = getattr(user_resp, "user", None)
         if not user:
+            _count("rejected")
             raise exceptions.AuthenticationFailed("Invalid or expired token")
 
-        # Map to your local UserProfile
-        try:
-            profile = UserProfile.objects.get(supabase_uid=user.id)
-        except UserProfile.DoesNotExist:
-            raise exceptions.AuthenticationFailed("User not found in local DB")
-
-        # `profile` becomes request.user, `token` becomes auth
-        return (profile, token)
+        _count("remote")
+        return user.id
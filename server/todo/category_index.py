@@ -0,0 +1,127 @@
+from collections import deque
+
+from django.conf import settings
+
+from .cache import TTLCache
+from .models import Category
+
+
+class CategoryIndex:
+    """
+    Aho-Corasick automaton over lowercased category names.
+    One pass over the text finds every category occurrence, so matching cost
+    no longer grows with the number of categories.
+
+    match policy:
+      word_boundary - only accept matches that start and end on a word boundary
+      prefer        - "longest" picks the longest matching name (ties -> leftmost),
+                      "first" picks the leftmost match (ties -> longest)
+    """
+
+    def __init__(self, names, word_boundary=True, prefer="longest"):
+        if prefer not in ("longest", "first"):
+            raise ValueError(f"Unknown match preference: {prefer}")
+        self.word_boundary = word_boundary
+        self.prefer = prefer
+        self.names = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        seen = set()
+        for name in names:
+            key = name.strip().lower()
+            # Keep the first category for duplicate names, like the old DB-order scan
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            self._insert(key, len(self.names))
+            self.names.append(name)
+        self._build_fail_links()
+
+    def __len__(self):
+        return len(self.names)
+
+    def _insert(self, key, idx):
+        node = 0
+        for ch in key:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(key), idx))
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[child] = self._goto[f].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def _on_boundary(self, text, start, end):
+        before = text[start - 1] if start > 0 else " "
+        after = text[end] if end < len(text) else " "
+        return not before.isalnum() and not after.isalnum()
+
+    def match(self, text):
+        """Return the best matching category name for `text`, or None."""
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        best = None  # (sort key, name index)
+        node = 0
+        for end, ch in enumerate(text, start=1):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, idx in out[node]:
+                start = end - length
+                if self.word_boundary and not self._on_boundary(text, start, end):
+                    continue
+                if self.prefer == "longest":
+                    key = (-length, start)
+                else:
+                    key = (start, -length)
+                if best is None or key < best[0]:
+                    best = (key, idx)
+        return self.names[best[1]] if best else None
+
+
+# owner id -> CategoryIndex; entries expire after CATEGORY_INDEX_TTL seconds,
+# which picks up changes made by other workers
+_indexes = TTLCache(maxsize=settings.CATEGORY_INDEX_CACHE_SIZE, ttl=settings.CATEGORY_INDEX_TTL)
+
+
+def invalidate_category_index(owner_id=None):
+    """Drop the owner's index; the next lookup rebuilds it."""
+    _indexes.delete(owner_id)
+
+
+def get_category_index(owner_id=None):
+    """
+    CategoryIndex over the owner's categories, built once and reused until one of
+    their Category rows is saved or deleted (signals) or the entry expires.
+    """
+    index = _indexes.get(owner_id)
+    if index is None:
+        names = (
+            Category.objects
+            .filter(owner_id=owner_id)
+            .order_by("id")
+            .values_list("name", flat=True)
+        )
+        index = CategoryIndex(
+            names,
+            word_boundary=settings.CATEGORY_MATCH_WORD_BOUNDARY,
+            prefer=settings.CATEGORY_MATCH_PREFER,
+        )
+        _indexes.set(owner_id, index)
+    return index
@@ -0,0 +1,169 @@
+"""
+Offline category classifier: hashed word uni/bigrams, TF-IDF weighted, scored
+against one L2-normalised centroid per category (cosine similarity).
+
+One model per owner, trained from their categorized tasks by
+`manage.py train_category_model` and stored as CATEGORY_MODEL_DIR/owner_<id>.npz.
+Only the hashed features seen in training are kept (sorted, so lookups are a
+searchsorted), which keeps a model small and a prediction a few array ops.
+
+numpy is imported on first use, not at startup: the views import this module,
+and most requests never reach the classifier.
+"""
+import os
+import re
+import zlib
+
+from django.conf import settings
+
+from .cache import TTLCache
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def text_features(text):
+    """Stable hashes of the word unigrams and bigrams in `text` (with repeats)."""
+    import numpy as np
+
+    words = _WORD.findall(text.lower())
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    # crc32, not hash(): Python's string hash changes between processes
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint32, count=len(grams))
+
+
+def _sparse_rows(texts, features, idf):
+    """
+    TF-IDF rows for `texts` as (row, column, value) triples over the model's
+    feature columns, each row L2-normalised. Unknown features are dropped.
+    Only the hashing is per text; the rest is vectorised over the whole batch.
+    """
+    import numpy as np
+
+    hashed = [text_features(t) for t in texts]
+    lengths = np.fromiter((len(h) for h in hashed), dtype=np.int64, count=len(hashed))
+    if not lengths.sum() or not len(features):
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float32)
+    hashes = np.concatenate(hashed)
+    rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+
+    pos = np.searchsorted(features, hashes)
+    pos[pos == len(features)] = 0
+    known = features[pos] == hashes
+    # Term counts per (row, column), sorted by row
+    keys, counts = np.unique(rows[known] * len(features) + pos[known], return_counts=True)
+    if not len(keys):
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float32)
+    rows, cols = np.divmod(keys, len(features))
+
+    vals = ((1 + np.log(counts)) * idf[cols]).astype(np.float32)  # sublinear tf
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    norms = np.sqrt(np.add.reduceat(vals * vals, starts))
+    vals /= np.repeat(norms, np.diff(np.r_[starts, len(rows)]))
+    return rows, cols, vals
+
+
+class CategoryClassifier:
+    def __init__(self, features, idf, centroids, category_ids, names):
+        self.features = features          # (V,) uint32, sorted hashed features
+        self.idf = idf                    # (V,) float32
+        self.centroids = centroids        # (C, V) float32, rows L2-normalised
+        self.category_ids = category_ids  # (C,) int64
+        self.names = names                # (C,) str
+
+    def __len__(self):
+        return len(self.category_ids)
+
+    @classmethod
+    def fit(cls, texts, category_ids, names):
+        """
+        Train from parallel lists: task text, its category id, and that category's name.
+        """
+        import numpy as np
+
+        hashed = [np.unique(text_features(t)) for t in texts]
+        features = np.unique(np.concatenate(hashed)) if hashed else np.empty(0, np.uint32)
+        # Document frequency -> smoothed idf, as in scikit-learn's TfidfVectorizer
+        df = np.zeros(len(features), dtype=np.float64)
+        for h in hashed:
+            df[np.searchsorted(features, h)] += 1
+        idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+
+        ids, labels = np.unique(np.asarray(category_ids, dtype=np.int64), return_inverse=True)
+        name_of = dict(zip(category_ids, names))
+        centroids = np.zeros((len(ids), len(features)), dtype=np.float32)
+        rows, cols, vals = _sparse_rows(texts, features, idf)
+        np.add.at(centroids, (labels[rows], cols), vals)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        centroids /= np.where(norms == 0, 1, norms)
+        return cls(features, idf, centroids, ids, np.array([name_of[i] for i in ids]))
+
+    def scores(self, texts):
+        """(len(texts), C) cosine similarities, computed in one pass over all texts."""
+        import numpy as np
+
+        scores = np.zeros((len(texts), len(self)), dtype=np.float32)
+        rows, cols, vals = _sparse_rows(texts, self.features, self.idf)
+        if len(rows):
+            contrib = self.centroids[:, cols].T * vals[:, None]  # (nnz, C)
+            starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            scores[rows[starts]] = np.add.reduceat(contrib, starts, axis=0)
+        return scores
+
+    def predict_batch(self, texts, min_score=None):
+        """Best (name, score) per text; name is None when no category scores at least `min_score`."""
+        import numpy as np
+
+        min_score = settings.CATEGORY_MODEL_MIN_SCORE if min_score is None else min_score
+        if not len(self):
+            return [(None, 0.0)] * len(texts)
+        scores = self.scores(texts)
+        best = scores.argmax(axis=1)
+        top = scores[np.arange(len(texts)), best]
+        return [
+            (str(self.names[b]) if s >= min_score else None, float(s))
+            for b, s in zip(best, top)
+        ]
+
+    def predict(self, text, min_score=None):
+        return self.predict_batch([text], min_score)[0]
+
+    def save(self, path):
+        import numpy as np
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp, features=self.features, idf=self.idf, centroids=self.centroids,
+            category_ids=self.category_ids, names=self.names,
+        )
+        os.replace(tmp, path)  # readers never see a half-written file
+
+    @classmethod
+    def load(cls, path):
+        import numpy as np
+
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["features"], data["idf"], data["centroids"], data["category_ids"], data["names"])
+
+
+def model_path(owner_id):
+    return os.path.join(settings.CATEGORY_MODEL_DIR, f"owner_{owner_id}.npz")
+
+
+# owner id -> (file mtime, CategoryClassifier)
+_models = TTLCache(maxsize=settings.CATEGORY_INDEX_CACHE_SIZE, ttl=settings.CATEGORY_INDEX_TTL)
+
+
+def get_category_model(owner_id):
+    """The owner's trained classifier, or None if none has been trained."""
+    path = model_path(owner_id)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    cached = _models.get(owner_id)
+    # Retraining replaces the file; pick the new one up on the next call
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, CategoryClassifier.load(path))
+        _models.set(owner_id, cached)
+    return cached[1]
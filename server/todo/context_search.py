@@ -0,0 +1,165 @@
+"""
+Full-text retrieval of a user's ContextEntry rows, used to pick the context
+that goes into an AI prompt.
+
+PostgreSQL: a stored generated tsvector column with a GIN index, ranked with
+ts_rank. The vector is computed once when a row is written (bulk ingests
+included), not per query.
+SQLite (local runs): an FTS5 table kept in sync by triggers, ranked with bm25.
+Both are created by ensure_search_index() after `migrate` (migrations aren't
+checked in). Anything else, or a SQLite without FTS5, falls back to scoring
+the user's most recent entries in Python.
+
+The column is built with CONTEXT_SEARCH_CONFIG as it was when it was added;
+to change the config, drop the column and run `migrate` again.
+"""
+import logging
+import re
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from .models import ContextEntry
+
+logger = logging.getLogger(__name__)
+
+GIN_INDEX_NAME = "context_content_search_idx"  # expression index, replaced by the column's
+VECTOR_COLUMN = "search_vector"
+VECTOR_INDEX_NAME = "context_search_vector_idx"
+FTS_TABLE = f"{ContextEntry._meta.db_table}_fts"
+MAX_TERMS = 32
+FALLBACK_SCAN = 500
+
+_WORD = re.compile(r"[^\W_]+")
+_fts_ready = {}  # database alias -> FTS5 table exists
+_vector_ready = {}  # database alias -> search_vector column exists
+
+
+def search_terms(text):
+    """Distinct lowercased words of 3+ characters, in order of appearance."""
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        if len(word) >= 3 and word not in terms:
+            terms.append(word)
+    return terms[:MAX_TERMS]
+
+
+def ensure_search_index(using="default"):
+    """Create the full-text index for the database `using` (idempotent)."""
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        base = ContextEntry._meta.db_table
+        config = settings.CONTEXT_SEARCH_CONFIG.replace("'", "")
+        with connection.schema_editor() as editor:
+            # Same expression SearchVector("content", config=...) compiles to
+            editor.execute(
+                f"ALTER TABLE {base} ADD COLUMN IF NOT EXISTS {VECTOR_COLUMN} tsvector "
+                f"GENERATED ALWAYS AS (to_tsvector('{config}'::regconfig, COALESCE(content, ''))) STORED"
+            )
+            editor.execute(f"CREATE INDEX IF NOT EXISTS {VECTOR_INDEX_NAME} ON {base} USING gin ({VECTOR_COLUMN})")
+            editor.execute(f"DROP INDEX IF EXISTS {GIN_INDEX_NAME}")
+        _vector_ready[using] = True
+    elif connection.vendor == "sqlite":
+        base = ContextEntry._meta.db_table
+        statements = [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            f"USING fts5(content, content='{base}', content_rowid='id')",
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {base} BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content); END",
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {base} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content); END",
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF content ON {base} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content); "
+            f"INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content); END",
+            # Table rebuilds during migrate drop the triggers; resync from the base table
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+        ]
+        try:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+        except DatabaseError as e:
+            logger.warning("SQLite FTS5 unavailable, context search will scan rows: %s", e)
+            return
+        _fts_ready[using] = True
+
+
+def _sqlite_fts_ready(connection):
+    if connection.alias not in _fts_ready:
+        _fts_ready[connection.alias] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_ready[connection.alias]
+
+
+def _pg_vector_ready(connection):
+    if connection.alias not in _vector_ready:
+        with connection.cursor() as cursor:
+            columns = connection.introspection.get_table_description(cursor, ContextEntry._meta.db_table)
+        _vector_ready[connection.alias] = any(column.name == VECTOR_COLUMN for column in columns)
+    return _vector_ready[connection.alias]
+
+
+def _search_postgres(connection, owner_id, terms, limit):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField
+    from django.db.models import F
+    from django.db.models.expressions import RawSQL
+
+    config = settings.CONTEXT_SEARCH_CONFIG
+    if _pg_vector_ready(connection):
+        vector = RawSQL(f'"{ContextEntry._meta.db_table}"."{VECTOR_COLUMN}"', [], output_field=SearchVectorField())
+    else:
+        vector = SearchVector("content", config=config)  # computed per row: before ensure_search_index ran
+    # Any term may match; ts_rank favours entries matching more (and rarer) terms
+    query = SearchQuery(" | ".join(terms), search_type="raw", config=config)
+    return list(
+        ContextEntry.objects
+        .filter(owner_id=owner_id)
+        .annotate(document=vector)
+        .filter(document=query)
+        .annotate(rank=SearchRank(F("document"), query))
+        .order_by("-rank", "-id")
+        .values_list("content", flat=True)[:limit]
+    )
+
+
+def _search_sqlite(connection, owner_id, terms, limit):
+    base = ContextEntry._meta.db_table
+    match = " OR ".join(f'"{term}"' for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT c.content FROM {FTS_TABLE} JOIN {base} c ON c.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND c.owner_id = %s "
+            f"ORDER BY bm25({FTS_TABLE}), c.id DESC LIMIT %s",
+            [match, owner_id, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_scan(owner_id, terms, limit):
+    entries = (
+        ContextEntry.objects
+        .filter(owner_id=owner_id)
+        .order_by("-created_at")
+        .values_list("content", flat=True)[:FALLBACK_SCAN]
+    )
+    scored = []
+    for position, content in enumerate(entries):
+        words = set(_WORD.findall(content.lower()))
+        score = sum(1 for term in terms if term in words)
+        if score:
+            scored.append((-score, position, content))
+    return [content for _, _, content in sorted(scored)[:limit]]
+
+
+def search_contexts(owner_id, text, limit=None):
+    """Contents of the owner's `limit` context entries most relevant to `text`, best first."""
+    limit = settings.CONTEXT_SEARCH_LIMIT if limit is None else limit
+    terms = search_terms(text)
+    if not terms or limit <= 0:
+        return []
+
+    connection = connections[ContextEntry.objects.db]
+    if connection.vendor == "postgresql":
+        return _search_postgres(connection, owner_id, terms, limit)
+    if connection.vendor == "sqlite" and _sqlite_fts_ready(connection):
+        return _search_sqlite(connection, owner_id, terms, limit)
+    return _search_scan(owner_id, terms, limit)
@@ -0,0 +1,92 @@
+"""
+Read-replica routing.
+
+When a "replica" database is configured, the read-only actions of the
+viewsets (ReplicaReadMixin.replica_actions) read from it; everything else,
+and every write, uses "default". Plain APIViews that write (ImportView) use
+the mixin only for the pin: they have no actions, so they never read the replica. After a user's successful write, their reads
+stay on "default" for REPLICA_STICKY_SECONDS so they always see their own
+changes despite replication lag. The pin is kept in the Django cache, so it
+is shared between workers when the cache is (e.g. Redis), per process otherwise.
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA = "replica"
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def _pin_key(user_id):
+    return f"db-pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """Send this user's reads to the primary for the next REPLICA_STICKY_SECONDS."""
+    if replica_configured():
+        cache.set(_pin_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return bool(cache.get(_pin_key(user_id)))
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and replica_configured():
+            return REPLICA
+        return None  # default
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA
+
+
+class ReplicaReadMixin:
+    """
+    For viewsets and APIViews: route replica_actions to the replica unless the
+    user is pinned to the primary, and pin them after a successful unsafe request.
+    """
+    replica_actions = ("list", "retrieve")
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication (and its profile lookup) runs in super().initial, on the primary
+        super().initial(request, *args, **kwargs)
+        if (
+            getattr(self, "action", None) in self.replica_actions
+            and replica_configured()
+            and not is_pinned(request.user.pk)
+        ):
+            self._replica_token = _use_replica.set(True)
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # An unhandled exception skips finalize_response; the thread must not keep reading the replica
+            self._reset_replica()
+
+    def _reset_replica(self):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            _use_replica.reset(token)
+            self._replica_token = None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        self._reset_replica()
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,201 @@
+import hashlib
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .hf_client import get_ai_task_suggestions_batch
+from .models import Category, EnrichmentJob, Task
+
+logger = logging.getLogger(__name__)
+
+
+def task_input_hash(task):
+    """Hash of the fields the prompt is built from."""
+    return hashlib.sha256(f"{task.title}\n{task.description}".encode("utf-8")).hexdigest()
+
+
+def enqueue_enrichment(task):
+    """
+    Queue an enrichment job for `task`; returns the (possibly existing) job.
+    A finished job for the same content (the task was edited back to it) is queued again.
+    """
+    now = timezone.now()
+    job, created = EnrichmentJob.objects.get_or_create(
+        task=task,
+        input_hash=task_input_hash(task),
+        defaults={"run_after": now},
+    )
+    if not created and job.status in ("done", "failed"):
+        job.status = "pending"
+        job.attempts = 0
+        job.last_error = ""
+        job.run_after = now
+        job.locked_at = None
+        job.save(update_fields=["status", "attempts", "last_error", "run_after", "locked_at", "updated_at"])
+        created = True
+    if created:
+        Task.objects.filter(pk=task.pk).update(enrichment_status="pending", updated_at=now)
+    return job
+
+
+def enqueue_enrichment_bulk(tasks):
+    """
+    Queue jobs for many saved tasks with one insert, plus one update that queues
+    finished jobs for the same content again (as enqueue_enrichment does).
+    """
+    now = timezone.now()
+    jobs = [EnrichmentJob(task=task, input_hash=task_input_hash(task), run_after=now) for task in tasks]
+    if not jobs:
+        return
+    EnrichmentJob.objects.bulk_create(jobs, ignore_conflicts=True)
+    same_content = Q()
+    for job in jobs:
+        same_content |= Q(task_id=job.task_id, input_hash=job.input_hash)
+    EnrichmentJob.objects.filter(same_content, status__in=("done", "failed")).update(
+        status="pending", attempts=0, last_error="", run_after=now, locked_at=None, updated_at=now,
+    )
+
+
+def claim_jobs(batch_size):
+    """
+    Mark up to `batch_size` due jobs as running and return them.
+    Jobs stuck in "running" past ENRICHMENT_LOCK_TIMEOUT (a crashed worker) are reclaimed.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.ENRICHMENT_LOCK_TIMEOUT)
+    with transaction.atomic():
+        jobs = list(
+            EnrichmentJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status="pending", run_after__lte=now)
+                | Q(status="running", locked_at__lt=stale)
+            )
+            .select_related("task")
+            .order_by("run_after")[:batch_size]
+        )
+        if jobs:
+            EnrichmentJob.objects.filter(pk__in=[j.pk for j in jobs]).update(
+                status="running", locked_at=now
+            )
+    return jobs
+
+
+def apply_suggestion(task, suggestion, categories):
+    """
+    Fill in the fields the user left empty; anything they set is kept.
+    Returns the list of changed field names.
+    """
+    changed = []
+    if not task.priority_score:
+        task.priority_score = task.base_priority = suggestion["priority_score"]
+        changed += ["priority_score", "base_priority"]
+    if task.deadline is None:
+        try:
+            deadline = parse_date(suggestion["suggested_deadline"] or "")
+        except ValueError:
+            deadline = None  # well-formed but not a real date, e.g. 2023-02-30
+        if deadline:
+            task.deadline = deadline
+            changed.append("deadline")
+    if not task.description.strip() and suggestion["enhanced_description"]:
+        task.description = suggestion["enhanced_description"]
+        changed.append("description")
+    if task.category_id is None:
+        # Only existing categories, matched by name like the client does
+        category = categories.get(suggestion["suggested_category"].strip().lower())
+        if category is not None:
+            task.category = category
+            changed.append("category")
+    return changed
+
+
+def _retry_or_fail(job, error):
+    job.attempts += 1
+    job.last_error = error
+    job.locked_at = None
+    if job.attempts >= settings.ENRICHMENT_MAX_ATTEMPTS:
+        job.status = "failed"
+        Task.objects.filter(pk=job.task_id).update(enrichment_status="failed", updated_at=timezone.now())
+    else:
+        job.status = "pending"
+        delay = settings.ENRICHMENT_RETRY_DELAY * (2 ** (job.attempts - 1))
+        job.run_after = timezone.now() + timedelta(seconds=delay)
+    job.save(update_fields=["attempts", "last_error", "locked_at", "status", "run_after", "updated_at"])
+
+
+def process_jobs(jobs):
+    """Run one batch of claimed jobs through the AI and write the results back."""
+    try:
+        results = get_ai_task_suggestions_batch([
+            {
+                "title": job.task.title,
+                "description": job.task.description,
+                "context": "",
+                "owner_id": job.task.owner_id,  # pulls in the owner's relevant context entries
+            }
+            for job in jobs
+        ])
+    except Exception as e:
+        logger.exception("Enrichment batch failed")
+        for job in jobs:
+            _retry_or_fail(job, str(e))
+        return 0
+    owner_ids = {job.task.owner_id for job in jobs}
+    categories = defaultdict(dict)  # owner id -> lowercased name -> Category
+    for c in Category.objects.filter(owner_id__in=owner_ids).order_by("-id"):
+        # Reverse id order so the oldest category wins on duplicate names
+        categories[c.owner_id][c.name.lower()] = c
+
+    done = 0
+    for job, outcome in zip(jobs, results):
+        if "error" in outcome:
+            logger.warning("Enrichment of task %s failed: %s", job.task_id, outcome["error"])
+            _retry_or_fail(job, outcome["error"])
+            continue
+        # One bad reply must not stop the batch, or leave the job "running" to be reclaimed and fail again
+        try:
+            if _complete_job(job, outcome["result"], categories):
+                done += 1
+        except Exception as e:
+            logger.exception("Enrichment of task %s failed", job.task_id)
+            _retry_or_fail(job, str(e))
+    return done
+
+
+def _complete_job(job, suggestion, categories):
+    """Apply one job's suggestion; returns False when its task no longer exists."""
+    with transaction.atomic():
+        task = Task.objects.select_for_update().filter(pk=job.task_id).first()
+        if task is None:
+            job.delete()  # Task deleted meanwhile
+            return False
+        if task_input_hash(task) == job.input_hash:
+            changed = apply_suggestion(task, suggestion, categories[task.owner_id])
+            task.enrichment_status = "done"
+            task.save(update_fields=changed + ["enrichment_status", "updated_at"])
+        elif settings.TASK_ENRICHMENT_ENABLED:
+            # Edited since this job was queued: don't apply stale output, enrich the new content
+            enqueue_enrichment(task)
+        else:
+            Task.objects.filter(pk=task.pk).update(enrichment_status="none", updated_at=timezone.now())
+        job.status = "done"
+        job.attempts += 1
+        job.locked_at = None
+        job.last_error = ""
+        job.save(update_fields=["status", "attempts", "locked_at", "last_error", "updated_at"])
+    return True
+
+
+def run_once(batch_size=None):
+    """Claim and process one batch; returns the number of jobs claimed."""
+    jobs = claim_jobs(batch_size or settings.ENRICHMENT_BATCH_SIZE)
+    if jobs:
+        process_jobs(jobs)
+    return len(jobs)
@@ -0,0 +1,274 @@
+"""
+Change feed: Task, Category and ContextEntry writes pushed to the owner's
+connected clients (GET /api/changes/, see async_views.ChangeFeedView).
+
+Writes publish small events once their transaction commits:
+
+  {"kind": "tasks", "op": "upsert", "id": 7, "data": {...full row...}, "cursor": "..."}
+  {"kind": "tasks", "op": "patch",  "id": 7, "data": {...changed fields...}, "cursor": "..."}
+  {"kind": "tasks", "op": "delete", "id": 7, "cursor": "..."}
+  {"op": "resync", "cursor": "..."}  (after an import; sent to clients as a delta sync)
+
+The broker (CHANGE_FEED_BROKER) fans them out to subscribers:
+
+  local     in-process only; enough for a single ASGI worker
+  postgres  LISTEN/NOTIFY, so writes from every worker (and from
+            manage.py commands like enrichment_worker) reach every worker
+
+Each subscriber has a bounded queue (CHANGE_FEED_QUEUE_SIZE). A consumer
+that falls behind doesn't hold memory or slow publishers down: its queue
+is dropped and replaced by RESYNC, and the feed catches it up from its
+last cursor with a delta sync instead.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from .sync import KIND_BY_MODEL, SYNC_MODELS
+
+logger = logging.getLogger(__name__)
+
+# Put in a subscriber's queue in place of the events it was too slow to take
+RESYNC = object()
+
+
+class Subscriber:
+    def __init__(self, owner_id):
+        self.owner_id = owner_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(settings.CHANGE_FEED_QUEUE_SIZE)
+        self.overflows = 0
+        self.resync_pending = False
+
+    def offer(self, event):
+        """Runs on the subscriber's loop."""
+        if self.resync_pending:
+            return  # the resync will read this change from the database
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflows += 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.resync_pending = True
+
+    async def get(self, timeout):
+        """The next event, RESYNC, or None after `timeout` seconds with nothing to send."""
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event is RESYNC:
+            self.resync_pending = False
+        return event
+
+
+class LocalBroker:
+    """Fans events out to the subscribers of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)  # owner id -> {Subscriber}
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+
+    def wants(self, owner_id):
+        """Whether anyone may be listening for this owner (so publishing is worth serializing)."""
+        return owner_id in self._subscribers
+
+    def subscribe(self, owner_id):
+        subscriber = Subscriber(owner_id)
+        with self._lock:
+            self._subscribers[owner_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.owner_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.owner_id]
+            self.overflows += subscriber.overflows
+
+    def publish(self, owner_id, event):
+        self.published += 1
+        self.deliver(owner_id, event)
+
+    def deliver(self, owner_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(owner_id, ()))
+        for subscriber in subscribers:
+            try:
+                # Publishers are request threads; each queue belongs to its feed's event loop
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, event)
+            except RuntimeError:
+                self.unsubscribe(subscriber)  # its loop is closed
+            else:
+                self.delivered += 1
+
+    def connections(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    def stats(self):
+        with self._lock:
+            overflows = self.overflows + sum(s.overflows for subs in self._subscribers.values() for s in subs)
+        return {
+            "connections": self.connections(),
+            "published": self.published,
+            "delivered": self.delivered,
+            "overflows": overflows,
+        }
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Publishes with pg_notify on the request's own connection; a listener
+    thread, started with the first subscriber, LISTENs on a dedicated
+    connection and hands notifications to the local subscribers.
+    Needs PostgreSQL and psycopg2.
+    """
+    channel = "todo_changes"
+    max_payload = 7900  # NOTIFY payloads are limited to 8000 bytes
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def wants(self, owner_id):
+        # Subscribers may be connected to any worker
+        return True
+
+    def subscribe(self, owner_id):
+        with self._listener_lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self.listen, name="change-feed-listener", daemon=True)
+                self._listener.start()
+        return super().subscribe(owner_id)
+
+    def publish(self, owner_id, event):
+        payload = json.dumps({"owner": owner_id, "event": event}, separators=(",", ":"), default=str)
+        if len(payload.encode("utf-8")) > self.max_payload:
+            # Too big for NOTIFY: send the id and let the client fetch the row
+            event = {key: value for key, value in event.items() if key != "data"}
+            event["refetch"] = True
+            payload = json.dumps({"owner": owner_id, "event": event}, separators=(",", ":"), default=str)
+        self.published += 1
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+    def listen(self):
+        while True:
+            db = connections.create_connection("default")
+            try:
+                db.ensure_connection()
+                with db.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                raw = db.connection
+                while True:
+                    if select.select([raw], [], [], settings.CHANGE_FEED_HEARTBEAT) == ([], [], []):
+                        continue
+                    raw.poll()
+                    while raw.notifies:
+                        message = json.loads(raw.notifies.pop(0).payload)
+                        if message["owner"] in self._subscribers:
+                            self.deliver(message["owner"], message["event"])
+            except Exception:
+                # Notifications sent while disconnected are lost: tell every feed to resync
+                logger.exception("Change feed listener lost its connection; reconnecting")
+                with self._lock:
+                    owners = list(self._subscribers)
+                for owner_id in owners:
+                    self.deliver(owner_id, RESYNC)
+                threading.Event().wait(settings.CHANGE_FEED_HEARTBEAT / 5)
+            finally:
+                db.close()
+
+
+BROKERS = {
+    "local": LocalBroker,
+    "postgres": PostgresBroker,
+}
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker for settings.CHANGE_FEED_BROKER, created on first use."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = BROKERS[settings.CHANGE_FEED_BROKER]()
+    return _broker
+
+
+def _publish_on_commit(owner_id, event):
+    broker = get_broker()
+    transaction.on_commit(lambda: broker.publish(owner_id, event))
+
+
+def publish_saved(instance, update_fields=None):
+    """Publish a saved row: the whole row, or only `update_fields` when given."""
+    if not settings.CHANGE_FEED_ENABLED or instance.owner_id is None:
+        return
+    if not get_broker().wants(instance.owner_id):
+        return
+    kind = KIND_BY_MODEL[type(instance)]
+    data = SYNC_MODELS[kind][1](instance).data
+    op = "upsert"
+    if update_fields:
+        fields = {getattr(instance._meta.get_field(name), "name", name) for name in update_fields}
+        data = {key: value for key, value in data.items() if key in fields}
+        if not set(data) - {"updated_at"}:
+            return  # only internal fields changed
+        op = "patch"
+    _publish_on_commit(instance.owner_id, {
+        "kind": kind,
+        "op": op,
+        "id": instance.pk,
+        "data": data,
+        "cursor": instance.updated_at.isoformat(),
+    })
+
+
+def publish_saved_bulk(instances):
+    """For bulk_create/bulk_update, which don't send post_save."""
+    for instance in instances:
+        publish_saved(instance)
+
+
+def publish_deleted(model, owner_id, ids):
+    if not settings.CHANGE_FEED_ENABLED or owner_id is None:
+        return
+    if not get_broker().wants(owner_id):
+        return
+    kind = KIND_BY_MODEL[model]
+    cursor = timezone.now().isoformat()
+    for pk in ids:
+        _publish_on_commit(owner_id, {"kind": kind, "op": "delete", "id": pk, "cursor": cursor})
+
+
+def publish_resync(owner_id):
+    """For writes too large to send row by row (imports): the owner's feeds catch up with a delta sync."""
+    if not settings.CHANGE_FEED_ENABLED or not get_broker().wants(owner_id):
+        return
+    _publish_on_commit(owner_id, {"op": "resync", "cursor": timezone.now().isoformat()})
+
+
+def change_feed_stats():
+    if _broker is None:
+        return None
+    return _broker.stats()
@@ -1,14 +1,18 @@
-import requests
-from django.conf import settings
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-HF_API_URL = "https://api-inference.huggingface.co/models/google/flan-t5-base"
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
 
-HEADERS = {
-    "Authorization": f"Bearer {settings.HF_API_KEY}"
-}
+from .cache import AsyncSingleFlight, SingleFlight
+from .context_search import search_contexts
+from .hf_http import HuggingFaceRateLimited, get_async_hf_client, get_hf_client, get_hf_limiter
+from .metrics import phase
+from .suggestion_cache import get_suggestion_cache, suggestion_cache_key
 
-def get_ai_task_suggestions(title, description, context=None):
-    prompt = f"""
+def build_prompt(title, description, context=None):
+    return f"""
 You are a smart productivity assistant. Analyze the task below and return:
 1. Task priority (scale 1-10)
 2. Suggested deadline (in YYYY-MM-DD)
@@ -26,14 +30,180 @@ Description: <new description>
 Category: <category name>
 """
 
-    response = requests.post(
-        HF_API_URL,
-        headers=HEADERS,
-        json={"inputs": prompt}
-    )
+# Rough size of a token for English text; avoids shipping the model's tokenizer
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+def fit_to_budget(pieces, budget):
+    """
+    One "- piece" line per context piece, in order, until `budget` tokens are used.
+    The piece that doesn't fit is cut at a word boundary; the rest are dropped.
+    """
+    lines, used = [], 0
+    for piece in pieces:
+        line = "- " + " ".join(piece.split())
+        cost = estimate_tokens(line) + 1  # + newline
+        if used + cost > budget:
+            room = (budget - used - 1) * CHARS_PER_TOKEN
+            if room >= 40:
+                lines.append(line[:room - 3].rsplit(" ", 1)[0] + "...")
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
+
+def build_context(title, description, context=None, owner_id=None):
+    """
+    Context for the prompt: the caller's own context first, then the owner's most
+    relevant ContextEntry rows, trimmed so the whole prompt fits HF_PROMPT_TOKEN_BUDGET.
+    """
+    pieces = [context] if context else []
+    if owner_id is not None:
+        pieces += search_contexts(owner_id, f"{title} {description}")
+    budget = settings.HF_PROMPT_TOKEN_BUDGET - estimate_tokens(build_prompt(title, description))
+    return fit_to_budget(pieces, budget)
+
+# Identical prompts in flight at once share one upstream call
+_flights = SingleFlight()
+_async_flights = AsyncSingleFlight()
+
+def coalesced_calls():
+    return {"sync": _flights.coalesced, "async": _async_flights.coalesced}
+
+def request_suggestion(prompt, owner_id=None):
+    # Waiting for a slot isn't upstream time
+    with get_hf_limiter().slot(owner_id):
+        with phase("http", upstream="huggingface"):
+            raw = get_hf_client().post({"inputs": prompt})
+    return raw[0]['generated_text']
+
+def _coalesce(key, owner_id, fetch):
+    try:
+        return _flights.do(key, fetch)
+    except HuggingFaceRateLimited as e:
+        if e.key == owner_id:
+            raise
+        # The call we joined belonged to a user over their limit; this one isn't
+        return fetch()
+
+def get_ai_task_suggestions_with_status(title, description, context=None, owner_id=None):
+    """
+    Returns (generated_text, cache_status) where cache_status is
+    "HIT", "MISS" or "BYPASS" (cache disabled).
+    With `owner_id`, the user's relevant context entries are added to the prompt,
+    and the call counts against their HF_USER_MAX_CONCURRENCY.
+    """
+    prompt = build_prompt(title, description, build_context(title, description, context, owner_id))
+    key = suggestion_cache_key(settings.HF_MODEL, prompt)
+    cache = get_suggestion_cache()
+    if cache is None:
+        return _coalesce(key, owner_id, lambda: request_suggestion(prompt, owner_id)), "BYPASS"
+
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, "HIT"
+
+    def fetch():
+        text = request_suggestion(prompt, owner_id)
+        if is_parseable(text):  # a malformed reply is retried next time, not served for the TTL
+            cache.set(key, text)
+        return text
+
+    return _coalesce(key, owner_id, fetch), "MISS"
+
+async def arequest_suggestion(prompt, owner_id=None):
+    async with get_hf_limiter().aslot(owner_id):
+        with phase("http", upstream="huggingface"):
+            raw = await get_async_hf_client().post({"inputs": prompt})
+    return raw[0]['generated_text']
+
+async def _acoalesce(key, owner_id, fetch):
+    try:
+        return await _async_flights.do(key, fetch)
+    except HuggingFaceRateLimited as e:
+        if e.key == owner_id:
+            raise
+        return await fetch()
+
+async def aget_ai_task_suggestions_with_status(title, description, context=None, owner_id=None):
+    """Async version of get_ai_task_suggestions_with_status for the ASGI views."""
+    # Context retrieval hits the DB
+    context = await sync_to_async(build_context)(title, description, context, owner_id)
+    prompt = build_prompt(title, description, context)
+    key = suggestion_cache_key(settings.HF_MODEL, prompt)
+    cache = get_suggestion_cache()
+    if cache is None:
+        return await _acoalesce(key, owner_id, lambda: arequest_suggestion(prompt, owner_id)), "BYPASS"
+
+    cached = await cache.aget(key)
+    if cached is not None:
+        return cached, "HIT"
+
+    async def fetch():
+        text = await arequest_suggestion(prompt, owner_id)
+        if is_parseable(text):
+            await cache.aset(key, text)
+        return text
+
+    return await _acoalesce(key, owner_id, fetch), "MISS"
+
+def get_ai_task_suggestions(title, description, context=None, owner_id=None):
+    text, _ = get_ai_task_suggestions_with_status(title, description, context, owner_id)
+    return text
+
+def parse_suggestion(output):
+    # Parse output (basic version)
+    lines = output.strip().splitlines()
+    return {
+        "priority_score": float(lines[0].split(":")[1].strip()),
+        "suggested_deadline": lines[1].split(":")[1].strip(),
+        "enhanced_description": lines[2].split(":", 1)[1].strip(),
+        "suggested_category": lines[3].split(":")[1].strip()
+    }
+
+def is_parseable(output):
+    try:
+        parse_suggestion(output)
+    except (IndexError, ValueError):
+        return False
+    return True
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    # One bounded pool per process, so concurrent batch requests share the limit
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.HF_BATCH_MAX_WORKERS,
+                    thread_name_prefix="hf-batch",
+                )
+    return _executor
 
-    if response.status_code != 200:
-        raise Exception(f"HuggingFace error: {response.text}")
+def _suggest_item(item):
+    try:
+        output, cache_status = get_ai_task_suggestions_with_status(
+            item.get("title", ""),
+            item.get("description", ""),
+            item.get("context", ""),
+            item.get("owner_id"),
+        )
+        return {"result": parse_suggestion(output), "cache": cache_status}
+    except Exception as e:
+        return {"error": str(e)}
+    finally:
+        # Pool threads outlive the request; don't leak DB connections from cache lookups
+        connections.close_all()
 
-    raw = response.json()
-    return raw[0]['generated_text']
\ No newline at end of file
+def get_ai_task_suggestions_batch(items):
+    """
+    Run suggestions for many {title, description, context[, owner_id]} items concurrently.
+    Returns one dict per item, in order, holding either "result" or "error".
+    """
+    futures = [_get_executor().submit(_suggest_item, item) for item in items]
+    return [dict(index=i, **future.result()) for i, future in enumerate(futures)]
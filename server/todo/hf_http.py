@@ -0,0 +1,567 @@
+import asyncio
+import logging
+import math
+import random
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import asynccontextmanager, contextmanager
+
+from django.conf import settings
+
+from .metrics import HF_QUEUE_WAIT
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf"))
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HuggingFaceError(Exception):
+    """The Inference API returned an error or could not be reached."""
+    retry_after = None  # seconds, for the Retry-After header
+
+
+class HuggingFaceUnavailable(HuggingFaceError):
+    """The circuit breaker is open; the call was not attempted."""
+
+
+class HuggingFaceOverloaded(HuggingFaceUnavailable):
+    """This process has too many calls in flight and queued; the call was not attempted."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class HuggingFaceRateLimited(HuggingFaceError):
+    """The user has too many calls in flight and queued; the call was not attempted."""
+
+    def __init__(self, message, key, retry_after=1):
+        super().__init__(message)
+        self.key = key
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    closed    -> calls go through; `failure_threshold` failures in a row open it
+    open      -> calls fail fast until `reset_timeout` seconds have passed
+    half_open -> one trial call; success closes, failure re-opens
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning("HuggingFace circuit breaker opened after %d failures", self.failures)
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class _Waiter:
+    def __init__(self, key, loop=None):
+        self.key = key
+        self.granted = False
+        self.event = threading.Event() if loop is None else None
+        self.loop = loop
+        self.future = loop.create_future() if loop is not None else None
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ConcurrencyLimiter:
+    """
+    Admission control for upstream calls, shared by threads and event loops.
+
+    At most `max_active` calls run at once, and at most `per_key_active` for
+    one key (user; None is exempt). Callers over a limit wait in a FIFO queue
+    and are handed a slot as one frees up. Rather than piling up blocked
+    workers, a caller is turned away at once when the queue holds
+    `queue_size` callers (HuggingFaceOverloaded) or its key already has
+    `per_key_pending` waiting (HuggingFaceRateLimited), and after waiting
+    `queue_timeout` seconds (HuggingFaceOverloaded).
+    """
+
+    def __init__(self, max_active=16, queue_size=64, queue_timeout=15, per_key_active=4, per_key_pending=16):
+        self.max_active = max_active
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.per_key_active = per_key_active
+        self.per_key_pending = per_key_pending
+        self._lock = threading.Lock()
+        self._active = 0
+        self._active_by_key = Counter()
+        self._pending_by_key = Counter()
+        self._waiters = deque()
+        self.rejected = Counter()  # reason -> count
+
+    def _can_admit(self, key):
+        return self._active < self.max_active and (
+            key is None or self._active_by_key[key] < self.per_key_active
+        )
+
+    def _admit(self, key):
+        self._active += 1
+        if key is not None:
+            self._active_by_key[key] += 1
+
+    def _enqueue(self, key, loop=None):
+        """Admit at once (None) or queue a waiter; lock held. Raises when the caller is shed."""
+        if self._can_admit(key):
+            self._admit(key)
+            return None
+        if key is not None and self._pending_by_key[key] >= self.per_key_pending:
+            self.rejected["user_limit"] += 1
+            raise HuggingFaceRateLimited("HuggingFace error: too many AI requests in progress", key)
+        if len(self._waiters) >= self.queue_size:
+            self.rejected["queue_full"] += 1
+            raise self._overloaded()
+        waiter = _Waiter(key, loop)
+        self._waiters.append(waiter)
+        self._pending_by_key[key] += 1
+        return waiter
+
+    def _withdraw(self, waiter):
+        """Take a waiter that gave up out of the queue; lock held."""
+        self._waiters.remove(waiter)
+        self._pending_by_key[waiter.key] -= 1
+        if not self._pending_by_key[waiter.key]:
+            del self._pending_by_key[waiter.key]
+
+    def _overloaded(self):
+        return HuggingFaceOverloaded(
+            "HuggingFace error: too many AI requests queued, try again shortly",
+            retry_after=max(1, math.ceil(self.queue_timeout)),
+        )
+
+    def _timed_out(self, waiter):
+        """After a wait timed out: True if the slot was granted meanwhile, else withdraw and count it."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._withdraw(waiter)
+            self.rejected["timeout"] += 1
+            return False
+
+    def _observe_wait(self, start):
+        if settings.METRICS_ENABLED:
+            HF_QUEUE_WAIT.observe(time.perf_counter() - start)
+
+    def acquire(self, key=None):
+        start = time.perf_counter()
+        with self._lock:
+            waiter = self._enqueue(key)
+        if waiter is not None:
+            if not waiter.event.wait(self.queue_timeout) and not self._timed_out(waiter):
+                raise self._overloaded()
+        self._observe_wait(start)
+
+    async def aacquire(self, key=None):
+        start = time.perf_counter()
+        with self._lock:
+            waiter = self._enqueue(key, asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(waiter.future, self.queue_timeout)
+            except asyncio.TimeoutError:
+                if not self._timed_out(waiter):
+                    raise self._overloaded() from None
+            except asyncio.CancelledError:
+                # The client went away: give the slot back, or the place in the queue
+                with self._lock:
+                    granted = waiter.granted
+                    if not granted:
+                        self._withdraw(waiter)
+                if granted:
+                    self.release(key)
+                raise
+        self._observe_wait(start)
+
+    def release(self, key=None):
+        with self._lock:
+            self._active -= 1
+            if key is not None:
+                self._active_by_key[key] -= 1
+                if not self._active_by_key[key]:
+                    del self._active_by_key[key]
+            granted = []
+            # Hand freed slots to the oldest waiters whose key is under its limit
+            for waiter in list(self._waiters):
+                if self._active >= self.max_active:
+                    break
+                if self._can_admit(waiter.key):
+                    self._withdraw(waiter)
+                    self._admit(waiter.key)
+                    waiter.granted = True
+                    granted.append(waiter)
+        for waiter in granted:
+            if waiter.event is not None:
+                waiter.event.set()
+                continue
+            try:
+                waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+            except RuntimeError:
+                self.release(waiter.key)  # its loop is closed
+
+    @contextmanager
+    def slot(self, key=None):
+        self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    @asynccontextmanager
+    async def aslot(self, key=None):
+        await self.aacquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active": self._active,
+                "queued": len(self._waiters),
+                "rejected": dict(self.rejected),
+            }
+
+
+class _BaseHuggingFaceClient:
+    """Retry policy, circuit breaker and metrics shared by the sync and async clients."""
+
+    def __init__(
+        self,
+        api_url,
+        api_key,
+        connect_timeout=3.05,
+        read_timeout=30,
+        max_retries=3,
+        backoff_base=0.5,
+        backoff_max=20,
+        total_deadline=45,
+        pool_size=10,
+        breaker=None,
+    ):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.total_deadline = total_deadline
+        self.pool_size = pool_size
+        self.breaker = breaker or CircuitBreaker()
+
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._latency_buckets = [0] * len(LATENCY_BUCKETS)
+        self._latency_sum = 0.0
+
+    def _count(self, outcome):
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def _observe(self, outcome, elapsed):
+        with self._lock:
+            self._counts[outcome] += 1
+            self._latency_buckets[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+            self._latency_sum += elapsed
+
+    def _backoff(self, attempt, status_code=None, body=None):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        if status_code == 503:
+            try:
+                estimated = float(body().get("estimated_time", 0))
+            except (ValueError, AttributeError):
+                estimated = 0
+            if estimated > delay:
+                # Never earlier than the model says it will be ready; jitter only adds to the wait
+                return min(self.backoff_max, estimated + random.uniform(0, estimated / 2))
+        # Full jitter keeps workers from retrying in lockstep
+        return random.uniform(delay / 2, delay)
+
+    def _retry_delay(self, attempt, deadline, response):
+        """Seconds to sleep before the next attempt, or None when out of attempts or out of time."""
+        if attempt >= self.max_retries:
+            return None
+        delay = self._backoff(
+            attempt,
+            response.status_code if response is not None else None,
+            response.json if response is not None else None,
+        )
+        if time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    def _before_call(self):
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise HuggingFaceUnavailable("HuggingFace error: upstream unavailable (circuit open)")
+
+    def _handle_status(self, status_code, text, elapsed):
+        """Record a response; returns the error to retry with, raises if it isn't retryable."""
+        if status_code == 200:
+            self._observe("success", elapsed)
+            self.breaker.record_success()
+            return None
+        self._observe(f"http_{status_code}", elapsed)
+        error = HuggingFaceError(f"HuggingFace error: {text}")
+        if status_code not in RETRYABLE_STATUSES:
+            # Our request is bad; the upstream itself is healthy
+            self.breaker.record_success()
+            raise error
+        return error
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            buckets = list(self._latency_buckets)
+            latency_sum = self._latency_sum
+        cumulative, total = [], 0
+        for bound, n in zip(LATENCY_BUCKETS, buckets):
+            total += n
+            cumulative.append((bound, total))
+        return {
+            "counts": counts,
+            "latency_seconds": {"buckets": cumulative, "sum": latency_sum, "count": total},
+            "breaker": {"state": self.breaker.state, "failures": self.breaker.failures},
+        }
+
+
+class HuggingFaceClient(_BaseHuggingFaceClient):
+    """
+    Inference API client with a pooled keep-alive session, connect/read timeouts,
+    jittered retries (honouring the `estimated_time` of 503 "model loading"
+    responses) and a circuit breaker. stats() returns latency and error metrics.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # HTTP libraries are imported with the first client, not at startup
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        super().__init__(*args, **kwargs)
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {self.api_key}"
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def post(self, payload):
+        """POST `payload` to the model and return the decoded JSON."""
+        import requests
+
+        self._before_call()
+
+        deadline = time.monotonic() + self.total_deadline
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count("retries")
+            start = time.perf_counter()
+            response = None
+            try:
+                response = self.session.post(
+                    self.api_url,
+                    json=payload,
+                    timeout=(self.connect_timeout, self.read_timeout),
+                )
+            except requests.RequestException as e:
+                self._observe("network_error", time.perf_counter() - start)
+                last_error = HuggingFaceError(f"HuggingFace error: {e}")
+            else:
+                last_error = self._handle_status(response.status_code, response.text, time.perf_counter() - start)
+                if last_error is None:
+                    return response.json()
+
+            delay = self._retry_delay(attempt, deadline, response)
+            if delay is None:
+                break
+            time.sleep(delay)
+
+        self.breaker.record_failure()
+        raise last_error
+
+
+class AsyncHuggingFaceClient(_BaseHuggingFaceClient):
+    """
+    asyncio twin of HuggingFaceClient for the ASGI views, built on httpx.
+    Keeps one pooled AsyncClient per event loop.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._http_clients = weakref.WeakKeyDictionary()
+
+    def _http(self):
+        loop = asyncio.get_running_loop()
+        client = self._http_clients.get(loop)
+        if client is None:
+            import httpx
+
+            client = httpx.AsyncClient(
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+            )
+            self._http_clients[loop] = client
+        return client
+
+    async def post(self, payload):
+        """POST `payload` to the model and return the decoded JSON."""
+        import httpx
+
+        self._before_call()
+
+        deadline = time.monotonic() + self.total_deadline
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count("retries")
+            start = time.perf_counter()
+            response = None
+            try:
+                response = await self._http().post(self.api_url, json=payload)
+            except httpx.HTTPError as e:
+                self._observe("network_error", time.perf_counter() - start)
+                last_error = HuggingFaceError(f"HuggingFace error: {e}")
+            else:
+                last_error = self._handle_status(response.status_code, response.text, time.perf_counter() - start)
+                if last_error is None:
+                    return response.json()
+
+            delay = self._retry_delay(attempt, deadline, response)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+
+        self.breaker.record_failure()
+        raise last_error
+
+
+_client = None
+_async_client = None
+_breaker = None
+_limiter = None
+_client_lock = threading.Lock()
+
+
+def _client_kwargs():
+    global _breaker
+    if _breaker is None:
+        # Sync and async clients share one breaker: they talk to the same upstream
+        _breaker = CircuitBreaker(
+            failure_threshold=settings.HF_BREAKER_THRESHOLD,
+            reset_timeout=settings.HF_BREAKER_RESET_TIMEOUT,
+        )
+    return dict(
+        api_url=settings.HF_API_URL,
+        api_key=settings.HF_API_KEY,
+        connect_timeout=settings.HF_CONNECT_TIMEOUT,
+        read_timeout=settings.HF_READ_TIMEOUT,
+        max_retries=settings.HF_MAX_RETRIES,
+        backoff_base=settings.HF_BACKOFF_BASE,
+        backoff_max=settings.HF_BACKOFF_MAX,
+        total_deadline=settings.HF_TOTAL_DEADLINE,
+        pool_size=settings.HF_POOL_SIZE,
+        breaker=_breaker,
+    )
+
+
+def get_hf_client():
+    """Process-wide HuggingFaceClient, created on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                cls = HuggingFaceClient
+                if settings.HF_BACKEND == "stub":
+                    from .stubs import StubHuggingFaceClient as cls
+                _client = cls(**_client_kwargs())
+    return _client
+
+
+def get_async_hf_client():
+    """Process-wide AsyncHuggingFaceClient, created on first use."""
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                kwargs = _client_kwargs()
+                kwargs["pool_size"] = settings.HF_ASYNC_POOL_SIZE
+                cls = AsyncHuggingFaceClient
+                if settings.HF_BACKEND == "stub":
+                    from .stubs import StubAsyncHuggingFaceClient as cls
+                _async_client = cls(**kwargs)
+    return _async_client
+
+
+def get_hf_limiter():
+    """Process-wide ConcurrencyLimiter for Hugging Face calls, shared by the sync and async paths."""
+    global _limiter
+    if _limiter is None:
+        with _client_lock:
+            if _limiter is None:
+                _limiter = ConcurrencyLimiter(
+                    max_active=settings.HF_MAX_CONCURRENCY,
+                    queue_size=settings.HF_QUEUE_SIZE,
+                    queue_timeout=settings.HF_QUEUE_TIMEOUT,
+                    per_key_active=settings.HF_USER_MAX_CONCURRENCY,
+                    per_key_pending=settings.HF_USER_MAX_PENDING,
+                )
+    return _limiter
+
+
+def hf_limiter_stats():
+    if _limiter is None:
+        return None
+    return _limiter.stats()
+
+
+def hf_client_stats():
+    """stats() of the clients this process has created, keyed "sync" / "async"."""
+    clients = {"sync": _client, "async": _async_client}
+    return {name: client.stats() for name, client in clients.items() if client is not None}
@@ -0,0 +1,184 @@
+"""
+Bulk ContextEntry ingestion from WhatsApp chat exports and mbox/.eml dumps.
+
+Input is read line by line (bytes) and parsed as a stream: one entry per chat
+message or email. Entries are written in batches of CONTEXT_INGEST_BATCH_SIZE,
+skipping any whose content_hash the owner already has, so uploading the same
+export again only costs the hashing and one indexed lookup per batch. Memory
+is bounded by the batch size and CONTEXT_INGEST_EMAIL_BYTES, not the
+size of the upload.
+
+Search data is built as rows are inserted (the tsvector column on PostgreSQL,
+the FTS5 triggers on SQLite; see context_search.py).
+"""
+import html
+import re
+from email import policy
+from email.parser import BytesParser
+
+from django.conf import settings
+from django.db import transaction
+
+from .events import publish_resync
+from .models import ContextEntry, UserProfile
+
+# Android: "31/12/2020, 21:15 - Name: text"   iOS: "[31/12/2020, 21:15:07] Name: text"
+# (12-hour times end in AM/PM, often after a narrow no-break space)
+_WHATSAPP_LINE = re.compile(
+    r"^\[?(?P<date>\d{1,4}[./-]\d{1,2}[./-]\d{1,4}),?\s+"
+    r"(?P<time>\d{1,2}[:.]\d{2}(?:[:.]\d{2})?(?:\s?[APap]\.?\s?[Mm]\.?)?)\]?\s*(?:-\s)?(?P<rest>.*)$"
+)
+# WhatsApp's own placeholders, only when they are the whole message
+_WHATSAPP_SKIP = re.compile(
+    r"^(<Media omitted>|<attached: [^>\n]+>|(image|video|audio|sticker|GIF|document|Contact card) omitted"
+    r"|This message was deleted\.?|You deleted this message\.?|<This message was edited>)$"
+)
+_DIRECTION_MARKS = dict.fromkeys(map(ord, "\ufeff\u200e\u200f\u202a\u202c"))
+_ESCAPED_FROM = re.compile(rb"^>+From ")
+_TAG = re.compile(r"<[^>]+>")
+_SPACES = re.compile(r"[ \t]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def _clip(text):
+    return text[:settings.CONTEXT_INGEST_MAX_CHARS]
+
+
+def parse_whatsapp(lines):
+    """Content for each message of a WhatsApp "Export chat" .txt, without media or system lines."""
+    header, body = None, []
+
+    def message():
+        text = "\n".join(body).strip()
+        if header is None or not text or _WHATSAPP_SKIP.match(text):
+            return None
+        return _clip(f"{header}: {text}")
+
+    for raw in lines:
+        line = raw.decode("utf-8", "replace").translate(_DIRECTION_MARKS).rstrip("\r\n")
+        match = _WHATSAPP_LINE.match(line)
+        if match is None:
+            if header is not None:
+                body.append(line)  # continuation of a multi-line message
+            continue
+        content = message()
+        if content:
+            yield content
+        sender, sep, text = match["rest"].partition(": ")
+        if not sep:
+            header, body = None, []  # system message ("X joined", encryption notice, ...)
+            continue
+        header, body = f"[{match['date']} {match['time']}] {sender}", [text]
+    content = message()
+    if content:
+        yield content
+
+
+def _raw_emails(lines):
+    """Raw messages of an mbox, or of a single .eml, each cut at CONTEXT_INGEST_EMAIL_BYTES."""
+    cap = settings.CONTEXT_INGEST_EMAIL_BYTES
+    buffer, size = [], 0
+    for line in lines:
+        if line.startswith(b"From "):
+            # mbox envelope line: a new message starts (bodies escape theirs as ">From ")
+            if buffer:
+                yield b"".join(buffer)
+            buffer, size = [], 0
+            continue
+        if size < cap:
+            if _ESCAPED_FROM.match(line):
+                line = line[1:]  # mboxrd: ">From " in a body was "From "
+            buffer.append(line)
+            size += len(line)
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _email_text(message):
+    """The plain text of a message: its text/plain part, or its HTML part without tags."""
+    part = message.get_body(preferencelist=("plain", "html"))
+    if part is None:
+        return ""
+    try:
+        text = part.get_content()
+    except (LookupError, UnicodeError):
+        text = (part.get_payload(decode=True) or b"").decode("utf-8", "replace")
+    if part.get_content_subtype() == "html":
+        text = _SPACES.sub(" ", html.unescape(_TAG.sub(" ", text)))
+    # Quoted replies repeat earlier messages, which are entries of their own
+    text = "\n".join(line.rstrip() for line in text.splitlines() if not line.startswith(">"))
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def parse_email(lines):
+    """Content for each message of an mbox or .eml: subject, sender, date and text body."""
+    parser = BytesParser(policy=policy.default)
+    for raw in _raw_emails(lines):
+        try:
+            message = parser.parsebytes(raw)
+            headers = [(name, str(message[name] or "").strip()) for name in ("Subject", "From", "Date")]
+            text = _email_text(message)
+        except Exception:  # malformed MIME or headers: skip the message, not the upload
+            continue
+        if not text and not headers[0][1]:
+            continue
+        lines_out = [f"{name}: {value}" for name, value in headers if value]
+        yield _clip("\n".join(lines_out) + ("\n\n" + text if text else ""))
+
+
+PARSERS = {
+    "whatsapp": parse_whatsapp,
+    "email": parse_email,
+}
+
+
+class Ingestor:
+    """Writes parsed contents for one owner in deduplicated batches."""
+
+    def __init__(self, owner, source_type):
+        self.owner = owner
+        self.source_type = source_type
+        self.parse = PARSERS[source_type]
+        self.parsed = 0
+        self.created = 0
+        self.duplicates = 0
+        self.batch = {}  # content hash -> content, in upload order
+
+    def add(self, content):
+        self.parsed += 1
+        content_hash = ContextEntry.hash_content(content, self.source_type)
+        if content_hash in self.batch:
+            self.duplicates += 1
+            return
+        self.batch[content_hash] = content
+        if len(self.batch) >= settings.CONTEXT_INGEST_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        with transaction.atomic():
+            # One ingest per user at a time, so concurrent uploads of one export can't both insert it
+            UserProfile.objects.select_for_update().only("pk").get(pk=self.owner.pk)
+            existing = set(
+                ContextEntry.objects
+                .filter(owner=self.owner, content_hash__in=list(self.batch))
+                .values_list("content_hash", flat=True)
+            )
+            ContextEntry.objects.bulk_create([
+                ContextEntry(owner=self.owner, content=content, source_type=self.source_type, content_hash=content_hash)
+                for content_hash, content in self.batch.items()
+                if content_hash not in existing
+            ])
+        self.created += len(self.batch) - len(existing)
+        self.duplicates += len(existing)
+        self.batch = {}
+
+    def run(self, lines):
+        for content in self.parse(lines):
+            self.add(content)
+        self.flush()
+        if self.created:
+            # bulk_create sends no signals: let open change feeds catch up
+            publish_resync(self.owner.pk)
+        return {"parsed": self.parsed, "created": self.created, "duplicates": self.duplicates}
@@ -0,0 +1,12 @@
+from django.core.management.base import CommandError
+from django.db.models import Q
+
+from todo.models import UserProfile
+
+
+def resolve_owner(ident):
+    """The user whose supabase_uid, username or email is `ident` (the commands' --owner)."""
+    owner = UserProfile.objects.filter(Q(supabase_uid=ident) | Q(username=ident) | Q(email=ident)).first()
+    if owner is None:
+        raise CommandError(f"No user matches {ident!r}")
+    return owner
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.management._owner import resolve_owner
+from todo.models import Category, ContextEntry, Task, UserProfile
+from todo.stats import invalidate_task_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Assign rows created before per-user ownership (owner IS NULL) to a user. "
+        "Updates run in small batches, each in its own transaction, so it is safe on large live tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--owner",
+            help="supabase_uid, username or email of the user to assign rows to. "
+                 "Optional when exactly one user exists.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--sleep", type=float, default=0, help="Seconds to pause between batches")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def get_owner(self, ident):
+        if ident:
+            return resolve_owner(ident)
+        users = list(UserProfile.objects.all()[:2])
+        if len(users) != 1:
+            raise CommandError("More than one user exists; pass --owner to choose who gets the legacy rows.")
+        return users[0]
+
+    def handle(self, *args, **opts):
+        owner = self.get_owner(opts["owner"])
+        self.stdout.write(f"Backfilling owner = {owner.username} (id {owner.pk})")
+
+        # Categories first so tasks never point at a category owned by nobody
+        for model in (Category, ContextEntry, Task):
+            pending = model.objects.filter(owner__isnull=True)
+            if opts["dry_run"]:
+                self.stdout.write(f"{model.__name__}: {pending.count()} row(s) would be updated")
+                continue
+
+            total = 0
+            while True:
+                ids = list(pending.order_by("pk").values_list("pk", flat=True)[:opts["batch_size"]])
+                if not ids:
+                    break
+                total += model.objects.filter(pk__in=ids, owner__isnull=True).update(owner=owner)
+                if opts["sleep"]:
+                    time.sleep(opts["sleep"])
+            self.stdout.write(f"{model.__name__}: {total} row(s) updated")
+
+        # update() skips signals; don't serve pre-backfill counts from this process
+        invalidate_task_stats(owner.pk)
+
+        self.stdout.write(self.style.SUCCESS("Done"))
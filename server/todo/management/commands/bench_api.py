@@ -0,0 +1,209 @@
+import itertools
+import json
+import random
+import time
+from contextlib import nullcontext
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+
+from todo.models import Category, Task, UserProfile
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "api_baseline.json"
+
+EMAIL = "bench-api@example.com"
+PASSWORD = "bench-api-password"
+
+
+def scenarios(category_id):
+    """name -> (method, path, body for request i, expected status)"""
+    return {
+        "task_list": ("get", "/api/tasks/?limit=50", None, 200),
+        "task_create": (
+            "post", "/api/tasks/",
+            lambda i: {"title": f"Bench task {i}", "description": "Created by bench_api", "category": category_id},
+            201,
+        ),
+        "categorize": (
+            "post", "/api/tasks/suggest-category/",
+            lambda i: {"title": f"Prepare work report {i}", "description": "numbers for the quarterly review"},
+            200,
+        ),
+        # Distinct titles so every call misses the suggestion cache and reaches the stub
+        "ai_suggest": (
+            "post", "/api/ai/suggestions/",
+            lambda i: {"title": f"Plan team offsite {i}", "description": "venue and agenda"},
+            200,
+        ),
+        "login": ("post", "/api/auth/login/", lambda i: {"email": EMAIL, "password": PASSWORD}, 200),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the API in-process through the real URLconf against the Supabase and Hugging Face "
+        "stubs (SUPABASE_BACKEND=stub HF_BACKEND=stub). Reports throughput, p50/p99 latency and queries "
+        "per request, and flags regressions against a stored baseline. Test data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument("--rounds", type=int, default=3, help="Keep the best of this many rounds per scenario")
+        parser.add_argument("--tasks", type=int, default=1000, help="Tasks owned by the benchmark user")
+        parser.add_argument("--scenario", action="append", help="Run only these scenarios (repeatable)")
+        parser.add_argument("--hf-latency", type=float, default=0.02, help="Stub inference latency, seconds")
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+        parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+        parser.add_argument(
+            "--tolerance", type=float, default=0.5,
+            help="Allowed relative slowdown in p50/throughput before flagging a regression (twice this for p99)",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        if settings.SUPABASE_BACKEND != "stub" or settings.HF_BACKEND != "stub":
+            raise CommandError("Refusing to benchmark live services; run with SUPABASE_BACKEND=stub HF_BACKEND=stub.")
+
+        with override_settings(
+            ALLOWED_HOSTS=["testserver"],
+            HF_STUB_LATENCY=opts["hf_latency"],
+            HF_STUB_JITTER=0,
+        ), transaction.atomic():
+            results = self.run(opts)
+            transaction.set_rollback(True)
+
+        self.report(results)
+        if opts["save_baseline"]:
+            path = Path(opts["baseline"])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {path}"))
+            return
+        self.compare(results, opts)
+
+    def seed(self, owner, n, rng):
+        categories = Category.objects.bulk_create(
+            [Category(owner=owner, name=name) for name in ("Work", "Personal", "Health", "Finance", "Errands")]
+        )
+        Task.objects.bulk_create([
+            Task(
+                owner=owner,
+                title=f"Task {i}",
+                description="Lorem ipsum dolor sit amet " * rng.randint(0, 6),
+                category=rng.choice(categories + [None]),
+                priority_score=round(rng.uniform(0, 10), 2),
+                deadline=date.today() + timedelta(days=rng.randint(-10, 60)) if rng.random() < 0.7 else None,
+                status=rng.choice(["pending", "in_progress", "completed"]),
+            )
+            for i in range(n)
+        ])
+        return categories[0]
+
+    def run(self, opts):
+        client = Client()
+        response = client.post(
+            "/api/auth/register/", {"email": EMAIL, "password": PASSWORD, "username": "bench-api"},
+            content_type="application/json",
+        )
+        if response.status_code != 201:
+            raise CommandError(f"Registering the benchmark user failed: {response.status_code} {response.content[:200]}")
+        response = client.post("/api/auth/login/", {"email": EMAIL, "password": PASSWORD}, content_type="application/json")
+        token = response.json()["access_token"]
+        owner = UserProfile.objects.get(email=EMAIL)
+        category = self.seed(owner, opts["tasks"], random.Random(opts["seed"]))
+
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+        selected = scenarios(category.pk)
+        names = opts["scenario"] or list(selected)
+        unknown = set(names) - set(selected)
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}. Choose from {', '.join(selected)}.")
+
+        self.sequence = itertools.count()  # request bodies never repeat, even across rounds
+        results = {}
+        for name in names:
+            method, path, body, expected = selected[name]
+            # Best round, as in bench_task_list: other load on the machine only ever adds time
+            rounds = [self.measure(client, name, method, path, body, expected, opts) for _ in range(opts["rounds"])]
+            results[name] = min(rounds, key=lambda r: r["p50_ms"])
+        return results
+
+    def measure(self, client, name, method, path, body, expected, opts):
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        call = getattr(client, method)
+        latencies = []
+        for i in range(opts["warmup"] + opts["requests"]):
+            kwargs = {"data": body(next(self.sequence)), "content_type": "application/json"} if body else {}
+            measured = i >= opts["warmup"]
+            with connection.execute_wrapper(count_queries) if measured else nullcontext():
+                start = time.perf_counter()
+                response = call(path, **kwargs)
+                elapsed = time.perf_counter() - start
+            if response.status_code != expected:
+                raise CommandError(f"{name}: expected {expected}, got {response.status_code}: {response.content[:200]}")
+            if measured:
+                latencies.append(elapsed)
+
+        latencies.sort()
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+        return {
+            "throughput_rps": round(len(latencies) / sum(latencies), 1),
+            "p50_ms": round(pct(50), 2),
+            "p99_ms": round(pct(99), 2),
+            "queries_per_request": round(queries / len(latencies), 2),
+        }
+
+    def report(self, results):
+        self.stdout.write(f"{'scenario':<14}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'queries':>10}")
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<14}{r['throughput_rps']:>10.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+                f"{r['queries_per_request']:>10.2f}"
+            )
+
+    def compare(self, results, opts):
+        path = Path(opts["baseline"])
+        if not path.exists():
+            self.stdout.write(f"No baseline at {path}; record one with --save-baseline.")
+            return
+        baseline = json.loads(path.read_text())
+        tolerance = opts["tolerance"]
+
+        regressions = []
+        for name, r in results.items():
+            base = baseline.get(name)
+            if base is None:
+                continue
+            # Query counts are deterministic: any increase is a regression
+            if r["queries_per_request"] > base["queries_per_request"] + 0.01:
+                regressions.append(f"{name}: queries/request {base['queries_per_request']} -> {r['queries_per_request']}")
+            for key, allowed in (("p50_ms", tolerance), ("p99_ms", 2 * tolerance)):
+                if r[key] > base[key] * (1 + allowed):
+                    regressions.append(f"{name}: {key} {base[key]} -> {r[key]} (+{r[key] / base[key] - 1:.0%})")
+            if r["throughput_rps"] < base["throughput_rps"] / (1 + tolerance):
+                regressions.append(
+                    f"{name}: throughput {base['throughput_rps']} -> {r['throughput_rps']} req/s "
+                    f"({r['throughput_rps'] / base['throughput_rps'] - 1:.0%})"
+                )
+
+        if regressions:
+            for line in regressions:
+                self.stderr.write(self.style.ERROR(f"REGRESSION {line}"))
+            raise CommandError(f"{len(regressions)} regression(s) against {path}")
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {path} (tolerance {tolerance:.0%})"))
+
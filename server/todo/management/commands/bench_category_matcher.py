@@ -0,0 +1,60 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+
+from todo.category_index import CategoryIndex
+
+
+def _naive_match(names, text):
+    # The old suggest_category loop, minus the DB read
+    text = text.lower()
+    for name in names:
+        if name.lower() in text:
+            return name
+    return None
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark the precompiled category matcher against the old per-category scan."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categories", type=int, default=10000)
+        parser.add_argument("--queries", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+
+        def word():
+            return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+
+        names = [" ".join(word() for _ in range(rng.randint(1, 3))) for _ in range(opts["categories"])]
+        texts = []
+        for _ in range(opts["queries"]):
+            words = [word() for _ in range(rng.randint(8, 30))]
+            if rng.random() < 0.5:
+                words.insert(rng.randrange(len(words)), rng.choice(names))
+            texts.append(" ".join(words))
+
+        start = time.perf_counter()
+        index = CategoryIndex(names)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for text in texts:
+            index.match(text)
+        indexed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for text in texts:
+            _naive_match(names, text)
+        naive = time.perf_counter() - start
+
+        n = len(texts)
+        self.stdout.write(f"categories: {len(names)}, queries: {n}")
+        self.stdout.write(f"index build:   {build * 1000:.1f} ms")
+        self.stdout.write(f"indexed match: {indexed / n * 1e6:.1f} us/query")
+        self.stdout.write(f"naive scan:    {naive / n * 1e6:.1f} us/query")
+        self.stdout.write(self.style.SUCCESS(f"speedup: {naive / indexed:.1f}x"))
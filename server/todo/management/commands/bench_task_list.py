@@ -0,0 +1,73 @@
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from todo.models import Category, Task, UserProfile
+from todo.renderers import ORJSONRenderer
+from todo.serializers import TASK_ROW_FIELDS, TaskSerializer, serialize_task_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark task list serialization: TaskSerializer + JSONRenderer against "
+        ".values() rows + ORJSONRenderer. Test data is created in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def timed(self, fn, repeat):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            out = fn()
+            best = min(best, time.perf_counter() - start)
+        return best, out
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+        n = opts["tasks"]
+        with transaction.atomic():
+            owner = UserProfile.objects.create(
+                supabase_uid="bench-task-list", username="bench-task-list", email="bench-task-list@example.com"
+            )
+            categories = Category.objects.bulk_create(
+                [Category(owner=owner, name=f"Category {i}") for i in range(20)]
+            )
+            Task.objects.bulk_create([
+                Task(
+                    owner=owner,
+                    title=f"Task {i}",
+                    description="Lorem ipsum dolor sit amet " * rng.randint(0, 6),
+                    category=rng.choice(categories + [None]),
+                    priority_score=round(rng.uniform(0, 10), 2),
+                    deadline=date.today() + timedelta(days=rng.randint(-10, 60)) if rng.random() < 0.7 else None,
+                    status=rng.choice(["pending", "in_progress", "completed"]),
+                )
+                for i in range(n)
+            ])
+            queryset = Task.objects.filter(owner=owner).order_by("-priority_score", "-id")
+
+            slow, slow_out = self.timed(
+                lambda: JSONRenderer().render(TaskSerializer(queryset.select_related("category"), many=True).data),
+                opts["repeat"],
+            )
+            fast, fast_out = self.timed(
+                lambda: ORJSONRenderer().render(serialize_task_rows(queryset.values(*TASK_ROW_FIELDS))),
+                opts["repeat"],
+            )
+            transaction.set_rollback(True)
+
+        if json.loads(slow_out) != json.loads(fast_out):
+            self.stderr.write(self.style.ERROR("Outputs differ!"))
+        self.stdout.write(f"tasks: {n} (best of {opts['repeat']}, query + serialize + render)")
+        self.stdout.write(f"TaskSerializer + JSONRenderer:  {n / slow:>10,.0f} rows/s")
+        self.stdout.write(f"values() rows + ORJSONRenderer: {n / fast:>10,.0f} rows/s")
+        self.stdout.write(self.style.SUCCESS(f"speedup: {slow / fast:.1f}x"))
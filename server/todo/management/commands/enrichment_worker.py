@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from todo.enrichment import run_once
+
+
+class Command(BaseCommand):
+    help = "Process queued task enrichment jobs (AI priority, deadline, description, category)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.ENRICHMENT_BATCH_SIZE)
+        parser.add_argument("--poll-interval", type=float, default=settings.ENRICHMENT_POLL_INTERVAL)
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit")
+
+    def handle(self, *args, **opts):
+        self.stdout.write("Enrichment worker started")
+        try:
+            while True:
+                close_old_connections()
+                claimed = run_once(opts["batch_size"])
+                if claimed:
+                    self.stdout.write(f"Processed {claimed} job(s)")
+                    continue
+                if opts["once"]:
+                    break
+                time.sleep(opts["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write("Enrichment worker stopped")
@@ -0,0 +1,48 @@
+import codecs
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.management._owner import resolve_owner
+from todo.transfer import FORMATS, KINDS, Importer, parse_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Import tasks or contexts for a user from an NDJSON or CSV file in the /api/export/ format. "
+        "The file is read incrementally and written in chunks of TRANSFER_CHUNK_SIZE rows, each in its "
+        "own transaction; categories are matched by name and created when missing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin")
+        parser.add_argument("--owner", required=True, help="supabase_uid, username or email of the user")
+        parser.add_argument("--kind", choices=list(KINDS), default="tasks")
+        parser.add_argument("--format", choices=list(FORMATS), help="Defaults to the file extension")
+
+    def handle(self, *args, **opts):
+        owner = resolve_owner(opts["owner"])
+
+        path = opts["path"]
+        fmt = opts["format"] or Path(path).suffix.lstrip(".").lower()
+        if fmt not in FORMATS:
+            raise CommandError(f"Can't tell the format of {path!r}; pass --format {'|'.join(FORMATS)}.")
+
+        if path == "-":
+            lines = codecs.iterdecode(sys.stdin.buffer, "utf-8-sig")
+            report = Importer(owner, opts["kind"]).run(parse_records(lines, fmt))
+        else:
+            try:
+                with open(path, encoding="utf-8-sig", newline="") as f:
+                    report = Importer(owner, opts["kind"]).run(parse_records(f, fmt))
+            except OSError as e:
+                raise CommandError(str(e))
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        if report["skipped"] > len(report["errors"]):
+            self.stderr.write(f"... {report['skipped'] - len(report['errors'])} more invalid line(s)")
+        self.stdout.write(
+            self.style.SUCCESS(f"{owner.username}: {report['created']} {opts['kind']} imported, {report['skipped']} skipped")
+        )
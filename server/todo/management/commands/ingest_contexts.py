@@ -0,0 +1,71 @@
+import sys
+import zipfile
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.ingest import PARSERS, Ingestor
+from todo.management._owner import resolve_owner
+from todo.models import ContextEntry
+
+
+class Command(BaseCommand):
+    help = (
+        "Ingest a WhatsApp chat export (.txt, or the .zip WhatsApp shares) or an mbox/.eml dump as context "
+        "entries for a user. The file is streamed and written in batches; entries the user already has "
+        "are skipped, so re-running on the same export is cheap."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Export to ingest, or - for stdin")
+        parser.add_argument("--owner", required=True, help="supabase_uid, username or email of the user")
+        parser.add_argument("--source", choices=list(PARSERS), required=True)
+        parser.add_argument(
+            "--backfill-hashes", action="store_true",
+            help="First compute content hashes for existing entries without one, so they are deduplicated too",
+        )
+
+    @contextmanager
+    def open_lines(self, path):
+        if path == "-":
+            yield sys.stdin.buffer
+        elif zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                # WhatsApp's "Export chat" zip: the chat is the .txt, the rest is media
+                names = [n for n in archive.namelist() if n.lower().endswith((".txt", ".mbox", ".eml"))]
+                if not names:
+                    raise CommandError(f"No .txt, .mbox or .eml file in {path}")
+                with archive.open(names[0]) as f:
+                    yield f
+        else:
+            with open(path, "rb") as f:
+                yield f
+
+    def backfill_hashes(self, owner, batch_size=1000):
+        total = 0
+        pending = ContextEntry.objects.filter(owner=owner, content_hash__isnull=True).order_by("pk")
+        while True:
+            entries = list(pending.only("id", "content", "source_type")[:batch_size])
+            if not entries:
+                break
+            for entry in entries:
+                entry.content_hash = ContextEntry.hash_content(entry.content, entry.source_type)
+            # Only the hash changes; updated_at stays, so delta sync doesn't resend these rows
+            ContextEntry.objects.bulk_update(entries, ["content_hash"])
+            total += len(entries)
+        self.stdout.write(f"Hashed {total} existing entr{'y' if total == 1 else 'ies'}")
+
+    def handle(self, *args, **opts):
+        owner = resolve_owner(opts["owner"])
+        if opts["backfill_hashes"]:
+            self.backfill_hashes(owner)
+
+        try:
+            with self.open_lines(opts["path"]) as lines:
+                report = Ingestor(owner, opts["source"]).run(lines)
+        except OSError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"{owner.username}: {report['parsed']} parsed, {report['created']} created, "
+            f"{report['duplicates']} duplicate(s) skipped"
+        ))
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent requests at a running server and report throughput and latency. "
+        "Run it once against the WSGI deployment and once against ASGI "
+        "(ASYNC_AI_VIEWS=True) to compare them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", required=True, help="Full endpoint URL, e.g. http://127.0.0.1:8000/api/ai/suggestions/")
+        parser.add_argument("--token", default="", help="Bearer token for protected endpoints")
+        parser.add_argument("--method", default="POST")
+        parser.add_argument("--body", default='{"title": "Finish report", "description": "Q2 numbers", "context": ""}')
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--timeout", type=float, default=60)
+
+    def handle(self, *args, **opts):
+        try:
+            body = json.loads(opts["body"]) if opts["body"] else None
+        except ValueError as e:
+            raise CommandError(f"--body is not valid JSON: {e}")
+        results = asyncio.run(self.run(opts, body))
+        self.report(results, opts)
+
+    async def run(self, opts, body):
+        headers = {"Authorization": f"Bearer {opts['token']}"} if opts["token"] else {}
+        limits = httpx.Limits(max_connections=opts["concurrency"], max_keepalive_connections=opts["concurrency"])
+        queue = asyncio.Queue()
+        for _ in range(opts["requests"]):
+            queue.put_nowait(None)
+        results = []
+
+        async with httpx.AsyncClient(headers=headers, limits=limits, timeout=opts["timeout"]) as client:
+            async def worker():
+                while not queue.empty():
+                    queue.get_nowait()
+                    start = time.perf_counter()
+                    try:
+                        resp = await client.request(opts["method"], opts["url"], json=body)
+                        code = resp.status_code
+                    except httpx.HTTPError as e:
+                        code = type(e).__name__
+                    results.append((time.perf_counter() - start, code))
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(opts["concurrency"])))
+            self.elapsed = time.perf_counter() - start
+        return results
+
+    def report(self, results, opts):
+        latencies = sorted(r[0] for r in results)
+        codes = {}
+        for _, code in results:
+            codes[code] = codes.get(code, 0) + 1
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+        self.stdout.write(f"{opts['method']} {opts['url']}  ({len(results)} requests, concurrency {opts['concurrency']})")
+        self.stdout.write(f"throughput: {len(results) / self.elapsed:.1f} req/s over {self.elapsed:.2f}s")
+        self.stdout.write(
+            f"latency ms: mean {statistics.mean(latencies) * 1000:.1f}  "
+            f"p50 {pct(50):.1f}  p90 {pct(90):.1f}  p99 {pct(99):.1f}  max {latencies[-1] * 1000:.1f}"
+        )
+        self.stdout.write(f"status codes: {codes}")
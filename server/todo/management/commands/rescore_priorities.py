@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from todo.management._owner import resolve_owner
+from todo.priority import rescore
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-score task priorities from base priority, deadline urgency, age and category load. "
+        "Run a full pass nightly and --incremental more often (e.g. every few minutes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--incremental", action="store_true",
+            help="Only tasks edited since they were scored, or whose deadline/age still moves the score",
+        )
+        parser.add_argument("--owner", help="supabase_uid, username or email; default: every user")
+        parser.add_argument("--chunk-size", type=int, default=settings.PRIORITY_CHUNK_SIZE)
+
+    def handle(self, *args, **opts):
+        owner_ids = None
+        if opts["owner"]:
+            owner_ids = [resolve_owner(opts["owner"]).pk]
+
+        def progress(scored, written):
+            if opts["verbosity"] > 1:
+                self.stdout.write(f"  {scored} scored, {written} written")
+
+        start = time.perf_counter()
+        scored, written = rescore(
+            incremental=opts["incremental"],
+            owner_ids=owner_ids,
+            chunk_size=opts["chunk_size"],
+            progress=progress,
+        )
+        elapsed = time.perf_counter() - start
+        rate = scored / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {scored} task(s), wrote {written} in {elapsed:.1f}s ({rate:,.0f} tasks/s)"
+        ))
@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter: what a new gunicorn/uvicorn worker does before and
+# on its first request
+PROBE = """
+import json, time
+start = time.perf_counter()
+from core.{entrypoint} import application
+app = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns  # loaded lazily by the first request: views, serializers, clients
+urls = time.perf_counter()
+print(json.dumps({{"app": app - start, "urls": urls - app}}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure worker cold start: time to import the WSGI/ASGI application and to load the "
+        "URLconf, in fresh interpreters, plus the top packages by import time (python -X importtime)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entrypoint", choices=["wsgi", "asgi"], default="wsgi")
+        parser.add_argument("--runs", type=int, default=5, help="Cold starts to time; the best is reported")
+        parser.add_argument("--top", type=int, default=15, help="Packages to list by import time")
+        parser.add_argument("--budget-ms", type=float, help="Fail if the best cold start is slower than this")
+
+    def probe(self, entrypoint, *python_flags):
+        result = subprocess.run(
+            [sys.executable, *python_flags, "-c", PROBE.format(entrypoint=entrypoint)],
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Startup probe failed:\n{result.stderr[-2000:]}")
+        return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+    def import_times(self, stderr):
+        """Self time per top-level package, in seconds, from -X importtime output."""
+        totals = Counter()
+        for line in stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            self_us, _, name = line[len("import time:"):].split("|")
+            if not self_us.strip().isdigit():
+                continue  # the header line
+            totals[name.strip().split(".")[0]] += int(self_us) / 1e6
+        return totals
+
+    def handle(self, *args, **opts):
+        entrypoint = opts["entrypoint"]
+        runs = [self.probe(entrypoint)[0] for _ in range(opts["runs"])]
+        best = min(runs, key=lambda r: r["app"] + r["urls"])
+        total = (best["app"] + best["urls"]) * 1000
+
+        self.stdout.write(f"core.{entrypoint} cold start (best of {len(runs)}):")
+        self.stdout.write(f"  import application  {best['app'] * 1000:8.1f} ms")
+        self.stdout.write(f"  load URLconf        {best['urls'] * 1000:8.1f} ms")
+        self.stdout.write(f"  total               {total:8.1f} ms")
+
+        _, stderr = self.probe(entrypoint, "-X", "importtime")
+        totals = self.import_times(stderr)
+        self.stdout.write(f"\nTop {opts['top']} packages by import time (self time, one -X importtime run):")
+        for name, seconds in totals.most_common(opts["top"]):
+            self.stdout.write(f"  {seconds * 1000:8.1f} ms  {name}")
+
+        if opts["budget_ms"] is not None and total > opts["budget_ms"]:
+            raise CommandError(f"Cold start {total:.0f} ms is over the {opts['budget_ms']:.0f} ms budget")
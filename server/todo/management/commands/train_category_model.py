@@ -0,0 +1,54 @@
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from todo.category_model import CategoryClassifier, model_path
+from todo.management._owner import resolve_owner
+from todo.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Train the offline category classifier from categorized tasks, one model per user, "
+        "saved under CATEGORY_MODEL_DIR. Re-run to pick up new tasks and categories."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owner", help="supabase_uid, username or email; default: every user")
+        parser.add_argument(
+            "--min-tasks", type=int, default=2,
+            help="Skip categories with fewer categorized tasks than this",
+        )
+
+    def handle(self, *args, **opts):
+        tasks = Task.objects.filter(category__isnull=False, owner__isnull=False)
+        if opts["owner"]:
+            tasks = tasks.filter(owner=resolve_owner(opts["owner"]))
+
+        # owner id -> [(text, category id, category name)]
+        examples = defaultdict(list)
+        rows = tasks.values_list("owner_id", "title", "description", "category_id", "category__name")
+        for owner_id, title, description, category_id, name in rows.iterator(chunk_size=2000):
+            examples[owner_id].append((f"{title} {description}", category_id, name))
+
+        trained = 0
+        for owner_id, owner_examples in examples.items():
+            counts = defaultdict(int)
+            for _, category_id, _ in owner_examples:
+                counts[category_id] += 1
+            owner_examples = [e for e in owner_examples if counts[e[1]] >= opts["min_tasks"]]
+            if not owner_examples:
+                continue
+
+            start = time.perf_counter()
+            texts, category_ids, names = zip(*owner_examples)
+            model = CategoryClassifier.fit(list(texts), list(category_ids), list(names))
+            model.save(model_path(owner_id))
+            trained += 1
+            self.stdout.write(
+                f"owner {owner_id}: {len(texts)} task(s), {len(model)} categories, "
+                f"{len(model.features)} features, {(time.perf_counter() - start) * 1000:.0f} ms"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Trained {trained} model(s)"))
@@ -0,0 +1,348 @@
+"""
+Request instrumentation.
+
+Each request gets a RequestTimings (held in a ContextVar, so it follows the
+request through sync_to_async and async views) that collects:
+
+  auth       SupabaseAuthentication
+  db         every SQL statement, via a connection execute wrapper
+  http       calls to Supabase and Hugging Face
+  serialize  serializers and the JSON renderer
+
+Phases are exclusive: DB queries run while authenticating count as db, not
+auth. RequestMetricsMiddleware reports them in a Server-Timing header and
+feeds the process-wide histograms served in Prometheus text format at /metrics.
+Metrics are per process; Prometheus sums them across workers.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf"))
+
+PHASES = ("auth", "db", "http", "serialize")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in values:
+            labels = _format_labels(zip(self.labelnames, key))
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [bucket counts, sum]
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self):
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in series:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time to produce a response, per route.",
+    ("route", "method", "status"),
+)
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds", "Duration of calls to external services (including retries).",
+    ("upstream",),
+)
+PHASE_SECONDS = Counter(
+    "http_request_phase_seconds_total", "Time spent per request phase, per route.",
+    ("route", "phase"),
+)
+DB_QUERIES = Counter(
+    "db_queries_total", "SQL statements executed while serving requests, per route.",
+    ("route",),
+)
+HF_QUEUE_WAIT = Histogram(
+    "huggingface_queue_wait_seconds", "Time Hugging Face calls waited for a slot (admitted calls only).",
+)
+
+REGISTRY = [REQUEST_LATENCY, UPSTREAM_LATENCY, PHASE_SECONDS, DB_QUERIES, HF_QUEUE_WAIT]
+
+
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+        # Sum of all exclusive phase time so far; enclosing phases subtract what their children added
+        self.accounted = 0.0
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        self.accounted += seconds
+
+
+_current = ContextVar("request_timings", default=None)
+
+
+def current_timings():
+    """The RequestTimings of the request being served, or None outside one."""
+    return _current.get()
+
+
+@contextmanager
+def phase(name, upstream=None):
+    """
+    Time the block as phase `name` of the current request. With `upstream`,
+    the block's duration is also recorded in the upstream latency histogram.
+    """
+    timings = _current.get()
+    accounted = timings.accounted if timings is not None else 0.0
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if upstream is not None and settings.METRICS_ENABLED:
+            UPSTREAM_LATENCY.observe(elapsed, upstream=upstream)
+        if timings is not None:
+            timings.add(name, elapsed - (timings.accounted - accounted))
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add("db", time.perf_counter() - start)
+        timings.queries += 1
+
+
+def install_db_wrapper(sender, connection, **kwargs):
+    """connection_created receiver; wrappers live on the (per-thread) connection object."""
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+@lru_cache(maxsize=1024)
+def route_label(route):
+    """Readable form of a URL pattern: the router's `^tasks/(?P<pk>[^/.]+)/$` becomes `/tasks/<pk>/`."""
+    route = re.sub(r"\(\?P<(\w+)>[^)]*\)", r"<\1>", route)
+    return "/" + route.replace("^", "").replace("$", "").replace("\\", "")
+
+
+def server_timing(timings, total):
+    parts = []
+    for name in PHASES:
+        dur = timings.phases[name] * 1000
+        if name == "db":
+            parts.append(f'db;dur={dur:.1f};desc="{timings.queries} SQL"')
+        elif dur:
+            parts.append(f"{name};dur={dur:.1f}")
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class RequestMetricsMiddleware:
+    """
+    Collects RequestTimings for each request, adds the Server-Timing header and
+    records the route metrics. Works under both WSGI and ASGI.
+    Streaming responses are measured up to the first byte.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, timings)
+        return response
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, timings)
+        return response
+
+    def finish(self, request, response, timings):
+        total = time.perf_counter() - timings.start
+        if settings.SERVER_TIMING_HEADER:
+            response["Server-Timing"] = server_timing(timings, total)
+        if not settings.METRICS_ENABLED:
+            return
+        match = getattr(request, "resolver_match", None)
+        # The URL pattern, not the path, so ids don't explode the label set
+        route = route_label(match.route) if match is not None else "unmatched"
+        REQUEST_LATENCY.observe(total, route=route, method=request.method, status=str(response.status_code))
+        for name, seconds in timings.phases.items():
+            if seconds:
+                PHASE_SECONDS.inc(seconds, route=route, phase=name)
+        if timings.queries:
+            DB_QUERIES.inc(timings.queries, route=route)
+
+
+def _gauge(name, documentation, samples, kind="gauge"):
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+def _component_metrics():
+    """Counters the caches and clients already keep, read at scrape time."""
+    from .authentication import auth_stats
+    from .events import change_feed_stats
+    from .hf_client import coalesced_calls
+    from .hf_http import hf_client_stats, hf_limiter_stats
+    from .suggestion_cache import get_suggestion_cache
+
+    auth = auth_stats()
+    caches = [("auth_profile", auth["profile_cache"]), ("auth_refresh", auth["refresh_cache"])]
+    suggestion_cache = get_suggestion_cache()
+    if suggestion_cache is not None:
+        caches.append(("hf_suggestion", suggestion_cache.stats()))
+
+    lines = _gauge(
+        "auth_token_verifications_total", "Bearer tokens checked, by how they were verified.",
+        [((("method", method),), n) for method, n in sorted(auth["verification"].items())],
+        kind="counter",
+    )
+    lines += _gauge(
+        "cache_hits_total", "Cache hits.",
+        [((("cache", name),), stats["hits"]) for name, stats in caches], kind="counter",
+    )
+    lines += _gauge(
+        "cache_misses_total", "Cache misses.",
+        [((("cache", name),), stats["misses"]) for name, stats in caches], kind="counter",
+    )
+    lines += _gauge(
+        "cache_entries", "Entries currently cached.",
+        [((("cache", name),), stats["size"]) for name, stats in caches if stats["size"] is not None],
+    )
+
+    clients = hf_client_stats()
+    lines += _gauge(
+        "huggingface_attempts_total", "Hugging Face call attempts, by outcome.",
+        [
+            ((("client", client), ("outcome", outcome)), n)
+            for client, stats in clients.items()
+            for outcome, n in sorted(stats["counts"].items())
+        ],
+        kind="counter",
+    )
+    lines += _gauge(
+        "huggingface_breaker_open", "1 while the Hugging Face circuit breaker is open.",
+        [((("client", client),), int(stats["breaker"]["state"] == "open")) for client, stats in clients.items()],
+    )
+    lines += _gauge(
+        "huggingface_coalesced_calls_total", "Suggestion requests that shared an identical in-flight call.",
+        [((("client", client),), n) for client, n in coalesced_calls().items()], kind="counter",
+    )
+
+    limiter = hf_limiter_stats()
+    if limiter is not None:
+        lines += _gauge("huggingface_active_calls", "Hugging Face calls holding a slot.", [((), limiter["active"])])
+        lines += _gauge("huggingface_queue_depth", "Hugging Face calls waiting for a slot.", [((), limiter["queued"])])
+        lines += _gauge(
+            "huggingface_rejected_total", "Hugging Face calls turned away by admission control, by reason.",
+            [((("reason", reason),), n) for reason, n in sorted(limiter["rejected"].items())], kind="counter",
+        )
+
+    feed = change_feed_stats()
+    if feed is not None:
+        lines += _gauge("change_feed_connections", "Open change feed streams.", [((), feed["connections"])])
+        lines += _gauge(
+            "change_feed_events_total", "Change events published, and handed to open streams.",
+            [((("stage", "published"),), feed["published"]), ((("stage", "delivered"),), feed["delivered"])],
+            kind="counter",
+        )
+        lines += _gauge(
+            "change_feed_overflows_total", "Times a slow stream's queue was dropped for a resync.",
+            [((), feed["overflows"])], kind="counter",
+        )
+    return lines
+
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    lines += _component_metrics()
+    return "\n".join(lines) + "\n"
@@ -1,8 +1,18 @@
+import hashlib
+
 from django.db import models
 
 class Category(models.Model):
+    owner = models.ForeignKey('UserProfile', on_delete=models.CASCADE, null=True, related_name='categories', db_index=False)
     name = models.CharField(max_length=100)
     usage_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'name'], name='category_owner_name_idx'),
+            models.Index(fields=['owner', 'updated_at'], name='category_owner_updated_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -13,9 +23,30 @@ class ContextEntry(models.Model):
         ('email', 'Email'),
         ('note', 'Note'),
     )
+    owner = models.ForeignKey('UserProfile', on_delete=models.CASCADE, null=True, related_name='context_entries', db_index=False)
     content = models.TextField()
     source_type = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    # sha256 of source_type + whitespace-normalized content, for dedupe on ingest (see ingest.py)
+    content_hash = models.CharField(max_length=64, null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'created_at'], name='context_owner_created_idx'),
+            models.Index(fields=['owner', 'updated_at'], name='context_owner_updated_idx'),
+            models.Index(fields=['owner', 'content_hash'], name='context_owner_hash_idx'),
+        ]
+
+    @staticmethod
+    def hash_content(content, source_type):
+        normalized = " ".join(content.split())
+        return hashlib.sha256(f"{source_type}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def save(self, *args, **kwargs):
+        # bulk_create skips save(): callers set content_hash themselves
+        self.content_hash = self.hash_content(self.content, self.source_type)
+        super().save(*args, **kwargs)
 
 class Task(models.Model):
     STATUS_CHOICES = (
@@ -23,16 +54,38 @@ class Task(models.Model):
         ('in_progress', 'In Progress'),
         ('completed', 'Completed'),
     )
+    ENRICHMENT_CHOICES = (
+        ('none', 'Not requested'),
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
 
+    owner = models.ForeignKey('UserProfile', on_delete=models.CASCADE, null=True, related_name='tasks', db_index=False)
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
     priority_score = models.FloatField(default=0)
     deadline = models.DateField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    enrichment_status = models.CharField(max_length=20, choices=ENRICHMENT_CHOICES, default='none')
+    # priority_score as last set by the user or the AI; priority_score itself is re-scored from it
+    base_priority = models.FloatField(null=True, blank=True)
+    priority_scored_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Every list query is scoped to one owner, so owner leads each index;
+        # the rest matches the keyset orderings in TaskPagination
+        indexes = [
+            models.Index(fields=['owner', 'priority_score', 'id'], name='task_owner_priority_idx'),
+            models.Index(fields=['owner', 'deadline', 'id'], name='task_owner_deadline_idx'),
+            models.Index(fields=['owner', 'updated_at', 'id'], name='task_owner_updated_idx'),
+            models.Index(fields=['owner', 'status', 'priority_score', 'id'], name='task_owner_status_priority_idx'),
+            models.Index(fields=['owner', 'status', 'deadline', 'id'], name='task_owner_status_deadline_idx'),
+        ]
+
 class UserProfile(models.Model):
     supabase_uid = models.CharField(max_length=128, unique=True)
     username = models.CharField(max_length=50, unique=True)
@@ -56,4 +109,55 @@ class UserProfile(models.Model):
         return True
     
     def __str__(self):
-        return self.username
\ No newline at end of file
+        return self.username
+
+class SuggestionCacheEntry(models.Model):
+    """Cached Hugging Face suggestion, keyed on a hash of model + normalized prompt."""
+    key = models.CharField(max_length=64, primary_key=True)
+    response = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+
+class EnrichmentJob(models.Model):
+    """
+    Queued request to fill a Task in from the AI suggestion.
+    (task, input_hash) is unique, so enqueuing the same task content while it is queued is a no-op.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='enrichment_jobs')
+    input_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    run_after = models.DateTimeField()
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'input_hash'], name='unique_enrichment_per_task_input'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='enrichment_job_queue_idx'),
+        ]
+
+class Tombstone(models.Model):
+    """Record of a deleted Task, Category or ContextEntry, so delta sync clients can drop it."""
+    owner = models.ForeignKey('UserProfile', on_delete=models.CASCADE, related_name='tombstones', db_index=False)
+    kind = models.CharField(max_length=20)  # "tasks", "categories" or "contexts", as in the sync payload
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'deleted_at'], name='tombstone_owner_deleted_idx'),
+        ]
@@ -0,0 +1,152 @@
+import base64
+import json
+
+from django.db import models
+from django.db.models import F, Q
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over (ordering field, id).
+    Each page is a range scan on a matching index instead of an OFFSET,
+    so page N costs the same as page 1. Nullable fields sort NULLs last.
+
+    ?ordering=<one of `orderings`>  ?limit=<page size>  ?cursor=<opaque token from `next`>
+    """
+    page_size = 50
+    max_page_size = 200
+    default_ordering = "-priority_score"
+    # ordering param -> (field, descending, nullable)
+    orderings = {}
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get("ordering", self.default_ordering)
+        if ordering not in self.orderings:
+            raise ValidationError({"ordering": f"Must be one of: {', '.join(self.orderings)}"})
+        return ordering
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.page_size))
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer."})
+        return max(1, min(limit, self.max_page_size))
+
+    def decode_cursor(self, request, ordering, model):
+        raw = request.query_params.get("cursor")
+        if not raw:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(raw.encode("ascii")))
+            if data["o"] != ordering:
+                raise ValueError("cursor was issued for another ordering")
+            field, _, nullable = self.orderings[ordering]
+            self.check_cursor_value(model._meta.get_field(field), nullable, data["v"])
+            return data["v"], int(data["id"])
+        except (ValueError, KeyError, TypeError):
+            raise NotFound("Invalid cursor")
+
+    def check_cursor_value(self, field, nullable, value):
+        """Raise ValueError/TypeError unless `value` is what encode_cursor writes for `field`."""
+        if value is None:
+            if not nullable:
+                raise ValueError("null cursor value")
+        elif isinstance(field, models.DateTimeField):
+            if parse_datetime(value) is None:
+                raise ValueError("not a datetime")
+        elif isinstance(field, models.DateField):
+            if parse_date(value) is None:
+                raise ValueError("not a date")
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise TypeError("not a number")
+
+    def encode_cursor(self, ordering, value, pk):
+        data = {"o": ordering, "v": value, "id": pk}
+        return base64.urlsafe_b64encode(json.dumps(data).encode("utf-8")).decode("ascii")
+
+    def order_queryset(self, queryset, field, descending, nullable):
+        if nullable:
+            expr = F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_last=True)
+        else:
+            # Plain ORDER BY so the (field, id) index can be scanned in either direction
+            expr = f"-{field}" if descending else field
+        return queryset.order_by(expr, "-id" if descending else "id")
+
+    def after(self, field, descending, nullable, value, pk):
+        """Rows that sort after (value, pk)."""
+        cmp, bound = ("lt", "lte") if descending else ("gt", "gte")
+        if value is None:
+            # Already in the NULL tail
+            return Q(**{f"{field}__isnull": True, f"id__{cmp}": pk})
+        # The redundant `bound` term gives the planner an index range to seek to
+        cond = Q(**{f"{field}__{bound}": value}) & (
+            Q(**{f"{field}__{cmp}": value}) | Q(**{field: value, f"id__{cmp}": pk})
+        )
+        if nullable:
+            cond |= Q(**{f"{field}__isnull": True})
+        return cond
+
+    def get_page_queryset(self, queryset, request):
+        """The query for the requested page, plus one extra row that tells whether there is a next page."""
+        self.request = request
+        self.ordering = self.get_ordering(request)
+        field, descending, nullable = self.orderings[self.ordering]
+        limit = self.get_limit(request)
+
+        queryset = self.order_queryset(queryset, field, descending, nullable)
+        cursor = self.decode_cursor(request, self.ordering, queryset.model)
+        if cursor is not None:
+            queryset = queryset.filter(self.after(field, descending, nullable, *cursor))
+        return queryset[:limit + 1]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        rows = list(self.get_page_queryset(queryset, request))
+        field = self.orderings[self.ordering][0]
+        limit = self.get_limit(request)
+        self.has_next = len(rows) > limit
+        rows = rows[:limit]
+        self.next_cursor = None
+        if self.has_next:
+            last = rows[-1]
+            # Model instances, or dicts from a .values() queryset
+            if isinstance(last, dict):
+                value, pk = last[field], last["id"]
+            else:
+                value, pk = getattr(last, field), last.pk
+            if hasattr(value, "isoformat"):
+                value = value.isoformat()
+            self.next_cursor = self.encode_cursor(self.ordering, value, pk)
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), "cursor", self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+
+class TaskPagination(KeysetPagination):
+    default_ordering = "-priority_score"
+    orderings = {
+        "-priority_score": ("priority_score", True, False),
+        "priority_score": ("priority_score", False, False),
+        "deadline": ("deadline", False, True),
+        "-updated_at": ("updated_at", True, False),
+        "updated_at": ("updated_at", False, False),
+    }
@@ -0,0 +1,178 @@
+"""
+Priority re-scoring: priority_score = the task's base priority (set by the user
+or the AI) adjusted for deadline urgency, age and how busy its category is.
+
+    score = 10 * (W_BASE * base / 10
+                  + open * (W_URGENCY * urgency + W_AGE * age + W_CATEGORY * category_share))
+
+  urgency         0 with no deadline or one more than PRIORITY_HORIZON_DAYS away,
+                  rising linearly to 1 on the deadline (overdue stays at 1)
+  age             days since creation / PRIORITY_AGE_CAP_DAYS, capped at 1
+  category_share  fraction of the owner's open tasks in the same category
+  open            0 for completed tasks, which keep only their base part
+
+Tasks are read in id-ordered chunks with values_list(), scored with NumPy
+over the whole chunk, and only rows whose score changed are written back.
+Writes use one parameterised UPDATE per batch rather than bulk_update(), whose
+CASE/WHEN expressions cost about a millisecond per row to build. Each UPDATE
+only matches rows whose updated_at is still the one that was read, so a task
+edited between the read and the write keeps the edit and is re-scored next run.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Task
+
+W_BASE = 0.5
+W_URGENCY = 0.3
+W_AGE = 0.1
+W_CATEGORY = 0.1
+
+FIELDS = (
+    "id", "owner_id", "category_id", "deadline", "status", "created_at", "updated_at",
+    "priority_score", "base_priority", "priority_scored_at",
+)
+
+
+def category_shares(owner_ids=None):
+    """(owner id, category id or None) -> share of that owner's open tasks, from one grouped query."""
+    queryset = Task.objects.exclude(status="completed")
+    if owner_ids is not None:
+        queryset = queryset.filter(owner_id__in=owner_ids)
+    counts = queryset.values("owner_id", "category_id").annotate(n=Count("id")).order_by()
+    totals = defaultdict(int)
+    for row in counts:
+        totals[row["owner_id"]] += row["n"]
+    return {(row["owner_id"], row["category_id"]): row["n"] / totals[row["owner_id"]] for row in counts}
+
+
+def compute_scores(base, days_left, is_open, age_days, share):
+    """Vectorised score for arrays of equal length; days_left is NaN without a deadline."""
+    horizon = settings.PRIORITY_HORIZON_DAYS
+    urgency = np.where(np.isnan(days_left), 0.0, np.clip(1 - days_left / horizon, 0, 1))
+    age = np.clip(age_days / settings.PRIORITY_AGE_CAP_DAYS, 0, 1)
+    dynamic = W_URGENCY * urgency + W_AGE * age + W_CATEGORY * share
+    score = 10 * (W_BASE * np.clip(base, 0, 10) / 10 + is_open * dynamic)
+    return np.round(score, 2)
+
+
+def incremental_filter(now):
+    """Tasks whose score may have moved since they were last scored."""
+    today = timezone.localdate(now)
+    time_dependent = ~Q(status="completed") & (
+        Q(deadline__lte=today + timedelta(days=settings.PRIORITY_HORIZON_DAYS))
+        | Q(created_at__gte=now - timedelta(days=settings.PRIORITY_AGE_CAP_DAYS))
+    )
+    return (
+        Q(priority_scored_at__isnull=True)
+        | Q(updated_at__gt=F("priority_scored_at"))
+        | time_dependent
+    )
+
+
+def score_chunk(rows, shares, now):
+    """
+    Score one chunk of FIELDS tuples. Returns the rows to write as
+    (id, priority_score, base_priority, priority_scored_at, updated_at, updated_at as read) tuples.
+    """
+    today = timezone.localdate(now).toordinal()
+    n = len(rows)
+    ids, owners, categories, deadlines, statuses, created, updated, scores, bases, scored_at = zip(*rows)
+
+    old = np.fromiter(scores, dtype=np.float64, count=n)
+    base = np.fromiter((np.nan if b is None else b for b in bases), dtype=np.float64, count=n)
+    # Never re-scored before: the current priority is still the user's/AI's own
+    base = np.where(np.isnan(base), old, base)
+    days_left = np.fromiter(
+        (np.nan if d is None else d.toordinal() - today for d in deadlines), dtype=np.float64, count=n
+    )
+    is_open = np.fromiter((s != "completed" for s in statuses), dtype=np.float64, count=n)
+    age_days = np.fromiter(((now - c).total_seconds() for c in created), dtype=np.float64, count=n) / 86400
+    share = np.fromiter((shares.get(k, 0.0) for k in zip(owners, categories)), dtype=np.float64, count=n)
+
+    new = compute_scores(base, days_left, is_open, age_days, share)
+    changed = np.abs(new - old) >= 0.005
+    unscored = np.fromiter(
+        (s is None or u > s for s, u in zip(scored_at, updated)), dtype=bool, count=n
+    )
+    return [
+        # A new score is a change clients should sync, so it bumps updated_at
+        (ids[i], float(new[i]), float(base[i]), now, now if changed[i] else updated[i], updated[i])
+        for i in np.flatnonzero(changed | unscored)
+    ]
+
+
+def write_scores(rows):
+    """
+    Write score_chunk() output, PRIORITY_WRITE_BATCH_SIZE rows per statement.
+    Rows changed since they were read are skipped; returns the number written.
+    """
+    table = connection.ops.quote_name(Task._meta.db_table)
+    batch_size = settings.PRIORITY_WRITE_BATCH_SIZE
+    written = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            from psycopg2.extras import execute_values
+
+            written = len(execute_values(
+                cursor.cursor,
+                f"UPDATE {table} AS t SET priority_score = v.score, base_priority = v.base, "
+                f"priority_scored_at = v.scored_at, updated_at = v.updated_at "
+                f"FROM (VALUES %s) AS v(id, score, base, scored_at, updated_at, read_at) "
+                f"WHERE t.id = v.id AND t.updated_at = v.read_at RETURNING t.id",
+                rows,
+                page_size=batch_size,
+                fetch=True,
+            ))
+        else:
+            adapt = connection.ops.adapt_datetimefield_value  # raw SQL skips field conversion
+            params = [
+                (score, base, adapt(scored_at), adapt(updated_at), pk, adapt(read_at))
+                for pk, score, base, scored_at, updated_at, read_at in rows
+            ]
+            for start in range(0, len(params), batch_size):
+                cursor.executemany(
+                    f"UPDATE {table} SET priority_score = %s, base_priority = %s, "
+                    f"priority_scored_at = %s, updated_at = %s WHERE id = %s AND updated_at = %s",
+                    params[start:start + batch_size],
+                )
+                written += cursor.rowcount
+    return written
+
+
+def rescore(incremental=False, owner_ids=None, chunk_size=None, progress=None):
+    """
+    Re-score tasks (all, or only those that may have changed) and write back
+    the changed ones. Returns (tasks scored, tasks written).
+    """
+    chunk_size = chunk_size or settings.PRIORITY_CHUNK_SIZE
+    now = timezone.now()
+    shares = category_shares(owner_ids)
+
+    queryset = Task.objects.all()
+    if owner_ids is not None:
+        queryset = queryset.filter(owner_id__in=owner_ids)
+    if incremental:
+        queryset = queryset.filter(incremental_filter(now))
+
+    scored = written = 0
+    last_id = 0
+    while True:
+        # Keyset over the primary key; no OFFSET, no long-lived cursor
+        rows = list(queryset.filter(id__gt=last_id).order_by("id").values_list(*FIELDS)[:chunk_size])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        updates = score_chunk(rows, shares, now)
+        if updates:
+            written += write_scores(updates)
+        scored += len(rows)
+        if progress:
+            progress(scored, written)
+    return scored, written
@@ -0,0 +1,24 @@
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .metrics import phase
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON renderer backed by orjson, several times faster than the stdlib encoder
+    on large lists. Output matches DRF's compact UTF-8 JSONRenderer.
+    """
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    # Types orjson doesn't handle natively (Decimal, lazy strings, ...)
+    _fallback = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        with phase("serialize"):
+            return orjson.dumps(data, default=self._fallback, option=orjson.OPT_NON_STR_KEYS)
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Task, ContextEntry, Category
 
@@ -6,16 +8,93 @@ class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = '__all__'
+        read_only_fields = ('owner',)
 
 class ContextEntrySerializer(serializers.ModelSerializer):
     class Meta:
         model = ContextEntry
-        fields = '__all__'
+        exclude = ('content_hash',)
+        read_only_fields = ('owner',)
 
 class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
-        fields = '__all__'
+        # Re-scoring bookkeeping (see priority.py) stays internal
+        exclude = ('base_priority', 'priority_scored_at')
+        read_only_fields = ('owner', 'enrichment_status')
+
+    def validate(self, attrs):
+        # A new priority becomes the base that re-scoring starts from. Clients send the
+        # current (re-scored) priority back with every edit; that must not replace the base.
+        if 'priority_score' in attrs and (
+            self.instance is None or attrs['priority_score'] != self.instance.priority_score
+        ):
+            attrs['base_priority'] = attrs['priority_score']
+        return attrs
+
+    def validate_category(self, category):
+        request = self.context.get('request')
+        if category is not None and request is not None and category.owner_id != request.user.pk:
+            raise serializers.ValidationError('Invalid pk "%s" - object does not exist.' % category.pk)
+        return category
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Written as a pk, read inline (the client uses task.category.id / .name);
+        # querysets should select_related('category')
+        category = instance.category if instance.category_id else None
+        data['category'] = {'id': category.pk, 'name': category.name} if category else None
+        return data
+
+# Fast list path: the same output as TaskSerializer, built from .values() rows
+TASK_ROW_FIELDS = (
+    'id', 'title', 'description', 'priority_score', 'deadline', 'status', 'enrichment_status',
+    'created_at', 'updated_at', 'owner_id', 'category_id', 'category__name',
+)
+
+def _format_datetime(value):
+    # Same as DRF's DateTimeField: current timezone, ISO 8601, 'Z' for UTC
+    if value is None:
+        return None
+    value = timezone.localtime(value).isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+def serialize_task_rows(rows):
+    """Format `Task.objects.values(*TASK_ROW_FIELDS)` rows in one pass, skipping DRF fields."""
+    return [
+        {
+            'id': row['id'],
+            'title': row['title'],
+            'description': row['description'],
+            'priority_score': row['priority_score'],
+            'deadline': row['deadline'].isoformat() if row['deadline'] else None,
+            'status': row['status'],
+            'enrichment_status': row['enrichment_status'],
+            'created_at': _format_datetime(row['created_at']),
+            'updated_at': _format_datetime(row['updated_at']),
+            'owner': row['owner_id'],
+            'category': (
+                {'id': row['category_id'], 'name': row['category__name']}
+                if row['category_id'] is not None else None
+            ),
+        }
+        for row in rows
+    ]
+
+class TaskBulkItemSerializer(TaskSerializer):
+    """
+    One item of a bulk create/update. Categories are resolved from the
+    `categories` map in the context (preloaded once per request), not one query per item.
+    """
+    category = serializers.IntegerField(allow_null=True, required=False)
+
+    def validate_category(self, category_id):
+        if category_id is None:
+            return None
+        category = self.context['categories'].get(category_id)
+        if category is None:
+            raise serializers.ValidationError('Invalid pk "%s" - object does not exist.' % category_id)
+        return category
         
 # Authentication
 class RegisterSerializer(serializers.Serializer):
@@ -27,6 +106,10 @@ class LoginSerializer(serializers.Serializer):
     email    = serializers.EmailField()
     password = serializers.CharField()
 
+class RefreshSerializer(serializers.Serializer):
+    # Optional: the HttpOnly refresh_token cookie is used when absent
+    refresh_token = serializers.CharField(required=False, allow_blank=True)
+
 class ResetPasswordSerializer(serializers.Serializer):
     email = serializers.EmailField()
     
@@ -34,4 +117,32 @@ class ResetPasswordSerializer(serializers.Serializer):
 class CategorizeSerializer(serializers.Serializer):
     title = serializers.CharField(max_length=200)
     description = serializers.CharField(allow_blank=True)
-    
\ No newline at end of file
+
+class CategorizeBatchItemSerializer(CategorizeSerializer):
+    description = serializers.CharField(allow_blank=True, required=False, default="")
+
+class CategorizeBatchSerializer(serializers.Serializer):
+    items = CategorizeBatchItemSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        if len(items) > settings.CATEGORY_BATCH_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f"At most {settings.CATEGORY_BATCH_MAX_ITEMS} items per batch."
+            )
+        return items
+
+# AI suggestions
+class AISuggestionItemSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField(allow_blank=True, required=False, default="")
+    context = serializers.CharField(allow_blank=True, required=False, default="")
+
+class AISuggestionBatchSerializer(serializers.Serializer):
+    items = AISuggestionItemSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        if len(items) > settings.HF_BATCH_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f"At most {settings.HF_BATCH_MAX_ITEMS} items per batch."
+            )
+        return items
@@ -0,0 +1,73 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .category_index import invalidate_category_index
+from .events import publish_deleted, publish_saved
+from .models import Category, ContextEntry, Task
+from .stats import invalidate_task_stats
+from .sync import record_deletions
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    # usage_count bumps don't change the names the matcher is built from
+    if update_fields and set(update_fields) <= {"usage_count"}:
+        return
+    invalidate_category_index(instance.owner_id)
+    invalidate_task_stats(instance.owner_id)
+    if not created and (not update_fields or "name" in update_fields):
+        # Tasks are listed with their category's name; bump them so list
+        # ETags change and delta sync sends them again
+        Task.objects.filter(category=instance).update(updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=Category)
+def category_deleting(sender, instance, **kwargs):
+    # Its tasks get category = NULL without save(); bump them so delta sync sends them
+    Task.objects.filter(category=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    invalidate_category_index(instance.owner_id)
+    invalidate_task_stats(instance.owner_id)
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, update_fields=None, **kwargs):
+    # Enrichment bookkeeping doesn't change any count
+    if update_fields and set(update_fields) <= {"enrichment_status", "updated_at"}:
+        return
+    invalidate_task_stats(instance.owner_id)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    invalidate_task_stats(instance.owner_id)
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=ContextEntry)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    # Single-row deletes only. Queryset deletes (bulk endpoint) write their
+    # tombstones in one insert, and rows cascading from a deleted user need none.
+    if origin is instance:
+        record_deletions(sender, instance.owner_id, [instance.pk])
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=ContextEntry)
+def publish_change(sender, instance, update_fields=None, **kwargs):
+    publish_saved(instance, update_fields)
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=ContextEntry)
+def publish_deletion(sender, instance, origin=None, **kwargs):
+    # Same rule as record_tombstone; bulk_destroy publishes its own
+    if origin is instance:
+        publish_deleted(sender, instance.owner_id, [instance.pk])
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Task
+
+STATUSES = [value for value, _ in Task.STATUS_CHOICES]
+
+# Per owner, (date computed, stats) in the Django cache. Dropped whenever one of the
+# owner's tasks changes (signals, plus explicit calls after bulk writes that skip
+# signals). The cache is shared between workers when it is (e.g. Redis), so the drop
+# reaches all of them; with the default per-process cache other workers may serve
+# their copy for up to TASK_STATS_TTL seconds.
+
+
+def _stats_key(owner_id):
+    return f"task-stats:{owner_id}"
+
+
+def invalidate_task_stats(owner_id=None):
+    cache.delete(_stats_key(owner_id))
+
+
+def compute_task_stats(owner_id, today):
+    """Counts per status, overdue and per category, from one grouped query."""
+    rows = (
+        Task.objects
+        .filter(owner_id=owner_id)
+        .values("category_id", "category__name")
+        .annotate(
+            total=Count("id"),
+            overdue=Count("id", filter=Q(deadline__lt=today) & ~Q(status="completed")),
+            **{s: Count("id", filter=Q(status=s)) for s in STATUSES},
+        )
+        .order_by("category__name", "category_id")
+    )
+
+    counts = ["total", *STATUSES, "overdue"]
+    totals = dict.fromkeys(counts, 0)
+    categories = []
+    for row in rows:
+        for key in counts:
+            totals[key] += row[key]
+        categories.append({
+            "id": row["category_id"],
+            "name": row["category__name"] or "Uncategorized",
+            **{key: row[key] for key in counts},
+        })
+    return {**totals, "categories": categories}
+
+
+def get_task_stats(owner_id):
+    today = timezone.localdate()
+    cached = cache.get(_stats_key(owner_id))
+    # Overdue counts depend on the date, so a cached entry from yesterday is stale
+    if cached is None or cached[0] != today:
+        cached = (today, compute_task_stats(owner_id, today))
+        cache.set(_stats_key(owner_id), cached, settings.TASK_STATS_TTL)
+    return cached[1]
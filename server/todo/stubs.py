@@ -0,0 +1,156 @@
+"""
+In-process stand-ins for Supabase Auth (GoTrue) and the Hugging Face Inference
+API, for offline development, load tests and `manage.py bench_api`.
+
+SUPABASE_BACKEND=stub  get_supabase() returns a StubSupabase. Users live in
+                       memory; access tokens are HS256 JWTs signed with
+                       SUPABASE_JWT_SECRET, so SupabaseAuthentication verifies
+                       them locally exactly like real ones.
+HF_BACKEND=stub        the Hugging Face clients answer after HF_STUB_LATENCY
+                       seconds (+/- HF_STUB_JITTER) with a well-formed suggestion,
+                       going through the same breaker and stats as the real ones.
+"""
+import asyncio
+import random
+import secrets
+import threading
+import time
+import uuid
+import zlib
+from datetime import date, datetime, timedelta, timezone
+
+import jwt
+from django.conf import settings
+from gotrue.errors import AuthApiError
+from gotrue.types import AuthResponse, Session, User, UserResponse
+
+from .hf_http import AsyncHuggingFaceClient, HuggingFaceClient
+
+ACCESS_TOKEN_TTL = 3600
+
+
+class StubGoTrue:
+    """The subset of supabase.auth the views use."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = {}           # email -> (User, password)
+        self._refresh_tokens = {}  # refresh token -> email
+
+    def _issue_session(self, user):
+        now = int(time.time())
+        access_token = jwt.encode(
+            {
+                "sub": user.id,
+                "email": user.email,
+                "aud": settings.SUPABASE_JWT_AUDIENCE,
+                "role": "authenticated",
+                "iat": now,
+                "exp": now + ACCESS_TOKEN_TTL,
+            },
+            settings.SUPABASE_JWT_SECRET,
+            algorithm="HS256",
+        )
+        refresh_token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._refresh_tokens[refresh_token] = user.email
+        return Session(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            expires_in=ACCESS_TOKEN_TTL,
+            expires_at=now + ACCESS_TOKEN_TTL,
+            token_type="bearer",
+            user=user,
+        )
+
+    def sign_up(self, credentials):
+        email = credentials["email"].lower()
+        with self._lock:
+            if email in self._users:
+                raise AuthApiError("User already registered", 422, "user_already_exists")
+            user = User(
+                id=str(uuid.uuid4()),
+                email=email,
+                aud=settings.SUPABASE_JWT_AUDIENCE,
+                app_metadata={"provider": "email"},
+                user_metadata={},
+                created_at=datetime.now(timezone.utc),
+            )
+            self._users[email] = (user, credentials["password"])
+        # Email confirmation is on by default in Supabase: no session until the user logs in
+        return AuthResponse(user=user, session=None)
+
+    def sign_in_with_password(self, credentials):
+        with self._lock:
+            user, password = self._users.get(credentials["email"].lower(), (None, None))
+        if user is None or not secrets.compare_digest(password, credentials["password"]):
+            raise AuthApiError("Invalid login credentials", 400, "invalid_credentials")
+        return AuthResponse(user=user, session=self._issue_session(user))
+
+    def refresh_session(self, refresh_token):
+        with self._lock:
+            # Refresh tokens are single use, as in GoTrue
+            email = self._refresh_tokens.pop(refresh_token, None)
+            user = self._users[email][0] if email else None
+        if user is None:
+            raise AuthApiError("Invalid Refresh Token: Refresh Token Not Found", 400, "refresh_token_not_found")
+        return AuthResponse(user=user, session=self._issue_session(user))
+
+    def get_user(self, token):
+        try:
+            claims = jwt.decode(
+                token,
+                settings.SUPABASE_JWT_SECRET,
+                algorithms=["HS256"],
+                audience=settings.SUPABASE_JWT_AUDIENCE,
+            )
+        except jwt.InvalidTokenError as e:
+            raise AuthApiError(f"invalid JWT: {e}", 401, "bad_jwt")
+        with self._lock:
+            user = self._users.get(claims.get("email"), (None, None))[0]
+        if user is None:
+            raise AuthApiError("User from sub claim in JWT does not exist", 403, "user_not_found")
+        return UserResponse(user=user)
+
+    def reset_password_email(self, email, options=None):
+        return None
+
+
+class StubSupabase:
+    def __init__(self):
+        self.auth = StubGoTrue()
+
+
+def stub_generated_text(prompt):
+    """A suggestion in the model's output format, derived from the prompt so it is repeatable."""
+    digest = zlib.crc32(prompt.encode("utf-8"))
+    deadline = date.today() + timedelta(days=1 + digest % 30)
+    return (
+        f"Priority: {1 + digest % 90 / 10:.1f}\n"
+        f"Deadline: {deadline.isoformat()}\n"
+        f"Description: Suggested by the local inference stub.\n"
+        f"Category: {('Work', 'Personal', 'Health', 'Finance')[digest % 4]}"
+    )
+
+
+def _stub_latency():
+    jitter = settings.HF_STUB_JITTER
+    return max(0.0, settings.HF_STUB_LATENCY + random.uniform(-jitter, jitter))
+
+
+class StubHuggingFaceClient(HuggingFaceClient):
+    def post(self, payload):
+        self._before_call()
+        start = time.perf_counter()
+        time.sleep(_stub_latency())
+        self._handle_status(200, "", time.perf_counter() - start)
+        return [{"generated_text": stub_generated_text(payload["inputs"])}]
+
+
+class StubAsyncHuggingFaceClient(AsyncHuggingFaceClient):
+    async def post(self, payload):
+        self._before_call()
+        start = time.perf_counter()
+        await asyncio.sleep(_stub_latency())
+        self._handle_status(200, "", time.perf_counter() - start)
+        return [{"generated_text": stub_generated_text(payload["inputs"])}]
@@ -0,0 +1,179 @@
+import hashlib
+import threading
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from .cache import TTLCache
+from .models import SuggestionCacheEntry
+
+
+def suggestion_cache_key(model, prompt):
+    """Hash of the model plus the prompt with whitespace collapsed."""
+    normalized = " ".join(prompt.split())
+    return hashlib.sha256(f"{model}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+class BaseSuggestionCache:
+    """
+    Shared hit/miss bookkeeping. Backends implement _get/_set/size.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        value = self._get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._set(key, value)
+
+    async def aget(self, key):
+        return await sync_to_async(self.get)(key)
+
+    async def aset(self, key, value):
+        await sync_to_async(self.set)(key, value)
+
+    def size(self):
+        return None
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "backend": self.name,
+            "size": self.size(),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / total) if total else 0.0,
+        }
+
+
+class MemorySuggestionCache(BaseSuggestionCache):
+    """Per-process LRU + TTL cache."""
+    name = "memory"
+
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize, ttl)
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def _get(self, key):
+        return self._cache.get(key)
+
+    def _set(self, key, value):
+        self._cache.set(key, value)
+
+    async def aget(self, key):
+        # Pure in-memory; no need to hop to a thread
+        return self.get(key)
+
+    async def aset(self, key, value):
+        self.set(key, value)
+
+    def size(self):
+        return len(self._cache)
+
+
+class DjangoSuggestionCache(BaseSuggestionCache):
+    """Uses the configured Django cache (settings.CACHES); eviction is the cache's job."""
+    name = "django"
+
+    def __init__(self, maxsize, ttl, alias="default"):
+        super().__init__(maxsize, ttl)
+        self._cache = caches[alias]
+
+    def _get(self, key):
+        return self._cache.get(f"hf-suggestion:{key}")
+
+    def _set(self, key, value):
+        self._cache.set(f"hf-suggestion:{key}", value, timeout=self.ttl)
+
+
+class DatabaseSuggestionCache(BaseSuggestionCache):
+    """
+    Stores suggestions in the SuggestionCacheEntry table so they survive restarts
+    and are shared by every worker. Least recently used rows are trimmed past maxsize.
+    """
+    name = "db"
+
+    def _get(self, key):
+        now = timezone.now()
+        entry = (
+            SuggestionCacheEntry.objects
+            .filter(key=key, expires_at__gt=now)
+            .only("response")
+            .first()
+        )
+        if entry is None:
+            return None
+        SuggestionCacheEntry.objects.filter(key=key).update(last_used_at=now)
+        return entry.response
+
+    def _set(self, key, value):
+        now = timezone.now()
+        SuggestionCacheEntry.objects.update_or_create(
+            key=key,
+            defaults={
+                "response": value,
+                "expires_at": now + timedelta(seconds=self.ttl),
+                "last_used_at": now,
+            },
+        )
+        SuggestionCacheEntry.objects.filter(expires_at__lte=now).delete()
+        overflow = SuggestionCacheEntry.objects.count() - self.maxsize
+        if overflow > 0:
+            stale = (
+                SuggestionCacheEntry.objects
+                .order_by("last_used_at")
+                .values_list("key", flat=True)[:overflow]
+            )
+            SuggestionCacheEntry.objects.filter(key__in=list(stale)).delete()
+
+    def size(self):
+        return SuggestionCacheEntry.objects.filter(expires_at__gt=timezone.now()).count()
+
+
+BACKENDS = {
+    "memory": MemorySuggestionCache,
+    "django": DjangoSuggestionCache,
+    "db": DatabaseSuggestionCache,
+}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_suggestion_cache():
+    """Process-wide suggestion cache for settings.HF_SUGGESTION_CACHE_BACKEND, or None if disabled."""
+    global _cache
+    backend = settings.HF_SUGGESTION_CACHE_BACKEND
+    if backend == "none":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    cls = BACKENDS[backend]
+                except KeyError:
+                    raise ValueError(f"Unknown HF_SUGGESTION_CACHE_BACKEND: {backend}")
+                _cache = cls(
+                    maxsize=settings.HF_SUGGESTION_CACHE_SIZE,
+                    ttl=settings.HF_SUGGESTION_CACHE_TTL,
+                )
+    return _cache
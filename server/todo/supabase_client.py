@@ -1,7 +1,38 @@
-from supabase import create_client
+import threading
+
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_supabase():
+    """
+    Process-wide Supabase client, created on first use. The SDK is imported
+    here too: it takes a few hundred ms, which manage.py commands and worker
+    boot shouldn't pay for until something actually talks to Supabase.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if settings.SUPABASE_BACKEND == "stub":
+                    # In-memory GoTrue stand-in for offline runs and benchmarks
+                    from .stubs import StubSupabase
+                    _client = StubSupabase()
+                else:
+                    if not settings.SUPABASE_URL or not settings.SUPABASE_SERVICE_KEY:
+                        raise ImproperlyConfigured("SUPABASE_URL and SUPABASE_SERVICE_KEY must be set")
+                    from supabase import create_client
+                    _client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+    return _client
+
 
-supabase = create_client(
-    settings.SUPABASE_URL,
-    settings.SUPABASE_SERVICE_KEY
-)
+def __getattr__(name):
+    # `except supabase_client.AuthApiError` is only evaluated once something has
+    # raised, so gotrue is imported on the error path rather than at startup
+    if name == "AuthApiError":
+        from gotrue.errors import AuthApiError
+        return AuthApiError
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,83 @@
+"""
+Delta sync: rows changed since a client cursor, plus tombstones for deletions.
+
+The cursor is the server time the previous sync started at. Rows are matched with
+a small overlap (SYNC_OVERLAP) so a write that committed just after that sync read
+isn't missed; clients upsert by id, so seeing a row twice is harmless.
+"""
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Category, ContextEntry, Task, Tombstone
+from .serializers import CategorySerializer, ContextEntrySerializer, TaskSerializer
+
+# Payload key -> (model, serializer)
+SYNC_MODELS = {
+    "tasks": (Task, TaskSerializer),
+    "categories": (Category, CategorySerializer),
+    "contexts": (ContextEntry, ContextEntrySerializer),
+}
+KIND_BY_MODEL = {model: kind for kind, (model, _) in SYNC_MODELS.items()}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def record_deletions(model, owner_id, ids):
+    """Write tombstones for deleted rows of `model` in one insert."""
+    if owner_id is None or not ids:
+        return
+    kind = KIND_BY_MODEL[model]
+    Tombstone.objects.bulk_create(
+        [Tombstone(owner_id=owner_id, kind=kind, object_id=pk) for pk in ids]
+    )
+
+
+def parse_cursor(value):
+    since = parse_datetime(value) if value else None
+    if value and since is None:
+        raise InvalidCursor("Invalid sync cursor.")
+    if since is not None and timezone.is_naive(since):
+        since = timezone.make_aware(since, dt_timezone.utc)
+    return since
+
+
+def get_changes(owner_id, since=None):
+    """
+    Everything the owner's client needs to catch up from `since`.
+    Without a cursor, or with one older than the tombstone retention window,
+    returns a full snapshot with reset=True: the client should replace its copy.
+    """
+    now = timezone.now()
+    oldest = now - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    reset = since is None or since < oldest
+
+    changes, deleted = {}, {}
+    for kind, (model, serializer_class) in SYNC_MODELS.items():
+        queryset = model.objects.filter(owner_id=owner_id)
+        if model is Task:
+            queryset = queryset.select_related("category")
+        if not reset:
+            queryset = queryset.filter(updated_at__gte=since - timedelta(seconds=settings.SYNC_OVERLAP))
+        changes[kind] = serializer_class(queryset.order_by("updated_at", "id"), many=True).data
+        deleted[kind] = []
+
+    if not reset:
+        tombstones = (
+            Tombstone.objects
+            .filter(owner_id=owner_id, deleted_at__gte=since - timedelta(seconds=settings.SYNC_OVERLAP))
+            .values_list("kind", "object_id")
+        )
+        for kind, object_id in tombstones:
+            deleted[kind].append(object_id)
+
+    return {
+        "cursor": now.isoformat(),
+        "reset": reset,
+        "changes": changes,
+        "deleted": deleted,
+    }
@@ -0,0 +1,147 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient, APIRequestFactory
+
+from todo.authentication import (
+    SupabaseAuthentication, profile_cache, refresh_session, refreshed_sessions, unknown_kids,
+    verification_counts,
+)
+from todo.models import UserProfile
+from todo.stubs import StubSupabase
+
+
+@override_settings(SUPABASE_JWT_SECRET="test-secret", AUTH_VERIFY_LOCALLY=True, TASK_ENRICHMENT_ENABLED=False)
+class SupabaseAuthenticationTests(TestCase):
+    def setUp(self):
+        self.supabase = StubSupabase()
+        patcher = mock.patch("todo.supabase_client._client", self.supabase)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        profile_cache.clear()
+        verification_counts.clear()
+
+        self.client = APIClient()
+        self.client.post("/api/auth/register/", {"username": "ann", "email": "ann@example.com", "password": "secret1"})
+        resp = self.client.post("/api/auth/login/", {"email": "ann@example.com", "password": "secret1"})
+        self.token = resp.json()["access_token"]
+        self.profile = UserProfile.objects.get(username="ann")
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get("/api/tasks/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return SupabaseAuthentication().authenticate(request)
+
+    def test_valid_token_is_verified_locally(self):
+        resp = self.client.get("/api/tasks/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(verification_counts["local"], 1)
+        self.assertNotIn("remote", verification_counts)
+
+    def test_profile_lookup_is_cached(self):
+        self.assertEqual(self.authenticate(self.token)[0], self.profile)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(self.token)[0], self.profile)
+
+    def test_expired_or_tampered_tokens_are_rejected(self):
+        expired = jwt.encode(
+            {"sub": self.profile.supabase_uid, "aud": "authenticated", "exp": int(time.time()) - 10},
+            "test-secret", algorithm="HS256",
+        )
+        forged = jwt.encode(
+            {"sub": self.profile.supabase_uid, "aud": "authenticated", "exp": int(time.time()) + 60},
+            "wrong-secret", algorithm="HS256",
+        )
+        for token in (expired, forged):
+            resp = self.client.get("/api/tasks/", HTTP_AUTHORIZATION=f"Bearer {token}")
+            self.assertEqual(resp.status_code, 401)
+            self.assertIn("Bearer", resp["WWW-Authenticate"])
+        self.assertEqual(verification_counts["rejected"], 2)
+
+    @override_settings(AUTH_VERIFY_LOCALLY=False)
+    def test_falls_back_to_supabase(self):
+        self.assertEqual(self.authenticate(self.token)[0], self.profile)
+        self.assertEqual(verification_counts["remote"], 1)
+
+    def test_unknown_signing_key_is_rejected(self):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+        client = jwt.PyJWKClient("https://example.invalid/jwks.json")
+        token = jwt.encode(
+            {"sub": self.profile.supabase_uid, "aud": "authenticated", "exp": int(time.time()) + 60},
+            private_key, algorithm="RS256", headers={"kid": "rotated-away"},
+        )
+        unknown_kids.clear()
+        with mock.patch("todo.authentication._get_jwks_client", return_value=client), \
+             mock.patch.object(client, "fetch_data", return_value={"keys": [{**jwk, "kid": "current"}]}) as fetch:
+            for _ in range(2):
+                resp = self.client.get("/api/tasks/", HTTP_AUTHORIZATION=f"Bearer {token}")
+                self.assertEqual(resp.status_code, 401)
+        self.assertLessEqual(fetch.call_count, 2)  # the second request didn't fetch the key set again
+        self.assertEqual(verification_counts["rejected"], 2)
+
+    def test_unknown_user(self):
+        token = jwt.encode(
+            {"sub": "nobody", "aud": "authenticated", "exp": int(time.time()) + 60},
+            "test-secret", algorithm="HS256",
+        )
+        resp = self.client.get("/api/tasks/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(resp.status_code, 401)
+
+
+@override_settings(SUPABASE_JWT_SECRET="test-secret", AUTH_REFRESH_REUSE_SECONDS=10)
+class RefreshTests(TestCase):
+    def setUp(self):
+        self.supabase = StubSupabase()
+        patcher = mock.patch("todo.supabase_client._client", self.supabase)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        profile_cache.clear()
+        refreshed_sessions.clear()
+
+        self.client = APIClient()
+        self.client.post("/api/auth/register/", {"username": "ann", "email": "ann@example.com", "password": "secret1"})
+        resp = self.client.post("/api/auth/login/", {"email": "ann@example.com", "password": "secret1"})
+        self.refresh_token = resp.json()["refresh_token"]
+
+    def test_concurrent_refreshes_share_one_upstream_call(self):
+        upstream = self.supabase.auth.refresh_session
+        started = threading.Event()
+
+        def slow_refresh(token):
+            started.set()
+            time.sleep(0.1)  # long enough for the other callers to join the flight
+            return upstream(token)
+
+        with mock.patch.object(self.supabase.auth, "refresh_session", side_effect=slow_refresh) as spy, \
+             ThreadPoolExecutor(max_workers=4) as pool:
+            first = pool.submit(refresh_session, self.refresh_token)
+            started.wait()
+            others = [pool.submit(refresh_session, self.refresh_token) for _ in range(3)]
+            sessions = [first.result()] + [f.result() for f in others]
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual({s.access_token for s in sessions}, {sessions[0].access_token})
+
+    def test_repeat_refresh_reuses_the_session(self):
+        first = self.client.post("/api/auth/refresh/", {"refresh_token": self.refresh_token}).json()
+        # The stub, like GoTrue, would reject a second use of the token
+        second = self.client.post("/api/auth/refresh/", {"refresh_token": self.refresh_token}).json()
+        self.assertEqual(first["access_token"], second["access_token"])
+        self.assertEqual(second["user"]["username"], "ann")
+
+    def test_refresh_token_from_cookie(self):
+        self.client.cookies["refresh_token"] = self.refresh_token
+        resp = self.client.post("/api/auth/refresh/", {})
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("authToken", resp.cookies)
+
+    def test_invalid_refresh_token(self):
+        resp = self.client.post("/api/auth/refresh/", {"refresh_token": "nope"})
+        self.assertEqual(resp.status_code, 401)
+        self.assertEqual(resp.cookies["refresh_token"].value, "")
+        self.assertEqual(self.client.post("/api/auth/refresh/", {}).status_code, 400)
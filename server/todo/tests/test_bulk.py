@@ -0,0 +1,82 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from todo.models import Category, Task, Tombstone, UserProfile
+
+
+@override_settings(TASK_ENRICHMENT_ENABLED=False)
+class BulkTaskTests(TestCase):
+    """Bulk endpoints: a fixed number of queries per call, and only the caller's rows."""
+
+    def setUp(self):
+        self.user = UserProfile.objects.create(supabase_uid="u1", username="u1", email="u1@example.com")
+        self.other = UserProfile.objects.create(supabase_uid="u2", username="u2", email="u2@example.com")
+        self.work = Category.objects.create(owner=self.user, name="Work")
+        self.foreign_category = Category.objects.create(owner=self.other, name="Theirs")
+        self.foreign_task = Task.objects.create(owner=self.other, title="Not mine")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_tasks(self, n):
+        return [Task.objects.create(owner=self.user, title=f"Task {i}") for i in range(n)]
+
+    def test_create(self):
+        for n in (2, 20):
+            items = [{"title": f"New {i}", "category": self.work.pk} for i in range(n)]
+            # category lookup, bulk insert (in a savepoint)
+            with self.assertNumQueries(4):
+                resp = self.client.post("/api/tasks/bulk/", {"items": items}, format="json")
+            self.assertEqual(resp.status_code, 201)
+        self.assertEqual(Task.objects.filter(owner=self.user, category=self.work).count(), 22)
+
+    def test_update(self):
+        for n in (2, 20):
+            tasks = self.create_tasks(n)
+            items = [{"id": t.pk, "status": "completed", "category": self.work.pk} for t in tasks]
+            # category lookup, task lookup, bulk update (in a savepoint)
+            with self.assertNumQueries(5):
+                resp = self.client.patch("/api/tasks/bulk/", {"items": items}, format="json")
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(Task.objects.filter(pk__in=[t.pk for t in tasks], status="completed").count(), n)
+
+    def test_delete(self):
+        for n in (2, 20):
+            ids = [t.pk for t in self.create_tasks(n)]
+            # id lookup, the delete collector's select, job and task deletes, tombstones (in a savepoint)
+            with self.assertNumQueries(7):
+                resp = self.client.delete("/api/tasks/bulk/", {"ids": ids}, format="json")
+            self.assertEqual(resp.data, {"deleted": n})
+            self.assertEqual(Tombstone.objects.filter(object_id__in=ids).count(), n)
+
+    def test_foreign_category_is_rejected(self):
+        task = self.create_tasks(1)[0]
+        resp = self.client.post(
+            "/api/tasks/bulk/", {"items": [{"title": "A"}, {"title": "B", "category": self.foreign_category.pk}]},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data["errors"][0], {})
+        self.assertIn("category", resp.data["errors"][1])
+        resp = self.client.patch(
+            "/api/tasks/bulk/", {"items": [{"id": task.pk, "category": self.foreign_category.pk}]}, format="json"
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertFalse(Task.objects.filter(title__in=["A", "B"]).exists())
+
+    def test_foreign_task_ids_are_rejected(self):
+        task = self.create_tasks(1)[0]
+        resp = self.client.patch("/api/tasks/bulk/", {"items": [
+            {"id": task.pk, "title": "Renamed"},
+            {"id": self.foreign_task.pk, "title": "Taken over"},
+        ]}, format="json")
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data["errors"][1], {"id": ["Not found."]})
+        # Nothing is written when any item is invalid
+        self.assertEqual(Task.objects.get(pk=task.pk).title, "Task 0")
+        self.assertEqual(Task.objects.get(pk=self.foreign_task.pk).title, "Not mine")
+
+    def test_delete_skips_foreign_ids(self):
+        task = self.create_tasks(1)[0]
+        resp = self.client.delete("/api/tasks/bulk/", {"ids": [task.pk, self.foreign_task.pk]}, format="json")
+        self.assertEqual(resp.data, {"deleted": 1})
+        self.assertTrue(Task.objects.filter(pk=self.foreign_task.pk).exists())
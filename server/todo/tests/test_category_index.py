@@ -0,0 +1,84 @@
+import random
+import re
+
+from django.test import SimpleTestCase
+
+from todo.category_index import CategoryIndex
+
+NAMES = ["Work", "Home", "Home Office", "Office", "Car", "Cards", "Art", "he", "C++"]
+
+
+def old_match(names, text):
+    """The linear matcher CategoryIndex replaced: first name (in order) contained in the text."""
+    text = text.lower()
+    for name in names:
+        if name.lower() in text:
+            return name
+    return None
+
+
+def reference_match(names, text, word_boundary=True, prefer="longest"):
+    """Every occurrence of every name, filtered and ranked the way CategoryIndex documents."""
+    text = text.lower()
+    best = None
+    for idx, name in enumerate(names):
+        key = name.lower()
+        for m in re.finditer(f"(?=({re.escape(key)}))", text):
+            start, end = m.start(), m.start() + len(key)
+            if word_boundary:
+                before = text[start - 1] if start else " "
+                after = text[end] if end < len(text) else " "
+                if before.isalnum() or after.isalnum():
+                    continue
+            rank = (-len(key), start) if prefer == "longest" else (start, -len(key))
+            if best is None or rank < best[0]:
+                best = (rank, idx)
+    return names[best[1]] if best else None
+
+
+class CategoryIndexTests(SimpleTestCase):
+    def test_overlapping_names(self):
+        index = CategoryIndex(NAMES)
+        self.assertEqual(index.match("Set up the home office"), "Home Office")
+        self.assertEqual(index.match("office supplies for home"), "Office")  # longest wins
+        self.assertEqual(CategoryIndex(NAMES, prefer="first").match("office supplies for home"), "Office")
+        self.assertEqual(CategoryIndex(NAMES, prefer="first").match("home office"), "Home Office")
+        self.assertEqual(CategoryIndex(["Home", "Office"], prefer="first").match("home office"), "Home")
+
+    def test_case_folding(self):
+        index = CategoryIndex(["WORK", "Home"])
+        self.assertEqual(index.match("finish the wOrK report"), "WORK")
+        self.assertEqual(index.match("HOME"), "Home")
+
+    def test_word_boundaries(self):
+        index = CategoryIndex(NAMES)
+        self.assertIsNone(index.match("the artist's cardigan"))  # Art, Car, he inside words
+        self.assertEqual(index.match("wash the car."), "Car")
+        self.assertEqual(index.match("cards: birthday"), "Cards")
+        self.assertEqual(index.match("learn c++ templates"), "C++")
+        loose = CategoryIndex(NAMES, word_boundary=False)
+        self.assertEqual(loose.match("cardigan"), "Car")
+
+    def test_duplicate_and_blank_names(self):
+        index = CategoryIndex(["Work", "work ", "", "  "])
+        self.assertEqual(index.names, ["Work"])
+        self.assertEqual(index.match("work"), "Work")
+        self.assertIsNone(CategoryIndex([]).match("anything"))
+
+    def test_unknown_preference(self):
+        with self.assertRaises(ValueError):
+            CategoryIndex(NAMES, prefer="shortest")
+
+    def test_matches_linear_scan_on_random_text(self):
+        rng = random.Random(1234)
+        vocab = [n.lower() for n in NAMES] + ["the", "cardigan", "homework", "officer", "x", "-", ".", "  "]
+        for word_boundary in (True, False):
+            for prefer in ("longest", "first"):
+                index = CategoryIndex(NAMES, word_boundary=word_boundary, prefer=prefer)
+                for _ in range(300):
+                    text = " ".join(rng.choice(vocab) for _ in range(rng.randint(0, 8)))
+                    with self.subTest(text=text, word_boundary=word_boundary, prefer=prefer):
+                        self.assertEqual(index.match(text), reference_match(NAMES, text, word_boundary, prefer))
+                        if not word_boundary:
+                            # Finds a category exactly when the old substring scan did
+                            self.assertEqual(index.match(text) is None, old_match(NAMES, text) is None)
@@ -0,0 +1,91 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from todo import category_model
+from todo.category_model import CategoryClassifier, get_category_model, model_path
+from todo.models import Category, Task, UserProfile
+from todo.utils import suggest_categories
+
+TEXTS = [
+    "pay electricity bill", "pay rent and water bill", "renew car insurance bill",
+    "write quarterly report", "prepare sprint report slides", "review pull request for report",
+]
+CATEGORY_IDS = [1, 1, 1, 2, 2, 2]
+NAMES = ["Bills", "Bills", "Bills", "Work", "Work", "Work"]
+
+
+class CategoryClassifierTests(SimpleTestCase):
+    def setUp(self):
+        self.model = CategoryClassifier.fit(TEXTS, CATEGORY_IDS, NAMES)
+
+    def test_predicts_the_closest_category(self):
+        self.assertEqual(len(self.model), 2)
+        self.assertEqual(self.model.predict("pay the gas bill", min_score=0.1)[0], "Bills")
+        self.assertEqual(self.model.predict("Report for the sprint", min_score=0.1)[0], "Work")
+
+    def test_batch_matches_single_predictions(self):
+        texts = ["pay the gas bill", "sprint report", ""]
+        self.assertEqual(self.model.predict_batch(texts, 0.1), [self.model.predict(t, 0.1) for t in texts])
+
+    def test_unknown_words_score_nothing(self):
+        self.assertEqual(self.model.predict("walk the dog", min_score=0.1), (None, 0.0))
+        self.assertEqual(self.model.predict("", min_score=0.1), (None, 0.0))
+
+    def test_empty_model(self):
+        model = CategoryClassifier.fit([], [], [])
+        self.assertEqual(len(model), 0)
+        self.assertEqual(model.predict_batch(["pay bill", "report"]), [(None, 0.0), (None, 0.0)])
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "models", "owner_1.npz")
+            self.model.save(path)
+            loaded = CategoryClassifier.load(path)
+        self.assertEqual(loaded.predict_batch(TEXTS, 0.1), self.model.predict_batch(TEXTS, 0.1))
+
+    def test_numpy_is_not_imported_at_startup(self):
+        code = "import sys, django; django.setup(); import core.urls; print('numpy' in sys.modules)"
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": "core.settings"}
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(out.stdout.strip(), "False")
+
+
+@override_settings(TASK_ENRICHMENT_ENABLED=False)
+class TrainedModelTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(CATEGORY_MODEL_DIR=tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(category_model._models.clear)
+
+        self.user = UserProfile.objects.create(supabase_uid="u1", username="u1", email="u1@example.com")
+        categories = {}
+        for text, name in zip(TEXTS, NAMES):
+            if name not in categories:
+                categories[name] = Category.objects.create(owner=self.user, name=name)
+            Task.objects.create(owner=self.user, title=text, category=categories[name])
+
+    def test_unknown_owner_has_no_model(self):
+        self.assertIsNone(get_category_model(self.user.pk))
+        self.assertIsNone(get_category_model(12345))
+
+    def test_train_command_and_suggestions(self):
+        call_command("train_category_model", "--owner", "u1", stdout=io.StringIO())
+        self.assertTrue(os.path.exists(model_path(self.user.pk)))
+        self.assertEqual(len(get_category_model(self.user.pk)), 2)
+        with override_settings(CATEGORY_MODEL_MIN_SCORE=0.1):
+            self.assertEqual(
+                suggest_categories([("Pay the gas bill", ""), ("Walk the dog", "")], self.user.pk),
+                ["Bills", "Uncategorized"],
+            )
@@ -0,0 +1,22 @@
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from todo.management._owner import resolve_owner
+from todo.models import UserProfile
+
+
+class ResolveOwnerTests(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create(supabase_uid="uid-1", username="ann", email="ann@example.com")
+
+    def test_matches_uid_username_or_email(self):
+        for ident in ("uid-1", "ann", "ann@example.com"):
+            with self.subTest(ident=ident):
+                self.assertEqual(resolve_owner(ident), self.user)
+
+    def test_unknown_owner_stops_every_command(self):
+        with self.assertRaisesMessage(CommandError, "No user matches 'bob'"):
+            resolve_owner("bob")
+        for command in ("train_category_model", "rescore_priorities", "backfill_owners"):
+            with self.subTest(command=command), self.assertRaises(CommandError):
+                call_command(command, "--owner", "bob")
@@ -0,0 +1,51 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from todo.models import Category, Task, UserProfile
+from todo.sync import get_changes, parse_cursor
+
+
+@override_settings(TASK_ENRICHMENT_ENABLED=False)
+class TaskListETagTests(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create(supabase_uid="u1", username="u1", email="u1@example.com")
+        self.category = Category.objects.create(owner=self.user, name="Work")
+        self.task = Task.objects.create(owner=self.user, title="Report", category=self.category)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def get_list(self, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get("/api/tasks/", **headers)
+
+    def test_matching_etag_returns_304(self):
+        etag = self.get_list()["ETag"]
+        resp = self.get_list(etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp["ETag"], etag)
+
+    def test_task_edit_changes_etag(self):
+        etag = self.get_list()["ETag"]
+        self.client.patch(f"/api/tasks/{self.task.pk}/", {"status": "completed"}, format="json")
+        self.assertEqual(self.get_list(etag).status_code, 200)
+
+    def test_category_rename_changes_etag(self):
+        etag = self.get_list()["ETag"]
+        self.client.patch(f"/api/categories/{self.category.pk}/", {"name": "Office"}, format="json")
+        resp = self.get_list(etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["results"][0]["category"]["name"], "Office")
+
+    def test_category_rename_is_sent_by_delta_sync(self):
+        cursor = get_changes(self.user.pk)["cursor"]
+        with self.settings(SYNC_OVERLAP=0):
+            self.category.name = "Office"
+            self.category.save()
+            changes = get_changes(self.user.pk, parse_cursor(cursor))["changes"]
+        self.assertEqual([t["category"]["name"] for t in changes["tasks"]], ["Office"])
+
+    def test_usage_count_bump_leaves_tasks_alone(self):
+        before = Task.objects.get(pk=self.task.pk).updated_at
+        self.category.usage_count += 1
+        self.category.save(update_fields=["usage_count"])
+        self.assertEqual(Task.objects.get(pk=self.task.pk).updated_at, before)
@@ -0,0 +1,45 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from todo.db_router import ReplicaRouter, _use_replica, is_pinned
+from todo.models import Task, UserProfile
+
+
+@override_settings(TASK_ENRICHMENT_ENABLED=False)
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create(supabase_uid="u1", username="u1", email="u1@example.com")
+        self.client = APIClient(raise_request_exception=False)
+        self.client.force_authenticate(user=self.user)
+        patcher = mock.patch("todo.db_router.replica_configured", return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_list_reads_from_the_replica(self):
+        seen = []
+        original = ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            seen.append(original(router, model, **hints))
+            return None  # the test database has no replica alias
+
+        with mock.patch.object(ReplicaRouter, "db_for_read", spy):
+            self.client.get("/api/tasks/")
+        self.assertIn("replica", seen)
+        self.assertFalse(_use_replica.get())
+
+    def test_error_on_a_replica_read_does_not_leak_into_later_requests(self):
+        with mock.patch("todo.views.TaskViewSet.get_list_response", side_effect=RuntimeError("boom")):
+            self.assertEqual(self.client.get("/api/tasks/").status_code, 500)
+        self.assertFalse(_use_replica.get())
+        self.assertIsNone(ReplicaRouter().db_for_read(Task))
+
+    def test_import_pins_reads_to_the_primary(self):
+        self.addCleanup(cache.clear)
+        body = json.dumps({"title": "A"}).encode("utf-8")
+        self.client.post("/api/import/tasks.ndjson", body, content_type="application/octet-stream")
+        self.assertTrue(is_pinned(self.user.pk))
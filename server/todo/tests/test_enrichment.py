@@ -0,0 +1,135 @@
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from todo.enrichment import apply_suggestion, enqueue_enrichment, run_once
+from todo.models import EnrichmentJob, Task, UserProfile
+
+
+def suggestion(**overrides):
+    return {
+        "result": {
+            "priority_score": 0.8,
+            "suggested_deadline": "2030-01-15",
+            "enhanced_description": "Better description",
+            "suggested_category": "",
+            **overrides,
+        }
+    }
+
+
+@override_settings(TASK_ENRICHMENT_ENABLED=True)
+class EnrichmentQueueTests(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create(supabase_uid="u1", username="u1", email="u1@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_task(self, **fields):
+        task = Task.objects.create(owner=self.user, title="Write report", **fields)
+        enqueue_enrichment(task)
+        return task
+
+    def test_invalid_date_means_no_deadline(self):
+        task = Task(title="t", description="d", priority_score=1)
+        changed = apply_suggestion(task, suggestion(suggested_deadline="2023-02-30")["result"], {})
+        self.assertIsNone(task.deadline)
+        self.assertNotIn("deadline", changed)
+
+    def test_invalid_date_is_applied_without_crashing(self):
+        task = self.create_task()
+        with mock.patch("todo.enrichment.get_ai_task_suggestions_batch",
+                        return_value=[suggestion(suggested_deadline="2023-02-30")]):
+            self.assertEqual(run_once(), 1)
+        task.refresh_from_db()
+        self.assertEqual(task.enrichment_status, "done")
+        self.assertIsNone(task.deadline)
+        self.assertEqual(task.description, "Better description")
+
+    def test_failing_job_is_retried_and_does_not_stop_the_batch(self):
+        bad = self.create_task()
+        good = Task.objects.create(owner=self.user, title="Other")
+        enqueue_enrichment(good)
+        with mock.patch("todo.enrichment.apply_suggestion", side_effect=[RuntimeError("boom"), ["deadline"]]), \
+             mock.patch("todo.enrichment.get_ai_task_suggestions_batch", return_value=[suggestion(), suggestion()]), \
+             self.assertLogs("todo.enrichment", "ERROR"):
+            run_once()
+        bad_job = EnrichmentJob.objects.get(task=bad)
+        self.assertEqual((bad_job.status, bad_job.attempts, bad_job.last_error), ("pending", 1, "boom"))
+        self.assertIsNone(bad_job.locked_at)
+        self.assertEqual(EnrichmentJob.objects.get(task=good).status, "done")
+
+    def test_batch_call_failure_requeues_jobs(self):
+        task = self.create_task()
+        with mock.patch("todo.enrichment.get_ai_task_suggestions_batch", side_effect=RuntimeError("down")), \
+             self.assertLogs("todo.enrichment", "ERROR"):
+            self.assertEqual(run_once(), 1)
+        job = EnrichmentJob.objects.get(task=task)
+        self.assertEqual((job.status, job.attempts), ("pending", 1))
+
+    def test_edited_task_is_requeued(self):
+        task = self.create_task()
+        Task.objects.filter(pk=task.pk).update(title="Write the final report")
+        with mock.patch("todo.enrichment.get_ai_task_suggestions_batch", return_value=[suggestion()]):
+            run_once()
+        task.refresh_from_db()
+        self.assertEqual(task.description, "")  # stale output not applied
+        self.assertEqual(task.enrichment_status, "pending")
+        self.assertEqual(task.enrichment_jobs.filter(status="pending").count(), 1)
+
+        with mock.patch("todo.enrichment.get_ai_task_suggestions_batch", return_value=[suggestion()]):
+            run_once()
+        task.refresh_from_db()
+        self.assertEqual(task.enrichment_status, "done")
+        self.assertEqual(task.deadline, date(2030, 1, 15))
+
+    @override_settings(TASK_ENRICHMENT_ENABLED=False)
+    def test_edited_task_resets_status_when_enrichment_is_off(self):
+        task = self.create_task()
+        Task.objects.filter(pk=task.pk).update(title="Changed")
+        with mock.patch("todo.enrichment.get_ai_task_suggestions_batch", return_value=[suggestion()]):
+            run_once()
+        task.refresh_from_db()
+        self.assertEqual(task.enrichment_status, "none")
+
+    def test_update_queues_enrichment_when_title_changes(self):
+        task = self.create_task()
+        EnrichmentJob.objects.filter(task=task).update(status="done")
+        Task.objects.filter(pk=task.pk).update(enrichment_status="done")
+
+        resp = self.client.patch(f"/api/tasks/{task.pk}/", {"status": "in_progress"}, format="json")
+        self.assertEqual(resp.data["enrichment_status"], "done")
+        self.assertEqual(task.enrichment_jobs.count(), 1)
+
+        resp = self.client.patch(f"/api/tasks/{task.pk}/", {"title": "New title"}, format="json")
+        self.assertEqual(resp.data["enrichment_status"], "pending")
+        self.assertEqual(task.enrichment_jobs.filter(status="pending").count(), 1)
+
+    def test_editing_back_requeues_finished_job(self):
+        task = self.create_task()
+        EnrichmentJob.objects.filter(task=task).update(status="done", attempts=1)
+        job = enqueue_enrichment(task)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("pending", 0))
+
+    def test_bulk_update_queues_enrichment_for_changed_content(self):
+        renamed, moved, reverted = (self.create_task() for _ in range(3))
+        EnrichmentJob.objects.update(status="done")
+        Task.objects.update(enrichment_status="done")
+        # `reverted` is edited back to content it was already enriched for; that finished job is queued again
+        old_hash = EnrichmentJob.objects.get(task=reverted).input_hash
+        Task.objects.filter(pk=reverted.pk).update(title="Old title")
+
+        resp = self.client.patch("/api/tasks/bulk/", {"items": [
+            {"id": renamed.pk, "title": "New title"},
+            {"id": moved.pk, "status": "in_progress"},
+            {"id": reverted.pk, "title": "Write report"},
+        ]}, format="json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([t["enrichment_status"] for t in resp.data], ["pending", "done", "pending"])
+        self.assertEqual(renamed.enrichment_jobs.filter(status="pending").count(), 1)
+        self.assertFalse(moved.enrichment_jobs.filter(status="pending").exists())
+        self.assertEqual(reverted.enrichment_jobs.get().input_hash, old_hash)
+        self.assertEqual(reverted.enrichment_jobs.get().status, "pending")
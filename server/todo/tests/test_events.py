@@ -0,0 +1,117 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from todo.async_views import ChangeFeedView
+from todo.events import RESYNC, LocalBroker, Subscriber
+from todo.models import Task, UserProfile
+
+
+def parse_sse(chunk):
+    fields = dict(line.split(": ", 1) for line in chunk.decode("utf-8").strip().split("\n") if ": " in line)
+    if "data" in fields:
+        fields["data"] = json.loads(fields["data"])
+    return fields
+
+
+@override_settings(CHANGE_FEED_QUEUE_SIZE=2)
+class SubscriberTests(SimpleTestCase):
+    def test_slow_subscriber_is_switched_to_resync(self):
+        async def run():
+            subscriber = Subscriber(1)
+            for i in range(3):
+                subscriber.offer({"id": i})
+            subscriber.offer({"id": 3})  # dropped: the resync will cover it
+            return subscriber.overflows, await subscriber.get(1), await subscriber.get(0.01)
+
+        self.assertEqual(asyncio.run(run()), (1, RESYNC, None))
+
+    def test_broker_delivers_to_the_owner_only(self):
+        async def run():
+            broker = LocalBroker()
+            mine, theirs = broker.subscribe(1), broker.subscribe(2)
+            broker.publish(1, {"id": 7})
+            received = await mine.get(1), await theirs.get(0.01)
+            broker.unsubscribe(mine)
+            broker.unsubscribe(theirs)
+            return received, broker.wants(1), broker.stats()
+
+        received, wants, stats = asyncio.run(run())
+        self.assertEqual(received, ({"id": 7}, None))
+        self.assertFalse(wants)
+        self.assertEqual(stats["connections"], 0)
+
+
+@override_settings(CHANGE_FEED_ENABLED=True, TASK_ENRICHMENT_ENABLED=False)
+class PublishTests(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create(supabase_uid="u1", username="u1", email="u1@example.com")
+        self.broker = LocalBroker()
+        patcher = mock.patch("todo.events._broker", self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.published = []
+        self.broker.publish = lambda owner_id, event: self.published.append((owner_id, event))
+        self.broker._subscribers[self.user.pk] = set()  # someone is listening
+
+    def test_writes_publish_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            task = Task.objects.create(owner=self.user, title="A")
+            task_id = task.pk
+            self.assertEqual(self.published, [])
+        self.assertEqual(len(callbacks), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task.status = "completed"
+            task.save(update_fields=["status", "updated_at"])
+            task.delete()
+
+        ops = [(owner, e["kind"], e["op"], e["id"]) for owner, e in self.published]
+        self.assertEqual(ops, [
+            (self.user.pk, "tasks", "upsert", task_id),
+            (self.user.pk, "tasks", "patch", task_id),
+            (self.user.pk, "tasks", "delete", task_id),
+        ])
+        self.assertEqual(self.published[1][1]["data"], {"status": "completed", "updated_at": mock.ANY})
+
+    def test_nothing_is_published_without_listeners(self):
+        del self.broker._subscribers[self.user.pk]
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(owner=self.user, title="A")
+        self.assertEqual(self.published, [])
+
+
+@override_settings(CHANGE_FEED_HEARTBEAT=0.05, CHANGE_FEED_MAX_AGE=5, CHANGE_FEED_RETRY_MS=1000)
+class ChangeFeedStreamTests(SimpleTestCase):
+    def test_stream_sends_changes_and_heartbeats(self):
+        async def run():
+            broker = LocalBroker()
+            stream = ChangeFeedView().stream(broker, 1, None)
+            chunks = [await stream.__anext__()]
+            broker.publish(1, {"kind": "tasks", "op": "delete", "id": 7, "cursor": "c1"})
+            chunks.append(await stream.__anext__())
+            chunks.append(await stream.__anext__())
+            await stream.aclose()
+            return chunks, broker.connections()
+
+        (retry, change, ping), connections = asyncio.run(run())
+        self.assertEqual(retry, b"retry: 1000\n\n")
+        change = parse_sse(change)
+        self.assertEqual((change["event"], change["id"], change["data"]["id"]), ("change", "c1", 7))
+        self.assertEqual(ping, b": ping\n\n")
+        self.assertEqual(connections, 0)  # closing the stream unsubscribes
+
+
+@override_settings(CHANGE_FEED_ENABLED=True)
+class ChangeFeedViewTests(TestCase):
+    def test_requires_authentication(self):
+        self.assertEqual(APIClient().get("/api/changes/").status_code, 401)
+
+    def test_needs_asgi(self):
+        user = UserProfile.objects.create(supabase_uid="u1", username="u1", email="u1@example.com")
+        with mock.patch("todo.async_views.CookieTokenAuthentication.aauthenticate", return_value=(user, "t")):
+            resp = APIClient().get("/api/changes/")
+        self.assertEqual(resp.status_code, 503)
@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from todo import hf_client
+from todo.hf_http import (
+    ConcurrencyLimiter,
+    HuggingFaceClient,
+    HuggingFaceError,
+    HuggingFaceOverloaded,
+    HuggingFaceRateLimited,
+)
+from todo.suggestion_cache import MemorySuggestionCache
+
+GOOD_REPLY = "Priority: 7\nDeadline: 2030-01-15\nDescription: Pay the rent\nCategory: Home"
+
+
+class CoalescingTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch("todo.hf_client.get_suggestion_cache", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_identical_calls_share_one_upstream_call(self):
+        started = threading.Event()
+
+        def slow_request(prompt, owner_id=None):
+            started.set()
+            time.sleep(0.1)
+            return "Priority: 5"
+
+        with mock.patch("todo.hf_client.request_suggestion", side_effect=slow_request) as spy, \
+             ThreadPoolExecutor(max_workers=4) as pool:
+            first = pool.submit(hf_client.get_ai_task_suggestions_with_status, "Pay rent", "")
+            started.wait()
+            others = [pool.submit(hf_client.get_ai_task_suggestions_with_status, "Pay rent", "") for _ in range(3)]
+            results = [first.result()] + [f.result() for f in others]
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(results, [("Priority: 5", "BYPASS")] * 4)
+
+    def test_different_prompts_are_not_coalesced(self):
+        with mock.patch("todo.hf_client.request_suggestion", return_value="x") as spy:
+            hf_client.get_ai_task_suggestions_with_status("A", "")
+            hf_client.get_ai_task_suggestions_with_status("B", "")
+        self.assertEqual(spy.call_count, 2)
+
+    def test_joined_call_rate_limited_for_another_user_is_retried(self):
+        started, release = threading.Event(), threading.Event()
+
+        def leader_fetch():
+            started.set()
+            release.wait()
+            raise HuggingFaceRateLimited("over limit", key=1)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(hf_client._coalesce, "k", 1, leader_fetch)
+            started.wait()
+            follower = pool.submit(hf_client._coalesce, "k", 2, lambda: "own result")
+            time.sleep(0.05)  # let the follower join the flight
+            release.set()
+            with self.assertRaises(HuggingFaceRateLimited):
+                leader.result()
+            self.assertEqual(follower.result(), "own result")
+
+    def test_async_identical_calls_share_one_upstream_call(self):
+        calls = []
+
+        async def slow_request(prompt, owner_id=None):
+            calls.append(prompt)
+            await asyncio.sleep(0.05)
+            return "Priority: 5"
+
+        async def run():
+            return await asyncio.gather(*[
+                hf_client.aget_ai_task_suggestions_with_status("Pay rent", "") for _ in range(4)
+            ])
+
+        with mock.patch("todo.hf_client.arequest_suggestion", side_effect=slow_request):
+            results = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [("Priority: 5", "BYPASS")] * 4)
+
+
+class ConcurrencyLimiterTests(SimpleTestCase):
+    def test_queued_caller_gets_the_freed_slot(self):
+        limiter = ConcurrencyLimiter(max_active=1, queue_size=1, queue_timeout=5)
+        limiter.acquire()
+        waiter = threading.Thread(target=limiter.acquire)
+        waiter.start()
+        while limiter.stats()["queued"] == 0:
+            time.sleep(0.01)
+        limiter.release()
+        waiter.join(1)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(limiter.stats(), {"active": 1, "queued": 0, "rejected": {}})
+
+    def test_full_queue_sheds_at_once(self):
+        limiter = ConcurrencyLimiter(max_active=1, queue_size=0)
+        limiter.acquire()
+        with self.assertRaises(HuggingFaceOverloaded):
+            limiter.acquire()
+        self.assertEqual(limiter.stats()["rejected"], {"queue_full": 1})
+
+    def test_queue_timeout(self):
+        limiter = ConcurrencyLimiter(max_active=1, queue_size=1, queue_timeout=0.05)
+        limiter.acquire()
+        with self.assertRaises(HuggingFaceOverloaded):
+            limiter.acquire()
+        self.assertEqual(limiter.stats(), {"active": 1, "queued": 0, "rejected": {"timeout": 1}})
+
+    def test_per_user_limits(self):
+        limiter = ConcurrencyLimiter(max_active=10, per_key_active=1, per_key_pending=0)
+        limiter.acquire("ann")
+        with self.assertRaises(HuggingFaceRateLimited) as cm:
+            limiter.acquire("ann")
+        self.assertEqual(cm.exception.key, "ann")
+        limiter.acquire("bob")  # other users are unaffected
+        self.assertEqual(limiter.stats()["active"], 2)
+
+
+class RetryTests(SimpleTestCase):
+    def make_client(self, **kwargs):
+        return HuggingFaceClient("http://hf.test/model", "key", **kwargs)
+
+    def loading(self, estimated_time):
+        return mock.Mock(status_code=503, text="loading", json=lambda: {"estimated_time": estimated_time})
+
+    def test_model_loading_wait_is_never_shortened(self):
+        client = self.make_client(backoff_max=100)
+        for _ in range(50):
+            delay = client._backoff(0, 503, lambda: {"estimated_time": 10})
+            self.assertGreaterEqual(delay, 10)
+            self.assertLessEqual(delay, 15)
+        self.assertEqual(self.make_client(backoff_max=12)._backoff(0, 503, lambda: {"estimated_time": 20}), 12)
+
+    def test_retries_stop_at_the_total_deadline(self):
+        client = self.make_client(max_retries=5, backoff_max=100, total_deadline=20)
+        clock = [1000.0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        with mock.patch.object(client.session, "post", return_value=self.loading(10)) as post, \
+                mock.patch("todo.hf_http.time.monotonic", side_effect=lambda: clock[0]), \
+                mock.patch("todo.hf_http.time.sleep", side_effect=sleep):
+            with self.assertRaises(HuggingFaceError):
+                client.post({})
+        # The first wait (10-15s) fits in 20s; a second one would not
+        self.assertEqual(post.call_count, 2)
+
+
+class SuggestionCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = MemorySuggestionCache(maxsize=10, ttl=60)
+        patcher = mock.patch("todo.hf_client.get_suggestion_cache", return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_parseable_reply_is_cached(self):
+        with mock.patch("todo.hf_client.request_suggestion", return_value=GOOD_REPLY) as spy:
+            self.assertEqual(hf_client.get_ai_task_suggestions_with_status("Pay rent", "")[1], "MISS")
+            self.assertEqual(hf_client.get_ai_task_suggestions_with_status("Pay rent", "")[1], "HIT")
+        self.assertEqual(spy.call_count, 1)
+
+    def test_unparseable_reply_is_not_cached(self):
+        with mock.patch("todo.hf_client.request_suggestion", side_effect=["I don't know", GOOD_REPLY]) as spy:
+            first, _ = hf_client.get_ai_task_suggestions_with_status("Pay rent", "")
+            second, status = hf_client.get_ai_task_suggestions_with_status("Pay rent", "")
+        self.assertEqual(spy.call_count, 2)
+        self.assertEqual((first, second, status), ("I don't know", GOOD_REPLY, "MISS"))
+
+    def test_async_unparseable_reply_is_not_cached(self):
+        async def reply(prompt, owner_id=None):
+            return "Priority: high"
+
+        with mock.patch("todo.hf_client.arequest_suggestion", side_effect=reply):
+            asyncio.run(hf_client.aget_ai_task_suggestions_with_status("Pay rent", ""))
+        self.assertEqual(self.cache.stats()["size"], 0)
@@ -0,0 +1,119 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from todo.ingest import Ingestor, parse_email, parse_whatsapp
+from todo.models import ContextEntry, UserProfile
+
+WHATSAPP = """\
+12/01/2024, 09:15 - Messages and calls are end-to-end encrypted.
+12/01/2024, 09:16 - Ann: Can you send the report
+by Friday?
+12/01/2024, 09:17 - Bob: <Media omitted>
+[12/01/2024, 09:18:07] Bob: Sure, Thursday at the latest
+12/01/2024, 09:16 - Ann: Can you send the report
+by Friday?
+"""
+
+MBOX = b"""\
+From ann@example.com Fri Jan 12 09:00:00 2024
+Subject: Report
+From: Ann <ann@example.com>
+Date: Fri, 12 Jan 2024 09:00:00 +0000
+Content-Type: text/plain
+
+Please send the report.
+>From the team, thanks.
+From bob@example.com Fri Jan 12 10:00:00 2024
+Subject: Re: Report
+From: Bob <bob@example.com>
+Content-Type: text/html
+
+<p>On it &amp; nearly done.</p>
+"""
+
+
+def lines(text):
+    return (text.encode("utf-8") if isinstance(text, str) else text).splitlines(keepends=True)
+
+
+class ParserTests(SimpleTestCase):
+    def test_whatsapp(self):
+        self.assertEqual(list(parse_whatsapp(lines(WHATSAPP))), [
+            "[12/01/2024 09:16] Ann: Can you send the report\nby Friday?",
+            "[12/01/2024 09:18:07] Bob: Sure, Thursday at the latest",
+            "[12/01/2024 09:16] Ann: Can you send the report\nby Friday?",
+        ])
+
+    def test_mbox(self):
+        first, second = parse_email(lines(MBOX))
+        self.assertEqual(
+            first,
+            "Subject: Report\nFrom: Ann <ann@example.com>\nDate: Fri, 12 Jan 2024 09:00:00 +0000\n\n"
+            "Please send the report.\nFrom the team, thanks.",
+        )
+        self.assertEqual(second, "Subject: Re: Report\nFrom: Bob <bob@example.com>\n\nOn it & nearly done.")
+
+    def test_whatsapp_placeholders_only_match_whole_messages(self):
+        chat = "\n".join(f"12/01/2024, 09:{i:02d} - Ann: {text}" for i, text in enumerate([
+            "image omitted",
+            "\u200eGIF omitted",
+            "<attached: 00000012-PHOTO-2024-01-12.jpg>",
+            "That step can be omitted",
+            "document omitted from the report",
+            "null",
+        ]))
+        self.assertEqual([c.split(": ", 1)[1] for c in parse_whatsapp(lines(chat))], [
+            "That step can be omitted",
+            "document omitted from the report",
+            "null",
+        ])
+
+    @override_settings(CONTEXT_INGEST_MAX_CHARS=20)
+    def test_long_messages_are_clipped(self):
+        self.assertEqual(len(next(parse_whatsapp(lines("12/01/2024, 09:16 - Ann: " + "x" * 100)))), 20)
+
+
+@override_settings(CONTEXT_INGEST_BATCH_SIZE=2)
+class IngestorTests(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create(supabase_uid="u1", username="u1", email="u1@example.com")
+
+    def test_duplicates_in_the_upload_are_skipped(self):
+        report = Ingestor(self.user, "whatsapp").run(lines(WHATSAPP))
+        self.assertEqual(report, {"parsed": 3, "created": 2, "duplicates": 1})
+
+    def test_uploading_again_creates_nothing(self):
+        Ingestor(self.user, "whatsapp").run(lines(WHATSAPP))
+        report = Ingestor(self.user, "whatsapp").run(lines(WHATSAPP))
+        self.assertEqual(report, {"parsed": 3, "created": 0, "duplicates": 3})
+        self.assertEqual(ContextEntry.objects.filter(owner=self.user).count(), 2)
+
+    def test_dedupe_matches_entries_saved_elsewhere_and_is_per_owner(self):
+        ContextEntry.objects.create(
+            owner=self.user, source_type="whatsapp",
+            content="[12/01/2024 09:18:07]   Bob: Sure, Thursday at the latest",  # whitespace differs
+        )
+        other = UserProfile.objects.create(supabase_uid="u2", username="u2", email="u2@example.com")
+        self.assertEqual(Ingestor(self.user, "whatsapp").run(lines(WHATSAPP))["created"], 1)
+        self.assertEqual(Ingestor(other, "whatsapp").run(lines(WHATSAPP))["created"], 2)
+
+
+class IngestEndpointTests(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create(supabase_uid="u1", username="u1", email="u1@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_raw_body(self):
+        resp = self.client.post("/api/contexts/ingest/email/", MBOX, content_type="application/mbox")
+        self.assertEqual(resp.json(), {"parsed": 2, "created": 2, "duplicates": 0})
+        self.assertEqual(set(ContextEntry.objects.values_list("source_type", flat=True)), {"email"})
+
+    def test_multipart_file(self):
+        upload = SimpleUploadedFile("chat.txt", WHATSAPP.encode("utf-8"))
+        resp = self.client.post("/api/contexts/ingest/whatsapp/", {"file": upload}, format="multipart")
+        self.assertEqual(resp.json()["created"], 2)
+
+    def test_unknown_source(self):
+        self.assertEqual(self.client.post("/api/contexts/ingest/sms/", b"", content_type="text/plain").status_code, 404)
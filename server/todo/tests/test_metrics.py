@@ -0,0 +1,28 @@
+from django.test import SimpleTestCase, override_settings
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsAccessTests(SimpleTestCase):
+    def get(self, token=None):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        return self.client.get("/metrics", **headers)
+
+    @override_settings(METRICS_TOKEN="s3cret", DEBUG=False)
+    def test_token_is_required_when_set(self):
+        self.assertEqual(self.get().status_code, 401)
+        self.assertEqual(self.get("wrong").status_code, 401)
+        resp = self.get("s3cret")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp["Content-Type"].startswith("text/plain"))
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=False)
+    def test_no_token_in_production_disables_the_endpoint(self):
+        self.assertEqual(self.get().status_code, 404)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=True)
+    def test_no_token_in_debug_is_open(self):
+        self.assertEqual(self.get().status_code, 200)
+
+    @override_settings(METRICS_ENABLED=False, METRICS_TOKEN="s3cret")
+    def test_disabled(self):
+        self.assertEqual(self.get("s3cret").status_code, 404)
@@ -0,0 +1,55 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from todo.models import Category, ContextEntry, Task, UserProfile
+
+
+@override_settings(TASK_ENRICHMENT_ENABLED=False)
+class OwnershipTests(TestCase):
+    """Another user's rows are invisible: 404, never 403 (which would confirm they exist)."""
+
+    def setUp(self):
+        self.user = UserProfile.objects.create(supabase_uid="u1", username="u1", email="u1@example.com")
+        other = UserProfile.objects.create(supabase_uid="u2", username="u2", email="u2@example.com")
+        self.foreign_category = Category.objects.create(owner=other, name="Theirs")
+        self.foreign_task = Task.objects.create(owner=other, title="Not mine", category=self.foreign_category)
+        self.foreign_context = ContextEntry.objects.create(owner=other, content="secret", source_type="note")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_foreign_task_is_not_found(self):
+        url = f"/api/tasks/{self.foreign_task.pk}/"
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.put(url, {"title": "Taken over"}, format="json").status_code, 404)
+        self.assertEqual(self.client.patch(url, {"title": "Taken over"}, format="json").status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.foreign_task.refresh_from_db()
+        self.assertEqual(self.foreign_task.title, "Not mine")
+
+    def test_foreign_category_and_context_are_not_found(self):
+        for url in (f"/api/categories/{self.foreign_category.pk}/", f"/api/contexts/{self.foreign_context.pk}/"):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+                self.assertEqual(self.client.delete(url).status_code, 404)
+        self.assertTrue(Category.objects.filter(pk=self.foreign_category.pk).exists())
+
+    def test_foreign_category_cannot_be_assigned(self):
+        resp = self.client.post("/api/tasks/", {"title": "Mine", "category": self.foreign_category.pk}, format="json")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("category", resp.data)
+
+        task = Task.objects.create(owner=self.user, title="Mine")
+        resp = self.client.patch(f"/api/tasks/{task.pk}/", {"category": self.foreign_category.pk}, format="json")
+        self.assertEqual(resp.status_code, 400)
+        task.refresh_from_db()
+        self.assertIsNone(task.category)
+
+    def test_lists_show_only_own_rows(self):
+        Task.objects.create(owner=self.user, title="Mine")
+        for url in ("/api/tasks/", "/api/categories/", "/api/contexts/"):
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                rows = data["results"] if isinstance(data, dict) else data
+                self.assertNotIn(self.foreign_task.title, [r.get("title") for r in rows])
+                self.assertNotIn(self.foreign_category.name, [r.get("name") for r in rows])
+                self.assertNotIn(self.foreign_context.content, [r.get("content") for r in rows])
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from todo.models import Task, UserProfile
+from todo.priority import FIELDS, rescore, score_chunk, write_scores
+
+
+@override_settings(TASK_ENRICHMENT_ENABLED=False)
+class RescoreTests(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create(supabase_uid="u1", username="u1", email="u1@example.com")
+        self.task = Task.objects.create(
+            owner=self.user, title="Due soon", priority_score=4,
+            deadline=timezone.localdate() + timedelta(days=1),
+        )
+
+    def test_rescore_writes_changed_scores(self):
+        self.assertEqual(rescore(), (1, 1))
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.base_priority, 4)
+        self.assertNotEqual(self.task.priority_score, 4)
+        self.assertIsNotNone(self.task.priority_scored_at)
+
+    def test_edit_between_read_and_write_is_kept(self):
+        rows = list(Task.objects.order_by("id").values_list(*FIELDS))
+        updates = score_chunk(rows, {}, timezone.now())
+        # The user edits the task after the scorer read it
+        task = Task.objects.get(pk=self.task.pk)
+        task.priority_score = task.base_priority = 9
+        task.save()
+
+        self.assertEqual(write_scores(updates), 0)
+        task.refresh_from_db()
+        self.assertEqual((task.priority_score, task.base_priority), (9, 9))
+        self.assertIsNone(task.priority_scored_at)
+
+
+@override_settings(TASK_ENRICHMENT_ENABLED=False)
+class EditRescoreTests(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create(supabase_uid="u1", username="u1", email="u1@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        deadline = (timezone.localdate() + timedelta(days=3)).isoformat()
+        self.task_id = self.client.post(
+            "/api/tasks/", {"title": "Due soon", "description": "", "priority_score": 4, "deadline": deadline},
+            format="json",
+        ).json()["id"]
+
+    def edit(self, **changes):
+        # As the edit form does: PUT every field back, including the re-scored priority
+        task = self.client.get(f"/api/tasks/{self.task_id}/").json()
+        body = {k: task[k] for k in ("title", "description", "priority_score", "deadline", "status")}
+        self.client.put(f"/api/tasks/{self.task_id}/", {**body, **changes}, format="json")
+
+    def test_edit_and_rescore_is_stable(self):
+        rescore()
+        first = Task.objects.get(pk=self.task_id).priority_score
+        for _ in range(3):
+            self.edit(description="more detail")
+            rescore()
+            task = Task.objects.get(pk=self.task_id)
+            self.assertEqual(task.base_priority, 4)
+            self.assertEqual(task.priority_score, first)
+
+    def test_new_priority_becomes_the_base(self):
+        rescore()
+        self.edit(priority_score=9)
+        self.assertEqual(Task.objects.get(pk=self.task_id).base_priority, 9)
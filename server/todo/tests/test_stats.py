@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from todo.models import Category, Task, UserProfile
+from todo.stats import get_task_stats
+
+
+@override_settings(TASK_ENRICHMENT_ENABLED=False)
+class TaskStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = UserProfile.objects.create(supabase_uid="u1", username="u1", email="u1@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def stats(self):
+        return self.client.get("/api/tasks/stats/").json()
+
+    def test_counts(self):
+        work = Category.objects.create(owner=self.user, name="Work")
+        yesterday = timezone.localdate() - timedelta(days=1)
+        Task.objects.create(owner=self.user, title="a", category=work, deadline=yesterday)
+        Task.objects.create(owner=self.user, title="b", status="completed", deadline=yesterday)
+        Task.objects.create(owner=self.user, title="c", status="in_progress")
+        stats = self.stats()
+        self.assertEqual(
+            {k: stats[k] for k in ("total", "pending", "in_progress", "completed", "overdue")},
+            {"total": 3, "pending": 1, "in_progress": 1, "completed": 1, "overdue": 1},
+        )
+        self.assertEqual({c["name"]: c["total"] for c in stats["categories"]}, {"Work": 1, "Uncategorized": 2})
+
+    def test_cached_until_a_task_changes(self):
+        self.assertEqual(self.stats()["total"], 0)
+        with self.assertNumQueries(0):
+            get_task_stats(self.user.pk)
+
+        self.client.post("/api/tasks/", {"title": "New", "description": ""}, format="json")
+        self.assertEqual(self.stats()["total"], 1)
+        self.client.post("/api/tasks/bulk/", {"items": [{"title": "x"}, {"title": "y"}]}, format="json")
+        self.assertEqual(self.stats()["total"], 3)
+
+    def test_invalidation_goes_through_the_shared_cache(self):
+        self.stats()
+        self.assertIsNotNone(cache.get(f"task-stats:{self.user.pk}"))
+        Task.objects.create(owner=self.user, title="a")
+        self.assertIsNone(cache.get(f"task-stats:{self.user.pk}"))
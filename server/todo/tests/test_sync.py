@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from todo.models import Category, ContextEntry, Task, Tombstone, UserProfile
+
+
+@override_settings(TASK_ENRICHMENT_ENABLED=False, SYNC_OVERLAP=0)
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create(supabase_uid="u1", username="u1", email="u1@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def sync(self, since=None):
+        resp = self.client.get("/api/sync/", {"since": since} if since else {})
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_first_sync_is_a_full_snapshot(self):
+        Task.objects.create(owner=self.user, title="A")
+        ContextEntry.objects.create(owner=self.user, content="note", source_type="note")
+        data = self.sync()
+        self.assertTrue(data["reset"])
+        self.assertEqual(len(data["changes"]["tasks"]), 1)
+        self.assertEqual(len(data["changes"]["contexts"]), 1)
+
+    def test_changes_and_deletions_since_cursor(self):
+        kept = Task.objects.create(owner=self.user, title="Kept")
+        gone = Task.objects.create(owner=self.user, title="Gone")
+        category = Category.objects.create(owner=self.user, name="Old")
+        cursor = self.sync()["cursor"]
+
+        kept.status = "completed"
+        kept.save()
+        self.client.delete(f"/api/tasks/{gone.pk}/")
+        self.client.delete(f"/api/categories/{category.pk}/")
+
+        data = self.sync(cursor)
+        self.assertFalse(data["reset"])
+        self.assertEqual([t["id"] for t in data["changes"]["tasks"]], [kept.pk])
+        self.assertEqual(data["deleted"], {"tasks": [gone.pk], "categories": [category.pk], "contexts": []})
+
+    def test_bulk_delete_writes_tombstones(self):
+        ids = [Task.objects.create(owner=self.user, title=str(i)).pk for i in range(3)]
+        cursor = self.sync()["cursor"]
+        resp = self.client.delete("/api/tasks/bulk/", {"ids": ids}, format="json")
+        self.assertEqual(resp.json(), {"deleted": 3})
+        self.assertEqual(sorted(self.sync(cursor)["deleted"]["tasks"]), ids)
+
+    def test_tombstones_hold_bigint_ids(self):
+        big = 2 ** 40
+        Tombstone.objects.create(owner=self.user, kind="tasks", object_id=big)
+        self.assertEqual(Tombstone.objects.get().object_id, big)
+
+    @override_settings(SYNC_TOMBSTONE_DAYS=1)
+    def test_cursor_older_than_retention_resets(self):
+        since = (timezone.now() - timedelta(days=2)).isoformat()
+        self.assertTrue(self.sync(since)["reset"])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get("/api/sync/", {"since": "yesterday"}).status_code, 400)
+
+    def test_other_users_rows_are_not_synced(self):
+        other = UserProfile.objects.create(supabase_uid="u2", username="u2", email="u2@example.com")
+        Task.objects.create(owner=other, title="Theirs")
+        self.assertEqual(self.sync()["changes"]["tasks"], [])
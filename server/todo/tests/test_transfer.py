@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from todo.models import Category, ContextEntry, Task, UserProfile
+
+
+@override_settings(TASK_ENRICHMENT_ENABLED=False, TRANSFER_CHUNK_SIZE=2)
+class TransferTests(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create(supabase_uid="u1", username="u1", email="u1@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def export(self, path):
+        resp = self.client.get(f"/api/export/{path}")
+        self.assertEqual(resp.status_code, 200)
+        return b"".join(resp.streaming_content).decode("utf-8")
+
+    def import_(self, path, body):
+        return self.client.post(f"/api/import/{path}", body.encode("utf-8"), content_type="application/octet-stream")
+
+    def test_export_ndjson_and_csv(self):
+        work = Category.objects.create(owner=self.user, name="Work")
+        for i in range(3):
+            Task.objects.create(owner=self.user, title=f"Task {i}", category=work if i else None)
+        other = UserProfile.objects.create(supabase_uid="u2", username="u2", email="u2@example.com")
+        Task.objects.create(owner=other, title="Not mine")
+
+        records = [json.loads(line) for line in self.export("tasks.ndjson").splitlines()]
+        self.assertEqual([r["title"] for r in records], ["Task 0", "Task 1", "Task 2"])
+        self.assertEqual([r["category"] for r in records], [None, "Work", "Work"])
+
+        rows = list(csv.DictReader(io.StringIO(self.export("tasks.csv"))))
+        self.assertEqual([r["title"] for r in rows], ["Task 0", "Task 1", "Task 2"])
+
+    def test_unknown_kind_or_format(self):
+        self.assertEqual(self.client.get("/api/export/users.ndjson").status_code, 404)
+        self.assertEqual(self.client.get("/api/export/tasks.xml").status_code, 404)
+
+    def test_import_round_trip(self):
+        Category.objects.create(owner=self.user, name="Work")
+        body = "\n".join([
+            json.dumps({"title": "A", "category": "work", "priority_score": 3}),
+            json.dumps({"title": "B", "category": {"id": 99, "name": "Home"}, "deadline": "2030-01-01"}),
+            json.dumps({"title": "C"}),
+            "not json",
+            json.dumps({"title": "D", "status": "bogus"}),
+        ])
+        report = self.import_("tasks.ndjson", body).json()
+        self.assertEqual((report["created"], report["skipped"]), (3, 2))
+        self.assertEqual([e["line"] for e in report["errors"]], [4, 5])
+
+        tasks = {t.title: t for t in Task.objects.filter(owner=self.user).select_related("category")}
+        self.assertEqual(tasks["A"].category.name, "Work")  # matched case-insensitively
+        self.assertEqual((tasks["A"].priority_score, tasks["A"].base_priority), (3, 3))
+        self.assertEqual(tasks["B"].category.name, "Home")  # created
+        self.assertIsNone(tasks["C"].category)
+        self.assertEqual(Category.objects.filter(owner=self.user).count(), 2)
+
+    def test_import_csv_contexts(self):
+        body = "content,source_type\nhello,note\nbye,fax\n"
+        report = self.import_("contexts.csv", body).json()
+        self.assertEqual((report["created"], report["skipped"]), (1, 1))
+        entry = ContextEntry.objects.get(owner=self.user)
+        self.assertEqual(entry.content_hash, ContextEntry.hash_content("hello", "note"))
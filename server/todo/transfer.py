@@ -0,0 +1,254 @@
+"""
+Bulk export and import of a user's tasks and contexts, as NDJSON or CSV.
+
+Both directions stream: export reads rows in chunks of TRANSFER_CHUNK_SIZE and
+yields encoded chunks; import reads the upload line by line and writes every
+TRANSFER_CHUNK_SIZE rows with one bulk_create. Memory stays flat whatever the
+row count.
+
+Tasks carry their category by name. On import, names are resolved from a map
+of the owner's categories loaded once; names not in it are created in bulk as
+they are first seen.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections, transaction
+
+from .category_index import invalidate_category_index
+from .events import publish_resync
+from .models import Category, ContextEntry, Task
+from .serializers import _format_datetime
+from .stats import invalidate_task_stats
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# kind -> (model, exported columns, queryset fields for them)
+KINDS = {
+    "tasks": (
+        Task,
+        ("id", "title", "description", "category", "priority_score", "deadline", "status", "created_at", "updated_at"),
+        ("id", "title", "description", "category__name", "priority_score", "deadline", "status",
+         "created_at", "updated_at"),
+    ),
+    "contexts": (
+        ContextEntry,
+        ("id", "content", "source_type", "created_at", "updated_at"),
+        ("id", "content", "source_type", "created_at", "updated_at"),
+    ),
+}
+
+# Columns an import reads (anything else, like id, is ignored)
+IMPORT_FIELDS = {
+    "tasks": ("title", "description", "priority_score", "deadline", "status"),
+    "contexts": ("content", "source_type"),
+}
+
+MAX_REPORTED_ERRORS = 100
+
+
+def _iter_values(queryset, fields):
+    chunk_size = settings.TRANSFER_CHUNK_SIZE
+    if not connections[queryset.db].settings_dict.get("DISABLE_SERVER_SIDE_CURSORS"):
+        # A server-side cursor on PostgreSQL, fetchmany() batches elsewhere
+        yield from queryset.order_by("id").values_list(*fields).iterator(chunk_size=chunk_size)
+        return
+    # Behind a transaction pooler psycopg2 would buffer the whole result set: page by id instead
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).order_by("id").values_list(*fields)[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return _format_datetime(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def export_chunks(owner_id, kind, fmt):
+    """Yield the owner's `kind` rows as encoded `fmt`, TRANSFER_CHUNK_SIZE rows per chunk."""
+    model, columns, fields = KINDS[kind]
+    rows = _iter_values(model.objects.filter(owner_id=owner_id), fields)
+    chunk_size = settings.TRANSFER_CHUNK_SIZE
+
+    buffer = io.StringIO()
+    if fmt == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+
+        def write(row):
+            writer.writerow(row)
+    else:
+        def write(row):
+            buffer.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+            buffer.write("\n")
+
+    n = 0
+    for row in rows:
+        write([_format_value(value) for value in row])
+        n += 1
+        if n % chunk_size == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def aiterate(chunks):
+    """
+    Serve a chunk generator from an ASGI response one chunk at a time
+    (Django reads synchronous iterators to the end before sending under ASGI).
+    Chunks are produced in the sync thread, on the same DB connection throughout.
+    """
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        # Closes the server-side cursor if the client went away mid-export
+        await sync_to_async(chunks.close)()
+
+
+def parse_records(lines, fmt):
+    """
+    (line number, record dict or None) for each line of text, read lazily.
+    None marks a line that isn't valid for the format.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield number, record if isinstance(record, dict) else None
+
+
+class Importer:
+    """Validates records and writes them for one owner, TRANSFER_CHUNK_SIZE rows at a time."""
+
+    def __init__(self, owner, kind):
+        self.owner = owner
+        self.kind = kind
+        self.model = KINDS[kind][0]
+        self.fields = [self.model._meta.get_field(name) for name in IMPORT_FIELDS[kind]]
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+        self.pending = []  # (instance, category name)
+        self.categories = None
+        self.new_categories = False
+
+    def load_categories(self):
+        # Case-insensitive, keeping the oldest category when names collide
+        self.categories = {}
+        for category in Category.objects.filter(owner=self.owner).order_by("-id"):
+            self.categories[category.name.casefold()] = category
+
+    def error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def clean(self, record):
+        values = {}
+        for field in self.fields:
+            value = record.get(field.name)
+            if value in (None, "") and (field.has_default() or field.blank):
+                continue  # optional: the model default
+            try:
+                values[field.name] = field.clean(value, None)
+            except ValidationError as e:
+                raise ValidationError(f"{field.name}: {' '.join(e.messages)}")
+        return values
+
+    def add(self, line, record):
+        if record is None:
+            self.error(line, f"Not a valid {self.kind[:-1]} record.")
+            return
+        try:
+            values = self.clean(record)
+        except ValidationError as e:
+            self.error(line, " ".join(e.messages))
+            return
+
+        category = None
+        if self.kind == "tasks":
+            # An explicit priority is the base re-scoring starts from, as in TaskSerializer
+            values["base_priority"] = values.get("priority_score")
+            category = record.get("category")
+            if isinstance(category, dict):
+                category = category.get("name")  # a task as the API returns it
+            category = str(category or "").strip()[:Category._meta.get_field("name").max_length] or None
+        instance = self.model(owner=self.owner, **values)
+        if self.kind == "contexts":
+            instance.content_hash = ContextEntry.hash_content(instance.content, instance.source_type)
+        self.pending.append((instance, category))
+        if len(self.pending) >= settings.TRANSFER_CHUNK_SIZE:
+            self.flush()
+
+    def resolve_categories(self):
+        if self.categories is None:
+            self.load_categories()
+        missing = {}
+        for _, name in self.pending:
+            if name and name.casefold() not in self.categories:
+                missing.setdefault(name.casefold(), name)
+        if missing:
+            for category in Category.objects.bulk_create(
+                [Category(owner=self.owner, name=name) for name in missing.values()]
+            ):
+                self.categories[category.name.casefold()] = category
+            self.new_categories = True
+        for instance, name in self.pending:
+            if name:
+                instance.category = self.categories[name.casefold()]
+
+    def flush(self):
+        if not self.pending:
+            return
+        with transaction.atomic():
+            if self.kind == "tasks":
+                self.resolve_categories()
+            self.model.objects.bulk_create([instance for instance, _ in self.pending])
+        self.created += len(self.pending)
+        self.pending = []
+
+    def run(self, records):
+        for line, record in records:
+            self.add(line, record)
+        self.flush()
+        self.finish()
+        return self.report()
+
+    def finish(self):
+        # bulk_create skips signals
+        if self.kind == "tasks":
+            invalidate_task_stats(self.owner.pk)
+        if self.new_categories:
+            invalidate_category_index(self.owner.pk)
+        if self.created:
+            publish_resync(self.owner.pk)
+
+    def report(self):
+        return {"created": self.created, "skipped": self.skipped, "errors": self.errors}
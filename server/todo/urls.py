@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.urls import path, include
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.routers import DefaultRouter
 from .views import (
     TaskViewSet,
@@ -6,10 +8,25 @@ from .views import (
     CategoryViewSet,
     RegisterView,
     LoginView,
+    RefreshView,
     ResetPasswordView,
     CategorizeView,
-    AISuggestionView
+    CategorizeBatchView,
+    AISuggestionView,
+    AISuggestionBatchView,
+    SyncView,
+    ExportView,
+    ImportView
 )
+from .async_views import AsyncAISuggestionView, AsyncCategorizeView, ChangeFeedView
+
+if settings.ASYNC_AI_VIEWS:
+    # Native async views for ASGI; token auth only, so no CSRF
+    categorize_view = csrf_exempt(AsyncCategorizeView.as_view())
+    ai_suggestion_view = csrf_exempt(AsyncAISuggestionView.as_view())
+else:
+    categorize_view = CategorizeView.as_view()
+    ai_suggestion_view = AISuggestionView.as_view()
 
 router = DefaultRouter()
 router.register(r'tasks',      TaskViewSet,        basename='tasks')
@@ -17,14 +34,27 @@ router.register(r'contexts',   ContextEntryViewSet,basename='contexts')
 router.register(r'categories', CategoryViewSet,    basename='categories')
 
 urlpatterns = [
-    path('', include(router.urls)),
-
     # Auth (public)
     path('auth/register/',       RegisterView.as_view(),       name='register'),
     path('auth/login/',          LoginView.as_view(),          name='login'),
+    path('auth/refresh/',        RefreshView.as_view(),        name='refresh'),
     path('auth/reset-password/', ResetPasswordView.as_view(),  name='reset-password'),
 
     # Smart categorize & AI (protected)
-    path('tasks/suggest-category/', CategorizeView.as_view(),    name='suggest-category'),
-    path('ai/suggestions/',          AISuggestionView.as_view(),  name='ai-suggestions'),
+    path('tasks/suggest-category/', categorize_view,    name='suggest-category'),
+    path('tasks/suggest-category/batch/', CategorizeBatchView.as_view(), name='suggest-category-batch'),
+    path('ai/suggestions/',          ai_suggestion_view, name='ai-suggestions'),
+    path('ai/suggestions/batch/',    AISuggestionBatchView.as_view(), name='ai-suggestions-batch'),
+
+    # Delta sync (protected)
+    path('sync/',                    SyncView.as_view(), name='sync'),
+    # Bulk export / import (protected)
+    path('export/<str:kind>.<str:fmt>', ExportView.as_view(), name='export'),
+    path('import/<str:kind>.<str:fmt>', ImportView.as_view(), name='import'),
+
+    # Live changes, Server-Sent Events (ASGI only)
+    path('changes/',                 ChangeFeedView.as_view(), name='changes'),
+
+    # Router last, so `tasks/<pk>/` doesn't swallow `tasks/suggest-category/`
+    path('', include(router.urls)),
 ]
@@ -1,11 +1,28 @@
-from .models import Category
-
-def suggest_category(title: str, description: str) -> str:
-    text = f"{title} {description}".lower()
-    # Pull all category names
-    for cat in Category.objects.all():
-        name = cat.name.lower()
-        if name in text:
-            return cat.name
+from .category_index import get_category_index
+from .category_model import get_category_model
+
+def suggest_category(title: str, description: str, owner_id=None) -> str:
+    return suggest_categories([(title, description)], owner_id)[0]
+
+def suggest_categories(items, owner_id=None):
+    """
+    Category name for each (title, description) pair. A category named in the text
+    wins; otherwise the owner's trained classifier decides; otherwise "Uncategorized".
+    """
+    index = get_category_index(owner_id)
+    texts = [f"{title} {description}" for title, description in items]
+    # Single pass over each text with the owner's precompiled category matcher
+    results = [index.match(text) for text in texts]
+
+    pending = [i for i, match in enumerate(results) if not match]
+    model = get_category_model(owner_id) if pending else None
+    if model is not None:
+        current = {name.lower() for name in index.names}
+        # Scored together in one matrix op
+        for i, (name, _) in zip(pending, model.predict_batch([texts[i] for i in pending])):
+            # Skip categories deleted or renamed since the model was trained
+            if name and name.strip().lower() in current:
+                results[i] = name
+
     # Fallback
-    return "Uncategorized"
\ No newline at end of file
+    return [match or "Uncategorized" for match in results]
@@ -1,28 +1,326 @@
+import codecs
+import csv
+import hashlib
+
 from django.conf import settings
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ParseError, ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
 from .models import Task, ContextEntry, Category, UserProfile
-from .serializers import TaskSerializer, ContextEntrySerializer, CategorySerializer, LoginSerializer, RegisterSerializer, ResetPasswordSerializer, CategorizeSerializer
-from .hf_client import get_ai_task_suggestions
-from .utils import suggest_category
-from .supabase_client import supabase
-from gotrue.errors import AuthApiError
-
-class TaskViewSet(viewsets.ModelViewSet):
-    queryset = Task.objects.all()   
+from .serializers import TaskSerializer, ContextEntrySerializer, CategorySerializer, LoginSerializer, RefreshSerializer, RegisterSerializer, ResetPasswordSerializer, CategorizeSerializer, CategorizeBatchSerializer, AISuggestionBatchSerializer, TaskBulkItemSerializer, TASK_ROW_FIELDS, serialize_task_rows
+from .hf_client import get_ai_task_suggestions_with_status, get_ai_task_suggestions_batch, parse_suggestion
+from .hf_http import HuggingFaceRateLimited, HuggingFaceUnavailable
+from .utils import suggest_category, suggest_categories
+from .enrichment import enqueue_enrichment, enqueue_enrichment_bulk, task_input_hash
+from .events import publish_deleted, publish_saved_bulk
+from .ingest import Ingestor
+from .pagination import TaskPagination
+from .stats import get_task_stats, invalidate_task_stats
+from .db_router import ReplicaReadMixin
+from .metrics import phase, render_metrics
+from .sync import InvalidCursor, get_changes, parse_cursor, record_deletions
+from .transfer import FORMATS, KINDS, Importer, aiterate, export_chunks, parse_records
+from . import supabase_client
+from .supabase_client import get_supabase
+from .authentication import get_cached_profile, refresh_session
+
+class OwnedQuerysetMixin:
+    """Scope the viewset to rows owned by request.user and stamp the owner on create."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(owner=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+
+class ConditionalListMixin:
+    """
+    ETag on list responses, from the row count and latest updated_at of the listed
+    queryset. A client sending a matching If-None-Match gets 304 and nothing is serialized.
+    """
+
+    def get_list_etag(self, queryset):
+        agg = queryset.order_by().aggregate(count=Count("id"), last=Max("updated_at"))
+        key = "|".join([
+            str(self.request.user.pk),
+            self.request.accepted_media_type or "",
+            self.request.get_full_path(),
+            str(agg["count"]),
+            agg["last"].isoformat() if agg["last"] else "",
+        ])
+        return quote_etag(hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_list_etag(self.filter_queryset(self.get_queryset()))
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = self.get_list_response(request, *args, **kwargs)
+        response["ETag"] = etag
+        # Always revalidate; responses are per user
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Authorization"])
+        return response
+
+    def get_list_response(self, request, *args, **kwargs):
+        with phase("serialize"):
+            return super().list(request, *args, **kwargs)
+
+class TaskViewSet(ReplicaReadMixin, OwnedQuerysetMixin, ConditionalListMixin, viewsets.ModelViewSet):
+    queryset = Task.objects.select_related('category')
     serializer_class = TaskSerializer
+    pagination_class = TaskPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != "list":
+            return queryset
+
+        params = self.request.query_params
+        # ?status=pending,in_progress
+        if params.get("status"):
+            queryset = queryset.filter(status__in=params["status"].split(","))
+        # ?category=<id> or ?category=none
+        category = params.get("category")
+        if category == "none":
+            queryset = queryset.filter(category__isnull=True)
+        elif category:
+            if not category.isdigit():
+                raise ValidationError({"category": "Must be a category id or 'none'."})
+            queryset = queryset.filter(category_id=int(category))
+        # ?deadline_after=YYYY-MM-DD&deadline_before=YYYY-MM-DD (inclusive)
+        for param, lookup in (("deadline_after", "deadline__gte"), ("deadline_before", "deadline__lte")):
+            if params.get(param):
+                value = parse_date(params[param])
+                if value is None:
+                    raise ValidationError({param: "Must be a date in YYYY-MM-DD format."})
+                queryset = queryset.filter(**{lookup: value})
+        return queryset
+
+    def get_list_response(self, request, *args, **kwargs):
+        if not settings.TASK_FAST_LIST:
+            return super().get_list_response(request, *args, **kwargs)
+        # Plain rows instead of model instances + DRF fields; same JSON as TaskSerializer
+        queryset = self.filter_queryset(self.get_queryset()).values(*TASK_ROW_FIELDS)
+        rows = self.paginate_queryset(queryset)
+        with phase("serialize"):
+            data = serialize_task_rows(rows)
+        return self.get_paginated_response(data)
+
+    def perform_create(self, serializer):
+        task = serializer.save(owner=self.request.user)
+        if settings.TASK_ENRICHMENT_ENABLED:
+            # Picked up by `manage.py enrichment_worker`; the response doesn't wait on the AI
+            enqueue_enrichment(task)
+            task.enrichment_status = "pending"
+
+    def perform_update(self, serializer):
+        input_hash = task_input_hash(serializer.instance)
+        task = serializer.save()
+        # A new title or description gets a new suggestion; the old job won't apply to it
+        if settings.TASK_ENRICHMENT_ENABLED and task_input_hash(task) != input_hash:
+            enqueue_enrichment(task)
+            task.enrichment_status = "pending"
+
+    @action(detail=False, methods=["get"])
+    def stats(self, request):
+        # Dashboard header counts; cached per owner instead of recounted per request
+        return Response(get_task_stats(request.user.pk), status=status.HTTP_200_OK)
+
+    # Bulk operations: one transaction and a fixed number of queries per call,
+    # whatever the number of items. Nothing is written if any item is invalid.
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk")
+    def bulk(self, request):
+        if request.method == "POST":
+            return self.bulk_create(request)
+        if request.method == "PATCH":
+            return self.bulk_update(request)
+        return self.bulk_destroy(request)
+
+    def get_bulk_list(self, request, key):
+        items = request.data.get(key) if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({key: "Expected a non-empty list."})
+        if len(items) > settings.TASK_BULK_MAX_ITEMS:
+            raise ValidationError({key: f"At most {settings.TASK_BULK_MAX_ITEMS} items per request."})
+        return items
+
+    def get_bulk_context(self, items):
+        # Resolve every referenced category with one query
+        category_ids = set()
+        for item in items:
+            try:
+                category_ids.add(int(item["category"]))
+            except (TypeError, KeyError, ValueError):
+                pass
+        categories = (
+            Category.objects.filter(owner=self.request.user).in_bulk(category_ids)
+            if category_ids else {}
+        )
+        return {**self.get_serializer_context(), "categories": categories}
+
+    def bulk_create(self, request):
+        items = self.get_bulk_list(request, "items")
+        context = self.get_bulk_context(items)
+        sers = [TaskBulkItemSerializer(data=item, context=context) for item in items]
+        # Validate every item (no short-circuit) so all errors are reported
+        if not all([ser.is_valid() for ser in sers]):
+            return Response({"errors": [ser.errors for ser in sers]}, status=status.HTTP_400_BAD_REQUEST)
+
+        enrich = settings.TASK_ENRICHMENT_ENABLED
+        tasks = [
+            Task(owner=request.user, enrichment_status="pending" if enrich else "none", **ser.validated_data)
+            for ser in sers
+        ]
+        with transaction.atomic():
+            tasks = Task.objects.bulk_create(tasks)
+            if enrich:
+                enqueue_enrichment_bulk(tasks)
+            # bulk_create/bulk_update don't send signals
+            publish_saved_bulk(tasks)
+        invalidate_task_stats(request.user.pk)
+        return Response(TaskSerializer(tasks, many=True).data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, request):
+        items = self.get_bulk_list(request, "items")
+        context = self.get_bulk_context(items)
+        ids = [item.get("id") for item in items if isinstance(item, dict)]
+        tasks = self.get_queryset().in_bulk([i for i in ids if isinstance(i, int)])
 
-class ContextEntryViewSet(viewsets.ModelViewSet):
+        enrich = settings.TASK_ENRICHMENT_ENABLED
+        errors, updated, fields, to_enrich = [], {}, set(), []
+        for item in items:
+            task = tasks.get(item.get("id")) if isinstance(item, dict) else None
+            if task is None:
+                errors.append({"id": ["Not found."]})
+                continue
+            ser = TaskBulkItemSerializer(task, data=item, partial=True, context=context)
+            if not ser.is_valid():
+                errors.append(ser.errors)
+                continue
+            input_hash = task_input_hash(task)
+            for field, value in ser.validated_data.items():
+                setattr(task, field, value)
+                fields.add(field)
+            # Same rule as perform_update: a new title or description gets a new suggestion
+            if enrich and task_input_hash(task) != input_hash:
+                task.enrichment_status = "pending"
+                fields.add("enrichment_status")
+                to_enrich.append(task)
+            updated[task.pk] = task
+            errors.append({})
+        if any(errors):
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        # bulk_update skips auto_now, so stamp updated_at ourselves
+        now = timezone.now()
+        for task in updated.values():
+            task.updated_at = now
+        with transaction.atomic():
+            Task.objects.bulk_update(updated.values(), sorted(fields) + ["updated_at"])
+            if to_enrich:
+                enqueue_enrichment_bulk(to_enrich)
+            publish_saved_bulk(updated.values())
+        invalidate_task_stats(request.user.pk)
+        return Response(TaskSerializer(updated.values(), many=True).data, status=status.HTTP_200_OK)
+
+    def bulk_destroy(self, request):
+        ids = self.get_bulk_list(request, "ids")
+        if not all(isinstance(i, int) for i in ids):
+            raise ValidationError({"ids": "Expected a list of task ids."})
+        queryset = self.get_queryset().filter(id__in=ids)
+        with transaction.atomic():
+            deleted_ids = list(queryset.values_list("id", flat=True))
+            _, per_model = queryset.delete()
+            record_deletions(Task, request.user.pk, deleted_ids)
+            publish_deleted(Task, request.user.pk, deleted_ids)
+        return Response({"deleted": per_model.get(Task._meta.label, 0)}, status=status.HTTP_200_OK)
+
+class ContextEntryViewSet(ReplicaReadMixin, OwnedQuerysetMixin, ConditionalListMixin, viewsets.ModelViewSet):
     queryset = ContextEntry.objects.all()
     serializer_class = ContextEntrySerializer
 
-class CategoryViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=["post"], url_path=r"ingest/(?P<source>whatsapp|email)")
+    def ingest(self, request, source):
+        """
+        A WhatsApp chat export (.txt) or an mbox/.eml dump, as a multipart `file` or the raw body.
+        Entries already present (same content hash) are skipped.
+        """
+        if request.content_type.startswith("multipart/"):
+            upload = request.FILES.get("file")
+        else:
+            upload = request.stream
+        if upload is None:
+            raise ParseError("Send the export as the request body or as a multipart `file`.")
+        return Response(Ingestor(request.user, source).run(upload), status=status.HTTP_200_OK)
+
+class CategoryViewSet(ReplicaReadMixin, OwnedQuerysetMixin, ConditionalListMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
+class SyncView(APIView):
+    """
+    GET /api/sync/?since=<cursor>: tasks, categories and contexts changed since the
+    cursor from the previous sync, plus ids deleted since then.
+    """
+
+    def get(self, request):
+        try:
+            since = parse_cursor(request.query_params.get("since"))
+        except InvalidCursor as e:
+            raise ValidationError({"since": str(e)})
+        return Response(get_changes(request.user.pk, since), status=status.HTTP_200_OK)
+
+def check_transfer_path(kind, fmt):
+    if kind not in KINDS or fmt not in FORMATS:
+        raise NotFound(f"Use {'|'.join(KINDS)}.{'|'.join(FORMATS)}.")
+
+class ExportView(APIView):
+    """GET /api/export/<tasks|contexts>.<ndjson|csv>: every row, streamed."""
+
+    def get(self, request, kind, fmt):
+        check_transfer_path(kind, fmt)
+        chunks = export_chunks(request.user.pk, kind, fmt)
+        if isinstance(request._request, ASGIRequest):
+            chunks = aiterate(chunks)
+        resp = StreamingHttpResponse(chunks, content_type=f"{FORMATS[fmt]}; charset=utf-8")
+        resp["Content-Disposition"] = f'attachment; filename="{kind}.{fmt}"'
+        return resp
+
+class ImportView(ReplicaReadMixin, APIView):
+    """
+    POST /api/import/<tasks|contexts>.<ndjson|csv> with the file as the raw body,
+    in the export's format. Rows are read and written in chunks; invalid rows are
+    skipped and reported. Afterwards the user's reads stay on the primary, as after
+    any other write.
+    """
+
+    def post(self, request, kind, fmt):
+        check_transfer_path(kind, fmt)
+        if request.stream is None:
+            raise ParseError("Send the file as the request body.")
+        # Lines are decoded as they are read; the body is never loaded whole
+        lines = codecs.iterdecode(request.stream, "utf-8-sig")
+        try:
+            report = Importer(request.user, kind).run(parse_records(lines, fmt))
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ParseError(f"Could not read the file: {e}")
+        return Response(report, status=status.HTTP_200_OK)
+
 class RegisterView(APIView):
     permission_classes = [AllowAny]
     
@@ -46,10 +344,11 @@ class RegisterView(APIView):
                 )
 
             # Register with Supabase
-            res = supabase.auth.sign_up({
-                "email": data["email"],
-                "password": data["password"]
-            })
+            with phase("http", upstream="supabase_auth"):
+                res = get_supabase().auth.sign_up({
+                    "email": data["email"],
+                    "password": data["password"]
+                })
             
             # Check if registration was successful
             if not getattr(res, "user", None):
@@ -72,7 +371,7 @@ class RegisterView(APIView):
                 status=status.HTTP_201_CREATED
             )
 
-        except AuthApiError as e:
+        except supabase_client.AuthApiError as e:
             # Handle specific Supabase auth errors
             error_message = e.message
             if "already registered" in error_message.lower():
@@ -92,6 +391,49 @@ class RegisterView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+def get_or_create_profile(user):
+    """Local profile for a Supabase user, via the auth profile cache."""
+    try:
+        return get_cached_profile(user.id)
+    except UserProfile.DoesNotExist:
+        # Create profile if it doesn't exist (for existing Supabase users)
+        return UserProfile.objects.create(
+            supabase_uid=user.id,
+            username=user.email.split('@')[0],  # fallback username
+            email=user.email
+        )
+
+def session_response(session, user_profile):
+    """Login/refresh response body plus the HttpOnly token cookies."""
+    resp = Response({
+        "access_token": session.access_token,
+        "refresh_token": session.refresh_token,
+        "user": {
+            "id": str(user_profile.supabase_uid),  # Use supabase_uid as string
+            "username": user_profile.username,
+            "email": user_profile.email
+        }
+    }, status=status.HTTP_200_OK)
+
+    # Set HttpOnly cookies as backup
+    resp.set_cookie(
+        key="authToken",
+        value=session.access_token,
+        httponly=True,
+        secure=not settings.DEBUG,
+        samesite="Lax",
+        max_age=session.expires_in or 3600  # seconds until expiry, if available
+    )
+    resp.set_cookie(
+        key="refresh_token",
+        value=session.refresh_token,
+        httponly=True,
+        secure=not settings.DEBUG,
+        samesite="Lax",
+        max_age=90 * 24 * 3600
+    )
+    return resp
+
 class LoginView(APIView):
     permission_classes = [AllowAny]
 
@@ -101,10 +443,11 @@ class LoginView(APIView):
         data = ser.validated_data
 
         try:
-            res = supabase.auth.sign_in_with_password({
-                "email": data["email"],
-                "password": data["password"]
-            })
+            with phase("http", upstream="supabase_auth"):
+                res = get_supabase().auth.sign_in_with_password({
+                    "email": data["email"],
+                    "password": data["password"]
+                })
 
             session = getattr(res, "session", None)
             user = getattr(res, "user", None)
@@ -115,53 +458,9 @@ class LoginView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            access_token = session.access_token
-            refresh_token = session.refresh_token
-            expires_in = session.expires_in  # seconds until expiry, if available
-
-            # Get or create user profile from local DB
-            try:
-                user_profile = UserProfile.objects.get(supabase_uid=user.id)
-            except UserProfile.DoesNotExist:
-                # Create profile if it doesn't exist (for existing Supabase users)
-                user_profile = UserProfile.objects.create(
-                    supabase_uid=user.id,
-                    username=user.email.split('@')[0],  # fallback username
-                    email=user.email
-                )
-
-            # Build response with the expected format
-            resp = Response({
-                "access_token": access_token,
-                "refresh_token": refresh_token,
-                "user": {
-                    "id": str(user_profile.supabase_uid),  # Use supabase_uid as string
-                    "username": user_profile.username,
-                    "email": user_profile.email
-                }
-            }, status=status.HTTP_200_OK)
-
-            # Set HttpOnly cookies as backup
-            resp.set_cookie(
-                key="authToken",
-                value=access_token,
-                httponly=True,
-                secure=not settings.DEBUG,
-                samesite="Lax",
-                max_age=expires_in or 3600
-            )
-            resp.set_cookie(
-                key="refresh_token",
-                value=refresh_token,
-                httponly=True,
-                secure=not settings.DEBUG,
-                samesite="Lax",
-                max_age=90 * 24 * 3600
-            )
-
-            return resp
+            return session_response(session, get_or_create_profile(user))
 
-        except AuthApiError as e:
+        except supabase_client.AuthApiError as e:
             # Handle specific Supabase auth errors
             error_message = e.message
             if "invalid login credentials" in error_message.lower():
@@ -179,6 +478,30 @@ class LoginView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class RefreshView(APIView):
+    """
+    Exchange a refresh token, from the body or the refresh_token cookie, for a new
+    access token. Concurrent refreshes of one token reach Supabase only once.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []  # the caller's access token has usually just expired
+
+    def post(self, request):
+        ser = RefreshSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        refresh_token = ser.validated_data.get("refresh_token") or request.COOKIES.get("refresh_token")
+        if not refresh_token:
+            return Response({"detail": "No refresh token provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            session = refresh_session(refresh_token)
+        except supabase_client.AuthApiError:
+            resp = Response({"detail": "Invalid or expired refresh token."}, status=status.HTTP_401_UNAUTHORIZED)
+            resp.delete_cookie("authToken")
+            resp.delete_cookie("refresh_token")
+            return resp
+        return session_response(session, get_or_create_profile(session.user))
+
 class ResetPasswordView(APIView):
     permission_classes = [AllowAny]
     
@@ -196,14 +519,15 @@ class ResetPasswordView(APIView):
                 )
 
             # Send reset email via Supabase
-            res = supabase.auth.reset_password_email(email)
+            with phase("http", upstream="supabase_auth"):
+                res = get_supabase().auth.reset_password_email(email)
             
             return Response(
                 {"message": "Password reset email sent successfully. Please check your inbox."},
                 status=status.HTTP_200_OK
             )
 
-        except AuthApiError as e:
+        except supabase_client.AuthApiError as e:
             # Handle specific Supabase auth errors
             error_message = e.message
             if "user not found" in error_message.lower():
@@ -229,9 +553,25 @@ class CategorizeView(APIView):
         
         suggested = suggest_category(
             data["title"],
-            data["description"]
+            data["description"],
+            owner_id=request.user.pk
         )
         return Response({"suggested_category": suggested}, status=status.HTTP_200_OK)
+
+class CategorizeBatchView(APIView):
+    def post(self, request):
+        ser = CategorizeBatchSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        # Literal matches first, the rest through the classifier in one batch
+        suggested = suggest_categories(
+            [(item["title"], item["description"]) for item in ser.validated_data["items"]],
+            owner_id=request.user.pk,
+        )
+        return Response(
+            {"results": [{"suggested_category": name} for name in suggested]},
+            status=status.HTTP_200_OK,
+        )
     
 class AISuggestionView(APIView):
     def post(self, request):
@@ -241,18 +581,52 @@ class AISuggestionView(APIView):
             description = data.get("description", "")
             context = data.get("context", "")
 
-            output = get_ai_task_suggestions(title, description, context)
+            output, cache_status = get_ai_task_suggestions_with_status(
+                title, description, context, owner_id=request.user.pk
+            )
 
-            # Parse output (basic version)
-            lines = output.strip().splitlines()
-            result = {
-                "priority_score": float(lines[0].split(":")[1].strip()),
-                "suggested_deadline": lines[1].split(":")[1].strip(),
-                "enhanced_description": lines[2].split(":", 1)[1].strip(),
-                "suggested_category": lines[3].split(":")[1].strip()
-            }
+            result = parse_suggestion(output)
 
-            return Response(result, status=status.HTTP_200_OK)
+            resp = Response(result, status=status.HTTP_200_OK)
+            resp["X-Suggestion-Cache"] = cache_status
+            return resp
 
+        except HuggingFaceRateLimited as e:
+            resp = Response({"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            resp["Retry-After"] = str(e.retry_after)
+            return resp
+        except HuggingFaceUnavailable as e:
+            resp = Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            if e.retry_after:
+                resp["Retry-After"] = str(e.retry_after)
+            return resp
         except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class AISuggestionBatchView(APIView):
+    def post(self, request):
+        ser = AISuggestionBatchSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        # Items run concurrently; a failing item doesn't fail the batch
+        items = [dict(item, owner_id=request.user.pk) for item in ser.validated_data["items"]]
+        results = get_ai_task_suggestions_batch(items)
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+@require_GET
+def metrics_view(request):
+    """
+    Prometheus text exposition of this process's metrics. Outside DRF so the
+    scraper needs no Supabase token; it sends METRICS_TOKEN instead. Without a
+    token configured the endpoint is only served when DEBUG is on.
+    """
+    if not settings.METRICS_ENABLED:
+        return HttpResponse(status=404)
+    if not settings.METRICS_TOKEN:
+        if not settings.DEBUG:
+            return HttpResponse(status=404)
+    elif not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        return HttpResponse(status=401)
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")